@@ -0,0 +1,239 @@
+"""
+Cross-session answer analytics for the Grammar Genius app.
+
+Every graded answer (right or wrong) is appended to a deque - an atomic
+operation under the GIL, so sessions never wait on each other - and a
+background thread folds the events into fixed-size aggregates:
+
+* a preallocated table of counters per (category, item, case): attempts,
+  correct answers and how often each wrong option (distractor) was chosen.
+  Generated exercise sets ("<item>~<seed>") are unbounded, so their answers
+  share one row per item (case GENERATED_CASE) instead of a row per case;
+* HyperLogLog sketches of distinct learners, overall and per item.
+
+Memory is fixed by the table capacity and the sketch sizes. Cases beyond
+the capacity are only counted as untracked. The aggregates are written to a
+JSON snapshot periodically and reloaded on start.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 16384
+MAX_CHOICES = 8
+HLL_PRECISION = 12
+MAX_ITEM_SKETCHES = 256
+DEFAULT_FLUSH_SECONDS = 10.0
+DRAIN_SECONDS = 0.1
+MAX_PENDING_EVENTS = 200_000
+
+# Counter columns; wrong-choice counts follow
+ATTEMPTS, CORRECT = 0, 1
+COLUMNS = 2 + MAX_CHOICES
+# case_index of the row that holds an item's generated-set answers
+GENERATED_CASE = -1
+
+def row_key(category, item_key, case_index):
+    """Counter row of an answer: the corpus case, or its item's generated-set bucket."""
+    base_key, generated, _ = item_key.partition("~")
+    return (category, base_key, GENERATED_CASE if generated else case_index)
+
+##############################################################################
+# HYPERLOGLOG - approximate distinct counts in 2**precision bytes
+##############################################################################
+class HyperLogLog:
+    """Distinct-count sketch; relative error about 1.04 / sqrt(2**precision)."""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return float(raw)
+
+    def encode(self):
+        return base64.b64encode(self.registers.tobytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, text, precision=HLL_PRECISION):
+        registers = np.frombuffer(base64.b64decode(text), dtype=np.uint8).copy()
+        return cls(precision, registers)
+
+##############################################################################
+# AGGREGATOR
+##############################################################################
+class AnswerAnalytics:
+    """
+    record() is all a session calls. The aggregator thread drains the event
+    deque every DRAIN_SECONDS and writes a snapshot every ``flush_seconds``;
+    ``_lock`` only guards the aggregates between that thread and readers.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.path = str(path)
+        self.capacity = capacity
+        self.flush_seconds = flush_seconds
+        self._events = deque(maxlen=MAX_PENDING_EVENTS)
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._counts = np.zeros((capacity, COLUMNS), dtype=np.int64)
+        self._learners = HyperLogLog()
+        self._item_learners = {}
+        self.events_total = 0
+        self.untracked_events = 0
+        self._load()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="answer-analytics", daemon=True)
+        self._thread.start()
+
+    def record(self, learner_id, category, item_key, case_index, choice_index, correct):
+        """Queues one graded answer; never blocks."""
+        self._events.append((learner_id, category.value, item_key, case_index, choice_index, correct))
+
+    def _apply(self, events):
+        with self._lock:
+            for learner_id, category, item_key, case_index, choice_index, correct in events:
+                self.events_total += 1
+                self._learners.add(learner_id)
+                key = row_key(category, item_key, case_index)
+                item = key[:2]
+                sketch = self._item_learners.get(item)
+                if sketch is None and len(self._item_learners) < MAX_ITEM_SKETCHES:
+                    sketch = self._item_learners[item] = HyperLogLog()
+                if sketch is not None:
+                    sketch.add(learner_id)
+
+                row = self._rows.get(key)
+                if row is None:
+                    if len(self._rows) >= self.capacity:
+                        self.untracked_events += 1
+                        continue
+                    row = self._rows[key] = len(self._rows)
+                counts = self._counts[row]
+                counts[ATTEMPTS] += 1
+                if correct:
+                    counts[CORRECT] += 1
+                elif 0 <= choice_index < MAX_CHOICES:
+                    counts[2 + choice_index] += 1
+
+    def drain(self):
+        """Folds every queued event into the aggregates."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                break
+        if events:
+            self._apply(events)
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_seconds
+        while not self._stop.wait(DRAIN_SECONDS):
+            self.drain()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_seconds
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.drain()
+        self.flush()
+
+    ##########################################################################
+    # READING
+    ##########################################################################
+    def case_stats(self):
+        """[{category, item_key, case_index, attempts, correct, wrong_choices}, ...] for tracked cases."""
+        with self._lock:
+            keys = list(self._rows.items())
+            counts = self._counts[:len(keys)].copy()
+        return [
+            {"category": category, "item_key": item_key, "case_index": case_index,
+             "attempts": int(counts[row, ATTEMPTS]), "correct": int(counts[row, CORRECT]),
+             "wrong_choices": counts[row, 2:].tolist()}
+            for (category, item_key, case_index), row in keys
+        ]
+
+    def learner_counts(self):
+        """(distinct learners overall, {(category, item_key): distinct learners})."""
+        with self._lock:
+            return (round(self._learners.estimate()),
+                    {item: round(sketch.estimate()) for item, sketch in self._item_learners.items()})
+
+    def stats(self):
+        with self._lock:
+            return {"events": self.events_total, "tracked_cases": len(self._rows),
+                    "untracked_events": self.untracked_events, "pending": len(self._events),
+                    "memory_bytes": self._counts.nbytes + (len(self._item_learners) + 1) * (1 << HLL_PRECISION)}
+
+    ##########################################################################
+    # SNAPSHOT FILE
+    ##########################################################################
+    def flush(self):
+        """Writes the aggregates to ``path`` (atomically, via a temp file)."""
+        with self._lock:
+            snapshot = {
+                "events_total": self.events_total,
+                "untracked_events": self.untracked_events,
+                "cases": [[category, item_key, case_index] + self._counts[row].tolist()
+                          for (category, item_key, case_index), row in self._rows.items()],
+                "learners": self._learners.encode(),
+                "item_learners": [[category, item_key, sketch.encode()]
+                                  for (category, item_key), sketch in self._item_learners.items()],
+            }
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.exception("Could not write the analytics snapshot to %s", self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable analytics snapshot %s", self.path)
+            return
+        self.events_total = snapshot["events_total"]
+        self.untracked_events = snapshot["untracked_events"]
+        for category, item_key, case_index, *counts in snapshot["cases"]:
+            # Snapshots from before generated sets were bucketed are folded in
+            key = row_key(category, item_key, case_index)
+            row = self._rows.get(key)
+            if row is None:
+                if len(self._rows) >= self.capacity:
+                    continue
+                row = self._rows[key] = len(self._rows)
+            self._counts[row] += counts
+        self._learners = HyperLogLog.decode(snapshot["learners"])
+        for category, item_key, registers in snapshot["item_learners"][:MAX_ITEM_SKETCHES]:
+            self._item_learners[(category, item_key)] = HyperLogLog.decode(registers)
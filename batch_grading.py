@@ -0,0 +1,221 @@
+"""
+Offline grading of class answer sheets for the Grammar Genius app.
+
+A sheet is a CSV with a ``student`` column followed by one column per
+exercise of an item (in usage_cases order), each cell holding the answer
+text a student picked (blank if skipped). The sheet is read in chunks of
+CHUNK_ROWS rows; each chunk's answers become a (rows x questions) matrix of
+choice indices that NumPy compares against the precomputed correct indices
+in one operation, so no Python code runs per student.
+
+Per-student scores are appended to a results CSV chunk by chunk and
+per-question counts are accumulated, so memory stays bounded by the chunk
+size however large the sheet is. BatchGrader runs sheets on a background
+thread pool, off the script thread, and deletes each job's files
+JOB_TTL_SECONDS after it finished.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STUDENT_COLUMN = "student"
+CHUNK_ROWS = 10_000
+DEFAULT_WORKERS = 2
+JOB_TTL_SECONDS = 60 * 60
+
+##############################################################################
+# ANSWER KEY + CHUNK GRADING
+##############################################################################
+class AnswerKey:
+    """
+    Normalized choices and correct-choice indices for one item's usage_cases.
+    Raises ValueError if two choices of an exercise normalize to the same
+    text, since a sheet answer could not tell them apart.
+    """
+
+    def __init__(self, usage_cases):
+        self.titles = [case["title"] for case in usage_cases]
+        self.choices = []
+        for case in usage_cases:
+            choices = pd.Index([_normalize(c) for c in case["choices"]])
+            if not choices.is_unique:
+                duplicates = ", ".join(repr(c) for c in choices[choices.duplicated()].unique())
+                raise ValueError(f"Exercise {case['title']!r} has choices that differ only in case or "
+                                 f"spacing ({duplicates}), so answers to it cannot be graded")
+            self.choices.append(choices)
+        self.correct = np.array(
+            [list(case["choices"]).index(case["correct_choice"]) for case in usage_cases], dtype=np.int16)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def header(self):
+        return [STUDENT_COLUMN] + self.titles
+
+def _normalize(text):
+    return str(text).strip().lower()
+
+def answer_codes(chunk, key):
+    """
+    (codes, blank): the chosen option index per student and question (-1 for
+    blank or unknown answers) and where the cell was blank.
+    """
+    codes = np.empty((len(chunk), len(key)), dtype=np.int16)
+    blank = np.empty((len(chunk), len(key)), dtype=bool)
+    for q in range(len(key)):
+        column = chunk.iloc[:, q + 1].str.strip().str.lower()
+        codes[:, q] = key.choices[q].get_indexer(column)
+        blank[:, q] = (column == "").to_numpy()
+    return codes, blank
+
+##############################################################################
+# SHEET GRADING
+##############################################################################
+def grade_sheet(source, key, scores_path, chunk_rows=CHUNK_ROWS, on_progress=None):
+    """
+    Grades a sheet (path or file object) chunk by chunk. Per-student scores
+    are written to ``scores_path``; returns the class summary with
+    per-question counts and error rates.
+    """
+    questions = len(key)
+    correct_counts = np.zeros(questions, dtype=np.int64)
+    blank_counts = np.zeros(questions, dtype=np.int64)
+    invalid_counts = np.zeros(questions, dtype=np.int64)
+    score_histogram = np.zeros(questions + 1, dtype=np.int64)
+    students = 0
+
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    with open(scores_path, "w", newline="", encoding="utf-8") as out:
+        for chunk in reader:
+            if students == 0 and len(chunk.columns) != questions + 1:
+                raise ValueError(
+                    f"Expected a '{STUDENT_COLUMN}' column and {questions} answer columns, "
+                    f"got {len(chunk.columns)} columns")
+            codes, blank = answer_codes(chunk, key)
+            correct = codes == key.correct
+            scores = correct.sum(axis=1)
+            correct_counts += correct.sum(axis=0)
+            blank_counts += blank.sum(axis=0)
+            invalid_counts += ((codes < 0) & ~blank).sum(axis=0)
+            score_histogram += np.bincount(scores, minlength=questions + 1)
+
+            pd.DataFrame({
+                STUDENT_COLUMN: chunk.iloc[:, 0].to_numpy(),
+                "score": scores,
+                "total": questions,
+                "percent": np.round(scores * 100.0 / questions, 1),
+            }).to_csv(out, header=students == 0, index=False)
+            students += len(chunk)
+            if on_progress is not None:
+                on_progress(students)
+
+    wrong = students - correct_counts
+    return {
+        "students": students,
+        "questions": questions,
+        "mean_score": float((score_histogram * np.arange(questions + 1)).sum() / students) if students else 0.0,
+        "score_histogram": score_histogram.tolist(),
+        "per_question": pd.DataFrame({
+            "question": key.titles,
+            "correct": correct_counts,
+            "wrong": wrong,
+            "blank": blank_counts,
+            "unrecognized": invalid_counts,
+            "error_rate": np.round(wrong / students, 4) if students else 0.0,
+        }),
+    }
+
+##############################################################################
+# BACKGROUND GRADER
+##############################################################################
+class GradingJob:
+    """One submitted sheet: progress counter, then a summary or an error."""
+
+    def __init__(self, job_dir, item_name):
+        self.job_dir = job_dir
+        self.item_name = item_name
+        self.sheet_path = os.path.join(job_dir, "sheet.csv")
+        self.scores_path = os.path.join(job_dir, "scores.csv")
+        self.rows_done = 0
+        self.summary = None
+        self.error = None
+        self.future = None
+        self.finished_at = None
+        self.discarded = False
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def per_question_csv(self):
+        return self.summary["per_question"].to_csv(index=False).encode("utf-8")
+
+    def discard(self):
+        """Deletes the job's files (uploaded sheet and results); the summary stays."""
+        self.discarded = True
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+
+class BatchGrader:
+    """
+    Grades sheets on a thread pool; each job works in its own temp directory,
+    which sweep() deletes once the job has been finished for ``ttl_seconds``
+    (whichever session submitted it, and whether or not it is still open).
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, chunk_rows=CHUNK_ROWS, ttl_seconds=JOB_TTL_SECONDS):
+        self.chunk_rows = chunk_rows
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-grader")
+        self._lock = threading.Lock()
+        self._jobs = []
+        self.jobs_run = 0
+
+    def submit(self, upload, usage_cases, item_name):
+        """
+        Copies the upload (file object) to disk and queues it; returns the
+        GradingJob. Raises ValueError for an answer key that cannot be graded.
+        """
+        key = AnswerKey(usage_cases)
+        self.sweep()
+        job = GradingJob(tempfile.mkdtemp(prefix="grading-"), item_name)
+        upload.seek(0)
+        with open(job.sheet_path, "wb") as f:
+            shutil.copyfileobj(upload, f)
+        with self._lock:
+            self._jobs.append(job)
+        job.future = self._pool.submit(self._run, job, key)
+        return job
+
+    def sweep(self, now=None):
+        """Deletes the files of jobs finished more than ttl_seconds ago; returns how many."""
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock:
+            expired = [job for job in self._jobs if job.finished_at is not None and job.finished_at < cutoff]
+            self._jobs = [job for job in self._jobs if job not in expired]
+        for job in expired:
+            job.discard()
+        return len(expired)
+
+    def _run(self, job, key):
+        def on_progress(rows):
+            job.rows_done = rows
+        try:
+            job.summary = grade_sheet(job.sheet_path, key, job.scores_path, self.chunk_rows, on_progress)
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            job.error = str(e)
+        except Exception:
+            logger.exception("Grading %s failed", job.sheet_path)
+            job.error = "Grading failed; see the server log."
+        finally:
+            os.remove(job.sheet_path)
+            with self._lock:
+                self.jobs_run += 1
+            job.finished_at = time.time()
@@ -0,0 +1,111 @@
+"""
+Server CPU while timed exams are running.
+
+Starts a local Streamlit server and connects --sessions learners (see
+ws_client), each on the exercises of one item. Server CPU time is sampled
+over a --window seconds for each phase:
+
+    idle page     learners sit on the exercises, no exam running
+    naive timer   a full rerun per second and learner - what a countdown
+                  redrawn by rerunning main() every second would cost
+    timed exam    learners sit in a running timed exam: the clock ticks in
+                  the browser and its fragment only wakes up at the deadline
+
+Then the exams run out, and each session must show its results without
+having clicked anything (the deadline fragment submitted it).
+
+Run from the repository root:
+
+    python -m benchmarks.exam_cpu_bench --sessions 8 --window 20 --out bench_exam_cpu.json
+"""
+import argparse
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.rerun_bench import APP_PATH
+from benchmarks.ws_client import StreamlitSession, process_cpu_seconds, streamlit_server
+
+START_BUTTON = "⏱️ Start timed exam"
+RESULTS_BUTTON = "⏱️ New timed exam"
+
+def open_item(base_url, n):
+    session = StreamlitSession(base_url, query_string=f"learner=exam-bench-{n}")
+    session.rerun()
+    box = session.widget("tense_choice")
+    session.set_value("tense_choice", box.options[1 + n % (len(box.options) - 1)])
+    return session
+
+def measure(pid, sessions, window, action):
+    """CPU seconds the server used while every session ran action(session) for the window."""
+    cpu = process_cpu_seconds(pid)
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        counts = list(pool.map(action, sessions))
+    return process_cpu_seconds(pid) - cpu, sum(counts)
+
+def naive_timer(window):
+    def run(session):
+        reruns = 0
+        end = time.monotonic() + window
+        while time.monotonic() < end:
+            started = time.monotonic()
+            session.rerun()
+            reruns += 1
+            time.sleep(max(0.0, 1.0 - (time.monotonic() - started)))
+        return reruns
+    return run
+
+def idle(window):
+    return lambda session: session.idle(window)[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Server CPU while timed exams run.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--window", type=float, default=20.0, help="Seconds measured per phase.")
+    parser.add_argument("--out", default="bench_exam_cpu.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    # The exam outlasts its measuring window, then runs out (minutes in steps of 0.5, as in the sidebar)
+    exam_minutes = math.ceil((args.window + 10) / 30) / 2
+    env = {"GRAMMAR_CONTENT": "builtin", "GRAMMAR_PROGRESS_DB": "", "GRAMMAR_SESSION_DB": "",
+           "GRAMMAR_ANALYTICS_FILE": "",
+           "GRAMMAR_EXAM_MINUTES": str(exam_minutes)}
+    rows = []
+    with streamlit_server(APP_PATH, env=env) as (base_url, proc):
+        sessions = [open_item(base_url, n) for n in range(args.sessions)]
+
+        for phase, action in (("idle page", idle(args.window)), ("naive timer", naive_timer(args.window))):
+            cpu, reruns = measure(proc.pid, sessions, args.window, action)
+            rows.append({"phase": phase, "cpu_seconds": cpu, "server_reruns": reruns})
+
+        for session in sessions:
+            session.set_value("answer_mode", "Timed exam")
+            session.click(START_BUTTON)
+        started = time.monotonic()
+        cpu, reruns = measure(proc.pid, sessions, args.window, idle(args.window))
+        rows.append({"phase": "timed exam", "cpu_seconds": cpu, "server_reruns": reruns})
+
+        # Past the deadline: the clock fragment fires once and submits
+        remaining = exam_minutes * 60 - (time.monotonic() - started) + 3
+        with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+            fired = sum(pool.map(idle(remaining), sessions))
+        submitted = sum(1 for session in sessions if RESULTS_BUTTON in session.widgets)
+        for session in sessions:
+            session.close()
+
+    print(f"{args.sessions} sessions, {args.window:g} s per phase")
+    print(f"{'phase':<12} {'server CPU s':>13} {'CPU ms/session/s':>17} {'reruns':>7}")
+    for row in rows:
+        row["cpu_ms_per_session_second"] = row["cpu_seconds"] * 1000 / args.sessions / args.window
+        print(f"{row['phase']:<12} {row['cpu_seconds']:>13.2f} {row['cpu_ms_per_session_second']:>17.2f} "
+              f"{row['server_reruns']:>7}")
+    print(f"At the deadline: {fired} clock wake-ups, {submitted} of {args.sessions} exams submitted automatically")
+
+    with open(args.out, "w") as f:
+        json.dump({"sessions": args.sessions, "window_seconds": args.window, "phases": rows,
+                   "deadline_wakeups": fired, "auto_submitted": submitted}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
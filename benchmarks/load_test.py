@@ -0,0 +1,167 @@
+"""
+Concurrent-session load generator for test25_12.py.
+
+Starts one local Streamlit server process and connects N simulated learners
+to it at once, each a websocket session (see ws_client) on its own worker
+thread. Every learner runs a randomized flow: pick a category and item,
+answer the open exercises (mostly correctly), open review when an item is
+complete and move on. For every concurrency level it reports throughput
+(reruns/s), p50/p95/p99 rerun latency and the server's RSS growth, which
+shows at what concurrency the full-script rerun model stops keeping up.
+
+streamlit.testing.v1.AppTest cannot be used here: each AppTest run creates
+and tears down a process-global mock runtime, so sessions cannot run
+concurrently in one process.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --sessions 1 2 4 8 16 32 --out bench_load.json
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.rerun_bench import APP_PATH, git_revision
+from benchmarks.stats import percentile
+from benchmarks.ws_client import StreamlitSession, process_rss_bytes, streamlit_server
+
+CATEGORIES = ("Tenses", "Conditionals")
+ITEM_SELECTBOXES = {"Tenses": "tense_choice", "Conditionals": "conditional_choice"}
+
+##############################################################################
+# ONE SIMULATED LEARNER
+##############################################################################
+class Learner:
+    """A randomized learner driving one websocket session."""
+
+    def __init__(self, base_url, seed, correct_rate, timeout):
+        self.rng = random.Random(seed)
+        self.session = StreamlitSession(base_url, timeout=timeout)
+        self.correct_rate = correct_rate
+        self.latencies = []
+        self.errors = 0
+        self.item_key = None
+
+    def _record(self, stats):
+        self.latencies.append(stats.seconds)
+        self.errors += stats.errors
+
+    def pick_item(self):
+        category = self.rng.choice(CATEGORIES)
+        self._record(self.session.set_value("category_choice", category))
+        box = self.session.widget(ITEM_SELECTBOXES[category])
+        option = self.rng.choice(box.options[1:])
+        self._record(self.session.set_value(ITEM_SELECTBOXES[category], option))
+        self.item_key = option.split(".")[0].strip()
+
+    def answer_one(self):
+        """Selects an option in an open card and submits it; False if none open."""
+        prefix = f"answer_{self.item_key}_"
+        boxes = self.session.widgets_with_prefix(prefix)
+        if not boxes:
+            return False
+        box = boxes[0]
+        i = box.id.rsplit("-", 1)[-1][len(prefix):]
+        # The built-in builders list the correct choice first
+        if self.rng.random() < self.correct_rate:
+            option = box.options[1]
+        else:
+            option = self.rng.choice(box.options[2:])
+        self._record(self.session.set_value(f"{prefix}{i}", option))
+        # A card graded in its last rerun still shows its selectbox; touching
+        # it collapses the card instead of offering Submit again
+        submit = f"submit_{self.item_key}_{i}"
+        if submit in self.session.widgets:
+            self._record(self.session.click(submit))
+        return True
+
+    def run(self, actions):
+        try:
+            self._record(self.session.rerun())
+            self.pick_item()
+            for _ in range(actions):
+                if "Review Your Answers" in self.session.widgets:
+                    self._record(self.session.click("Review Your Answers"))
+                    self.pick_item()
+                elif self.rng.random() < 0.1 or not self.answer_one():
+                    self.pick_item()
+        finally:
+            self.session.close()
+        return self
+
+##############################################################################
+# LOAD LEVELS
+##############################################################################
+def run_level(base_url, server_pid, sessions, actions, correct_rate, timeout, seed):
+    rss_before = process_rss_bytes(server_pid)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(lambda s: Learner(base_url, s, correct_rate, timeout).run(actions), seed + n)
+            for n in range(sessions)
+        ]
+        learners = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    rss_after = process_rss_bytes(server_pid)
+
+    latencies = sorted(l for learner in learners for l in learner.latencies)
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": sum(learner.errors for learner in learners),
+        "seconds": elapsed,
+        "reruns_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "server_rss_before_bytes": rss_before,
+        "server_rss_after_bytes": rss_after,
+        "server_rss_growth_bytes": rss_after - rss_before,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="Concurrency levels to run.")
+    parser.add_argument("--actions", type=int, default=30, help="Actions per learner.")
+    parser.add_argument("--cases", type=int, default=20, help="Synthetic cases per item.")
+    parser.add_argument("--correct-rate", type=float, default=0.7)
+    parser.add_argument("--timeout", type=float, default=120, help="Per-rerun timeout.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_load.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    # Pinned, so a compiled corpus.snap does not stand in for the sized built-in corpus;
+    # the learner stores are off so synthetic learners stay out of the real ones
+    env = {"GRAMMAR_CONTENT": "builtin", "GRAMMAR_CASES_PER_ITEM": str(args.cases),
+           "GRAMMAR_PROGRESS_DB": "", "GRAMMAR_SESSION_DB": "", "GRAMMAR_ANALYTICS_FILE": ""}
+    levels = []
+    with streamlit_server(APP_PATH, env=env) as (base_url, server):
+        # Warm imports and the process-wide corpus so level 1 is not penalized
+        Learner(base_url, args.seed, args.correct_rate, args.timeout).run(len(CATEGORIES) * 4)
+
+        print(f"{'N':>4} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS +MiB':>9}")
+        for n in args.sessions:
+            row = run_level(base_url, server.pid, n, args.actions, args.correct_rate,
+                            args.timeout, args.seed)
+            levels.append(row)
+            print(f"{n:>4} {row['reruns']:>7} {row['reruns_per_second']:>8.1f} {row['p50_ms']:>8.1f} "
+                  f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                  f"{row['server_rss_growth_bytes'] / 2**20:>9.1f}"
+                  + (f"  ({row['errors']} errors)" if row["errors"] else ""))
+
+    report = {
+        "app": APP_PATH.name,
+        "revision": git_revision(),
+        "actions": args.actions,
+        "cases": args.cases,
+        "levels": levels,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Memory of translated content: every locale up front vs. packs on demand.
+
+Writes --locales synthetic item packs (every formation, usage line, case
+explanation and context "translated") for the built-in corpus, then
+measures with tracemalloc what a worker holds for them:
+
+    eager         every (locale, item) pack read and localized at startup
+    lazy (N)      LocalePacks with an N-pack LRU, after --sessions learners
+                  each opened --views items in their language (a few reruns
+                  per item) - languages skewed like a real audience, where a
+                  handful of locales carry most learners
+
+The English corpus is built before measuring, so only translations count.
+"open ms" is the median first rerun of a learner on an item (a pack read,
+unless another learner already brought it in); "cached us" the later ones.
+
+Run from the repository root:
+
+    python -m benchmarks.locale_bench --locales 12 --cases 200 --out bench_locales.json
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from grammar_corpus import GrammarCategory, GrammarCorpus
+from locale_packs import LocalePacks, write_templates
+
+RERUNS_PER_VIEW = 5
+
+def corpus_items(corpus):
+    return [(category, item_key, corpus.item(category, item_key))
+            for category in GrammarCategory for item_key in corpus.item_keys(category)]
+
+def traced(fn):
+    """(result, bytes still allocated, peak bytes, seconds) of fn()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, seconds
+
+def eager(root, locales, items):
+    packs = LocalePacks(root, cache_packs=len(locales) * len(items))
+    for locale in locales:
+        for category, item_key, item in items:
+            packs.localize(locale, category, item_key, item)
+    return packs
+
+def lazy(root, locales, items, cache_packs, sessions, views, seed=0):
+    rng = random.Random(seed)
+    # Zipf-like audience: the n-th language has 1/n of the first one's learners
+    weights = [1 / (n + 1) for n in range(len(locales))]
+    packs = LocalePacks(root, cache_packs=cache_packs)
+    first, cached = [], []
+    for _ in range(sessions):
+        locale = rng.choices(locales, weights)[0]
+        for category, item_key, item in rng.sample(items, min(views, len(items))):
+            for rerun in range(RERUNS_PER_VIEW):
+                start = time.perf_counter()
+                packs.localize(locale, category, item_key, item)
+                (cached if rerun else first).append(time.perf_counter() - start)
+    return packs, first, cached
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of eager vs. on-demand locale packs.")
+    parser.add_argument("--locales", type=int, default=12)
+    parser.add_argument("--cases", type=int, default=200, help="Cases per item (sizes each pack).")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--views", type=int, default=4, help="Items each learner opens.")
+    parser.add_argument("--cache", type=int, nargs="+", default=[16, 64, 256], help="LRU sizes (packs).")
+    parser.add_argument("--out", default="bench_locales.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    corpus = GrammarCorpus(cases_per_item=args.cases)
+    items, english_bytes, _, _ = traced(lambda: corpus_items(corpus))
+    root = tempfile.mkdtemp(prefix="locale-bench-")
+    locales = [f"x{n:02d}" for n in range(args.locales)]
+    for locale in locales:
+        write_templates(corpus, root, locale, translate=lambda text, locale=locale: f"[{locale}] {text}")
+
+    rows = []
+    packs, current, peak, seconds = traced(lambda: eager(root, locales, items))
+    stats = packs.stats()
+    rows.append({"mode": "eager", "packs_held": stats["packs_cached"], "bytes": current, "peak_bytes": peak,
+                 "seconds": seconds, "hit_rate": None, "first_open_ms": None, "cached_us": None})
+    for cache_packs in args.cache:
+        (packs, first, cached), current, peak, seconds = traced(
+            lambda: lazy(root, locales, items, cache_packs, args.sessions, args.views))
+        stats = packs.stats()
+        rows.append({
+            "mode": f"lazy ({cache_packs})", "packs_held": stats["packs_cached"], "bytes": current,
+            "peak_bytes": peak, "seconds": seconds,
+            "hit_rate": stats["hits"] / max(1, stats["hits"] + stats["loads"]),
+            "first_open_ms": statistics.median(first) * 1000, "cached_us": statistics.median(cached) * 1e6,
+        })
+
+    print(f"{args.locales} locales x {len(items)} items ({args.cases} cases each); "
+          f"English corpus {english_bytes / 2**20:.1f} MiB")
+    print(f"{'mode':<12} {'packs':>6} {'held MiB':>9} {'peak MiB':>9} {'hit rate':>9} "
+          f"{'open ms':>8} {'cached us':>10}")
+    for row in rows:
+        hit_rate = "" if row["hit_rate"] is None else f"{row['hit_rate']:.1%}"
+        first_open = "" if row["first_open_ms"] is None else f"{row['first_open_ms']:.2f}"
+        cached = "" if row["cached_us"] is None else f"{row['cached_us']:.1f}"
+        print(f"{row['mode']:<12} {row['packs_held']:>6} {row['bytes'] / 2**20:>9.1f} "
+              f"{row['peak_bytes'] / 2**20:>9.1f} {hit_rate:>9} {first_open:>8} {cached:>10}")
+
+    with open(args.out, "w") as f:
+        json.dump({"locales": args.locales, "items": len(items), "cases_per_item": args.cases,
+                   "english_bytes": english_bytes, "sessions": args.sessions, "views": args.views,
+                   "results": rows}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
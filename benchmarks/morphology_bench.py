@@ -0,0 +1,104 @@
+"""
+Throughput of the conjugation table and the exercise generator.
+
+Builds ConjugationTable for the shipped lexicon and for a lexicon padded with
+synthetic regular verbs (--verbs), then measures phrase lookups, distractor
+picks, and how many complete multiple-choice cases per second
+generate_exercise_set() produces and validate_case() checks for every tense
+and conditional.
+
+Run from the repository root:
+
+    python -m benchmarks.morphology_bench --verbs 5000 --out bench_morphology.json
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+
+from exercise_gen import CONDITIONALS, TIME_EXPRESSIONS, generate_exercise_set, validate_case
+from grammar_corpus import GrammarCategory
+from morphology import LEXICON, NEGATIVE, PERSONS, POSITIVE, TENSE_NAMES, ConjugationTable
+
+def synthetic_verbs(count):
+    """Made-up regular stems ("blat", "drem", ...) to pad the lexicon."""
+    onsets = ["b", "bl", "br", "d", "dr", "f", "fl", "g", "gr", "k", "pl", "sn", "st", "tr", "v", "z"]
+    vowels = ["a", "e", "i", "o", "u", "ai", "ea", "oo"]
+    codas = ["b", "d", "g", "k", "m", "n", "p", "t", "sh", "ck", "nd", "rk", "mp", "st"]
+    syllables = ["".join(parts) for parts in itertools.product(onsets, vowels, codas)]
+    stems = itertools.chain(syllables, (s + suffix for suffix in ("en", "er", "le") for s in syllables))
+    taken = set(LEXICON)
+    return [stem for stem in stems if stem not in taken][:count]
+
+def timed(fn, n):
+    start = time.perf_counter()
+    fn(n)
+    return n / (time.perf_counter() - start)
+
+def run_table(verbs, lookups):
+    start = time.perf_counter()
+    table = ConjugationTable(verbs)
+    build_seconds = time.perf_counter() - start
+    rng = random.Random(0)
+    queries = [(rng.choice(verbs), rng.choice(TENSE_NAMES), rng.choice(PERSONS), rng.choice((POSITIVE, NEGATIVE)))
+               for _ in range(lookups)]
+
+    def lookup(n):
+        for verb, tense, person, polarity in queries[:n]:
+            table.phrase(verb, tense, person, polarity)
+
+    def distract(n):
+        for verb, tense, person, polarity in queries[:n]:
+            table.distractors(verb, tense, person, polarity, 2, rng)
+
+    return {
+        "verbs": len(table),
+        "build_ms": build_seconds * 1000,
+        "table_bytes": table.nbytes(),
+        "lookups_per_second": timed(lookup, lookups),
+        "distractor_sets_per_second": timed(distract, lookups // 10),
+    }
+
+def run_generation(seeds, count):
+    rows = []
+    for category, names in ((GrammarCategory.TENSES, TIME_EXPRESSIONS), (GrammarCategory.CONDITIONALS, CONDITIONALS)):
+        for name in names:
+            cases = invalid = 0
+            start = time.perf_counter()
+            for seed in range(seeds):
+                for case in generate_exercise_set(category, name, seed, count):
+                    cases += 1
+                    invalid += bool(validate_case(case))
+            elapsed = time.perf_counter() - start
+            rows.append({"item": name, "cases": cases, "invalid": invalid, "cases_per_second": cases / elapsed})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Conjugation table and exercise generation throughput.")
+    parser.add_argument("--verbs", type=int, default=5000, help="Padded lexicon size.")
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--seeds", type=int, default=200, help="Sets generated per item.")
+    parser.add_argument("--count", type=int, default=20, help="Cases per set.")
+    parser.add_argument("--out", default="bench_morphology.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    tables = []
+    print(f"{'verbs':>6} {'build ms':>9} {'KiB':>7} {'lookups/s':>11} {'distractor sets/s':>18}")
+    for verbs in (list(LEXICON), list(LEXICON) + synthetic_verbs(args.verbs - len(LEXICON))):
+        row = run_table(verbs, args.lookups)
+        tables.append(row)
+        print(f"{row['verbs']:>6} {row['build_ms']:>9.1f} {row['table_bytes'] / 1024:>7.0f} "
+              f"{row['lookups_per_second']:>11.0f} {row['distractor_sets_per_second']:>18.0f}")
+
+    print(f"\n{'item':<22} {'cases':>7} {'invalid':>8} {'cases/s':>9}")
+    generation = run_generation(args.seeds, args.count)
+    for row in generation:
+        print(f"{row['item']:<22} {row['cases']:>7} {row['invalid']:>8} {row['cases_per_second']:>9.0f}")
+
+    with open(args.out, "w") as f:
+        json.dump({"tables": tables, "generation": generation}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Bytes the server sends per rerun, captured on the websocket.
+
+Starts a local Streamlit server and drives --learners sessions (see
+ws_client, which caches messages and reports their hashes like the
+browser) through the same steps. Every step is one user action; its bytes
+are everything the server sent until the run finished, split by message
+and element type:
+
+    open app        first run, welcome page
+    pick item       choose a tense: theory block plus the first page of cards
+    page rerun      a full rerun on the item page (any sidebar change)
+    answer          choose an answer in a card (the card's fragment reruns)
+    submit          submit it (card and progress fragments rerun)
+    next item       choose another tense
+
+Run from the repository root:
+
+    python -m benchmarks.payload_bench --learners 5 --out bench_payload.json
+"""
+import argparse
+import json
+
+from benchmarks.rerun_bench import APP_PATH, git_revision
+from benchmarks.ws_client import StreamlitSession, streamlit_server
+
+STEPS = ("open app", "pick item", "page rerun", "answer", "submit", "next item")
+
+def first_open_card(session, item_key):
+    boxes = session.widgets_with_prefix(f"answer_{item_key}_")
+    return boxes[0].id.rsplit("-", 1)[-1]
+
+def learner_steps(session, n):
+    """Yields (step, RerunStats) for one learner's walk through STEPS."""
+    yield "open app", session.rerun()
+    options = session.widget("tense_choice").options
+    first, second = options[1 + n % (len(options) - 1)], options[1 + (n + 1) % (len(options) - 1)]
+    yield "pick item", session.set_value("tense_choice", first)
+    yield "page rerun", session.rerun()
+    item_key = first.split(".")[0]
+    answer_key = first_open_card(session, item_key)
+    yield "answer", session.set_value(answer_key, session.widget(answer_key).options[1])
+    yield "submit", session.click(answer_key.replace("answer_", "submit_", 1))
+    yield "next item", session.set_value("tense_choice", second)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes sent per rerun, by step.")
+    parser.add_argument("--learners", type=int, default=5)
+    parser.add_argument("--out", default="bench_payload.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    env = {"GRAMMAR_CONTENT": "builtin", "GRAMMAR_PROGRESS_DB": "", "GRAMMAR_SESSION_DB": "",
+           "GRAMMAR_ANALYTICS_FILE": ""}
+    totals = {step: {"reruns": 0, "bytes": 0, "deltas": 0, "by_element": {}} for step in STEPS}
+    with streamlit_server(APP_PATH, env=env) as (base_url, _):
+        for n in range(args.learners):
+            with StreamlitSession(base_url, query_string=f"learner=payload-bench-{n}") as session:
+                for step, stats in learner_steps(session, n):
+                    total = totals[step]
+                    total["reruns"] += 1
+                    total["bytes"] += stats.bytes
+                    total["deltas"] += stats.deltas
+                    for element, size in stats.bytes_by_element.items():
+                        total["by_element"][element] = total["by_element"].get(element, 0) + size
+
+    rows = []
+    for step, total in totals.items():
+        reruns = total["reruns"]
+        by_element = {element: size / reruns for element, size in
+                      sorted(total["by_element"].items(), key=lambda e: -e[1])}
+        rows.append({"step": step, "bytes": total["bytes"] / reruns, "deltas": total["deltas"] / reruns,
+                     "bytes_by_element": by_element})
+
+    print(f"{args.learners} learners, revision {git_revision()}")
+    print(f"{'step':<11} {'bytes':>8} {'deltas':>7}  largest element types (bytes)")
+    for row in rows:
+        largest = ", ".join(f"{element} {size:,.0f}" for element, size in list(row["bytes_by_element"].items())[:3])
+        print(f"{row['step']:<11} {row['bytes']:>8,.0f} {row['deltas']:>7.1f}  {largest}")
+
+    with open(args.out, "w") as f:
+        json.dump({"learners": args.learners, "revision": git_revision(), "steps": rows}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Sustained write throughput of the write-behind ProgressStore.
+
+N threads play concurrent sessions that submit answers for a fixed duration,
+either as fast as they can or at --rate submissions per second each. We report how long record() blocks the caller (what a
+Submit click would wait for) and how many rows per second the background
+writer actually commits to SQLite.
+
+Run from the repository root:
+
+    python -m benchmarks.progress_writes --sessions 1 16 128 --out bench_progress.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.stats import percentile
+from grammar_corpus import GrammarCategory
+from progress_store import ProgressStore
+
+def run_level(path, sessions, seconds, cases, rate):
+    store = ProgressStore(path)
+    stop_at = time.perf_counter() + seconds
+    latencies = [[] for _ in range(sessions)]
+
+    def session(n):
+        learner_id = f"learner-{n}"
+        i = 0
+        record_latencies = latencies[n]
+        interval = 1.0 / rate if rate else 0.0
+        while time.perf_counter() < stop_at:
+            if interval:
+                time.sleep(interval)
+            start = time.perf_counter()
+            store.record(learner_id, GrammarCategory.TENSES, str(i // cases % 7 + 1), i % cases, i % 3)
+            record_latencies.append(time.perf_counter() - start)
+            i += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    submitted_in = time.perf_counter() - start
+    store.flush()
+    committed_in = time.perf_counter() - start
+    store.close()
+
+    all_latencies = sorted(l for per_session in latencies for l in per_session)
+    return {
+        "sessions": sessions,
+        "submitted": len(all_latencies),
+        "committed": store.rows_written,
+        "batches": store.batches_written,
+        "submit_seconds": submitted_in,
+        "commit_seconds": committed_in,
+        "committed_rows_per_second": store.rows_written / committed_in,
+        "record_p50_us": percentile(all_latencies, 0.50) * 1e6,
+        "record_p99_us": percentile(all_latencies, 0.99) * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="ProgressStore write throughput.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--seconds", type=float, default=3.0, help="Submit phase per level.")
+    parser.add_argument("--cases", type=int, default=20, help="Cases per item.")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Submissions per second per session (0 = unthrottled).")
+    parser.add_argument("--db", help="Database file (default: a temporary file per level).")
+    parser.add_argument("--out", default="bench_progress.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    levels = []
+    print(f"{'N':>5} {'submitted':>10} {'rows/s':>10} {'batches':>8} {'record p50 us':>14} {'p99 us':>8}")
+    for n in args.sessions:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = args.db or os.path.join(tmp, "progress.db")
+            row = run_level(path, n, args.seconds, args.cases, args.rate)
+        levels.append(row)
+        print(f"{n:>5} {row['submitted']:>10} {row['committed_rows_per_second']:>10.0f} "
+              f"{row['batches']:>8} {row['record_p50_us']:>14.1f} {row['record_p99_us']:>8.1f}")
+
+    with open(args.out, "w") as f:
+        json.dump({"seconds": args.seconds, "rate": args.rate, "levels": levels}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Headless rerun benchmark for test25_12.py using streamlit's AppTest.
+
+Each scripted flow step is one rerun (or a short chain of reruns) of the app:
+choosing a category in the sidebar radio, choosing a tense/conditional,
+submitting a correct and a wrong answer, and opening review mode. For every
+step we record wall time, elements emitted and peak traced Python memory,
+for each synthetic corpus size (cases per item, see GRAMMAR_CASES_PER_ITEM).
+Timings include tracemalloc overhead unless --no-memory is given.
+
+Run from the repository root:
+
+    python -m benchmarks.rerun_bench --out bench_rerun.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "test25_12.py"
+SELECT_TENSE = "1. Present Simple"
+SELECT_CONDITIONAL = "2. Second Conditional"
+
+##############################################################################
+# MEASUREMENT HELPERS
+##############################################################################
+def count_elements(node):
+    """Number of nodes (blocks + elements) in an AppTest element tree."""
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child) for child in children.values())
+
+def measure(action):
+    """Runs action() (which must end with an AppTest run) and measures it."""
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    at = action()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if tracing else None
+    if at.exception:
+        raise RuntimeError(f"App raised: {[e.value for e in at.exception]}")
+    return {"seconds": elapsed, "elements": count_elements(at._tree), "peak_bytes": peak}
+
+def first_open_card(at, item_key):
+    """Index of the first rendered exercise selectbox for item_key."""
+    prefix = f"answer_{item_key}_"
+    for box in at.selectbox:
+        if box.key and box.key.startswith(prefix):
+            return int(box.key[len(prefix):])
+    raise LookupError("No open exercise on the page")
+
+##############################################################################
+# FLOWS
+##############################################################################
+def run_flow(cases_per_item, timeout):
+    """One full scripted session; returns {step: measurement}."""
+    # Pinned, so a compiled corpus.snap does not stand in for the sized built-in corpus;
+    # the learner stores are off so synthetic learners stay out of the real ones
+    os.environ["GRAMMAR_CONTENT"] = "builtin"
+    os.environ["GRAMMAR_CASES_PER_ITEM"] = str(cases_per_item)
+    for store in ("GRAMMAR_PROGRESS_DB", "GRAMMAR_SESSION_DB", "GRAMMAR_ANALYTICS_FILE"):
+        os.environ[store] = ""
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    steps = {}
+
+    steps["initial_load"] = measure(at.run)
+    steps["pick_conditionals"] = measure(lambda: at.sidebar.radio(key="category_choice").set_value("Conditionals").run())
+    steps["pick_conditional_item"] = measure(
+        lambda: at.sidebar.selectbox(key="conditional_choice").select(SELECT_CONDITIONAL).run())
+    steps["pick_tenses"] = measure(lambda: at.sidebar.radio(key="category_choice").set_value("Tenses").run())
+    steps["pick_tense_item"] = measure(lambda: at.sidebar.selectbox(key="tense_choice").select(SELECT_TENSE).run())
+
+    # The built-in builders list the correct choice first, after "-- Select --"
+    i = first_open_card(at, "1")
+    box = at.selectbox(key=f"answer_1_{i}")
+    box.select(box.options[1]).run()
+    steps["submit_correct"] = measure(lambda: at.button(key=f"submit_1_{i}").click().run())
+    steps["full_rerun_after_submit"] = measure(at.run)
+
+    i = first_open_card(at, "1")
+    box = at.selectbox(key=f"answer_1_{i}")
+    box.select(box.options[2]).run()
+    steps["submit_wrong"] = measure(lambda: at.button(key=f"submit_1_{i}").click().run())
+    at.run()
+
+    # Answering a 2000-case bank click by click would dominate the run, so
+    # review mode is entered by flipping the same flag the button sets.
+    at.session_state["review_mode"] = True
+    steps["review_mode"] = measure(at.run)
+    return steps
+
+def summarize(samples):
+    """Median seconds/elements and max peak memory per step."""
+    summary = {}
+    for step in samples[0]:
+        runs = [s[step] for s in samples]
+        summary[step] = {
+            "median_seconds": statistics.median(r["seconds"] for r in runs),
+            "min_seconds": min(r["seconds"] for r in runs),
+            "elements": statistics.median(r["elements"] for r in runs),
+            "peak_bytes": None if runs[0]["peak_bytes"] is None else max(r["peak_bytes"] for r in runs),
+        }
+    return summary
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_PATH.parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless rerun benchmark (AppTest).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000],
+                        help="Synthetic cases per item.")
+    parser.add_argument("--repeat", type=int, default=5, help="Flows per size.")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-run AppTest timeout.")
+    parser.add_argument("--out", default="bench_rerun.json", help="JSON results file.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc (it slows reruns down noticeably).")
+    args = parser.parse_args()
+
+    if not args.no_memory:
+        tracemalloc.start()
+    results = {}
+    for size in args.sizes:
+        samples = [run_flow(size, args.timeout) for _ in range(args.repeat)]
+        results[str(size)] = summarize(samples)
+        for step, row in results[str(size)].items():
+            peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 1024:.1f}"
+            print(f"{size:>6} {step:<26} {row['median_seconds'] * 1000:9.1f} ms "
+                  f"{row['elements']:>7} el {peak:>10} KiB")
+    tracemalloc.stop()
+
+    report = {
+        "app": APP_PATH.name,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "repeat": args.repeat,
+        "traced_memory": not args.no_memory,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
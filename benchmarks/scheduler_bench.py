@@ -0,0 +1,91 @@
+"""
+Scheduling throughput of the spaced-repetition ReviewScheduler.
+
+For growing deck sizes, builds a scheduler with that many cards spread over
+synthetic items of both categories, then runs review cycles - pick the next
+card (peek), answer it (right with --accuracy probability), reschedule - on a
+simulated clock that advances a few seconds per answer. A naive linear scan
+for the earliest due card is timed next to it for the smaller decks.
+
+Run from the repository root:
+
+    python -m benchmarks.scheduler_bench --sizes 1000 10000 100000 1000000 --out bench_scheduler.json
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from grammar_corpus import GrammarCategory
+from spaced_repetition import ReviewScheduler
+
+CASES_PER_ITEM = 20
+
+def build(cards, now):
+    scheduler = ReviewScheduler()
+    categories = list(GrammarCategory)
+    scheduler.add_cards([(categories[n % len(categories)], str(n), i)
+                         for n in range(cards // CASES_PER_ITEM) for i in range(CASES_PER_ITEM)], now)
+    return scheduler
+
+def run_size(cards, cycles, accuracy, scan_limit):
+    rng = random.Random(0)
+    now = 0.0
+    tracemalloc.start()
+    start = time.perf_counter()
+    scheduler = build(cards, now)
+    build_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    answers = [rng.random() < accuracy for _ in range(cycles)]
+    start = time.perf_counter()
+    for correct in answers:
+        card = scheduler.peek()
+        scheduler.review(card.key, correct, now)
+        now += 5.0
+    cycle_seconds = time.perf_counter() - start
+
+    row = {
+        "cards": len(scheduler),
+        "build_ms": build_seconds * 1000,
+        "memory_bytes": memory,
+        "cycles_per_second": cycles / cycle_seconds,
+        "us_per_cycle": cycle_seconds / cycles * 1e6,
+        "heap_entries": len(scheduler._heap),
+        "scan_us_per_pick": None,
+    }
+    if cards <= scan_limit:
+        values = list(scheduler._cards.values())
+        picks = max(10, min(cycles, 2_000_000 // cards))
+        start = time.perf_counter()
+        for _ in range(picks):
+            min(values, key=lambda c: (c.due, c.heap_seq))
+        row["scan_us_per_pick"] = (time.perf_counter() - start) / picks * 1e6
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Spaced-repetition scheduling throughput by deck size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--cycles", type=int, default=200_000, help="Review cycles per deck size.")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="Share of answers that are right.")
+    parser.add_argument("--scan-limit", type=int, default=100_000, help="Largest deck timed with a linear scan.")
+    parser.add_argument("--out", default="bench_scheduler.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    rows = []
+    print(f"{'cards':>9} {'build ms':>9} {'MiB':>7} {'cycles/s':>10} {'us/cycle':>9} {'heap':>9} {'scan us/pick':>13}")
+    for size in args.sizes:
+        row = run_size(size, args.cycles, args.accuracy, args.scan_limit)
+        rows.append(row)
+        scan = f"{row['scan_us_per_pick']:>13.1f}" if row["scan_us_per_pick"] is not None else f"{'-':>13}"
+        print(f"{row['cards']:>9} {row['build_ms']:>9.1f} {row['memory_bytes'] / 2**20:>7.1f} "
+              f"{row['cycles_per_second']:>10.0f} {row['us_per_cycle']:>9.2f} {row['heap_entries']:>9} {scan}")
+
+    with open(args.out, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Query latency and rebuild cost of the full-text SearchIndex.
+
+Builds a corpus of about --docs documents out of generated exercise sets
+(varied verbs, subjects and time expressions) plus the built-in items'
+explanations and examples, indexes it through SearchIndex.sync(), then times
+a query mix of exact words, contractions, prefixes and multi-word queries
+(uncached, plus the cached repeat a page rerun gets).
+Finally one item is edited and re-synced, to compare the incremental update
+with the full build.
+
+Run from the repository root:
+
+    python -m benchmarks.search_bench --docs 100000 --out bench_search.json
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.stats import percentile
+from exercise_gen import CONDITIONALS, TIME_EXPRESSIONS, generate_exercise_set
+from grammar_corpus import GrammarCategory, conditionals_data, tenses_data
+from search_index import SearchIndex
+
+QUERIES = [
+    "umbrella", "wouldn't", "wouldn", "doesn't", "the", "if", "students", "madrid", "yesterday",
+    "fl", "wo", "pr", "would you", "if they", "she has", "did the students", "past simple",
+    "had known", "since 20", "never", "zzz", "the students fly", "would have", "if it rains",
+]
+
+class SyntheticCorpus:
+    """Provider stand-in: items built from generated sets, editable for the incremental test."""
+
+    def __init__(self, docs):
+        self.version = 1
+        self._items = {}
+        specs = [(GrammarCategory.TENSES, name, spec) for name, spec in
+                 zip(TIME_EXPRESSIONS, tenses_data.values())] + \
+                [(GrammarCategory.CONDITIONALS, name, spec) for name, spec in
+                 zip(CONDITIONALS, conditionals_data.values())]
+        per_item = len(generate_exercise_set(specs[0][0], specs[0][1], 0)) + 2
+        for n in range(docs // per_item + 1):
+            category, name, spec = specs[n % len(specs)]
+            self._items[(category, str(n))] = {
+                "name": f"{name} {n}",
+                "usage_cases": generate_exercise_set(category, name, n),
+                "usage_explanation": spec["usage_explanation"],
+                "extra_examples": spec["extra_examples"],
+            }
+        self._fingerprints = {key: 0 for key in self._items}
+
+    def fingerprints(self):
+        return dict(self._fingerprints)
+
+    def item(self, category, item_key):
+        return self._items[(category, item_key)]
+
+    def edit(self, key):
+        item = self._items[key]
+        self._items[key] = dict(item, extra_examples=list(item["extra_examples"]) + ["I wish I had an umbrella."])
+        self._fingerprints[key] += 1
+        self.version += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="SearchIndex query latency and rebuild cost.")
+    parser.add_argument("--docs", type=int, default=100_000, help="Approximate number of documents.")
+    parser.add_argument("--rounds", type=int, default=200, help="Passes over the query mix.")
+    parser.add_argument("--out", default="bench_search.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = SyntheticCorpus(args.docs)
+    print(f"Generated {len(corpus.fingerprints())} items in {time.perf_counter() - start:.1f} s")
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.sync(corpus)
+    build_seconds = time.perf_counter() - start
+    # Memory from a second, traced build (tracing slows the build down)
+    tracemalloc.start()
+    traced = SearchIndex()
+    traced.sync(corpus)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+    gc.collect()
+    stats = index.stats()
+    print(f"Indexed {stats['documents']:,} docs, {stats['terms']:,} terms in {build_seconds:.2f} s "
+          f"(~{index_bytes / 2**20:.0f} MiB traced)")
+
+    for query in QUERIES:
+        index.search(query)
+
+    rows = []
+    print(f"\n{'query':<20} {'hits':>5} {'p50 us':>8} {'p99 us':>8} {'max us':>8} {'cached us':>10}")
+    for query in QUERIES:
+        timings, cached = [], []
+        for _ in range(args.rounds):
+            index._results.clear()
+            t0 = time.perf_counter()
+            hits = index.search(query)
+            t1 = time.perf_counter()
+            index.search(query)
+            cached.append((time.perf_counter() - t1) * 1e6)
+            timings.append((t1 - t0) * 1e6)
+        row = {"query": query, "hits": len(hits), "p50_us": statistics.median(timings),
+               "p99_us": percentile(timings, 0.99), "max_us": max(timings),
+               "cached_p50_us": statistics.median(cached)}
+        rows.append(row)
+        print(f"{query:<20} {row['hits']:>5} {row['p50_us']:>8.0f} {row['p99_us']:>8.0f} {row['max_us']:>8.0f} "
+              f"{row['cached_p50_us']:>10.1f}")
+    everything = [row["p99_us"] for row in rows]
+    print(f"\nWorst per-query p99: {max(everything):.0f} us")
+
+    key = next(iter(corpus.fingerprints()))
+    corpus.edit(key)
+    start = time.perf_counter()
+    changed = index.sync(corpus)
+    update_seconds = time.perf_counter() - start
+    print(f"Incremental sync of {changed} edited item: {update_seconds * 1000:.1f} ms "
+          f"(full build {build_seconds * 1000:.0f} ms)")
+
+    with open(args.out, "w") as f:
+        json.dump({"documents": stats["documents"], "terms": stats["terms"], "build_seconds": build_seconds,
+                   "index_bytes": index_bytes, "incremental_sync_seconds": update_seconds, "queries": rows}, f,
+                  indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
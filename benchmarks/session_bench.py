@@ -0,0 +1,120 @@
+"""
+Shared session state under a non-sticky load balancer.
+
+--workers processes share one SessionBackend file. Every request of a
+learner goes to whichever worker takes it off a common queue next, like a
+load balancer without sticky sessions. A request does what a rerun of the
+app does: load the learner's row (version check, re-read on change), adopt
+it if it is newer than the worker's copy of the session, answer one
+exercise and save. Afterwards every learner's stored progress is checked
+against the answers sent, so a lost update shows up as a failure. Each
+worker reuses the backend's one connection for every request, as the app
+does across reruns (each on a new thread).
+
+Run from the repository root:
+
+    python -m benchmarks.session_bench --learners 500 --answers 20 --workers 4 --out bench_session.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.stats import percentile
+from grammar_corpus import GrammarCategory
+from learner_progress import ItemProgress
+from session_backend import SessionBackend
+
+def worker(path, requests, results, total):
+    backend = SessionBackend(path)
+    sessions = {}
+    loads, saves = [], []
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        learner_id, i = request
+        t0 = time.perf_counter()
+        shared = backend.load(learner_id)
+        t1 = time.perf_counter()
+        version, progress = sessions.get(learner_id, (None, None))
+        if shared is not None and shared.version != version:
+            version = shared.version
+            progress = ItemProgress.from_bytes(GrammarCategory.TENSES, "1", total, shared.progress)
+        if progress is None:
+            progress = ItemProgress(GrammarCategory.TENSES, "1", total)
+        progress.submit(i, i % 3)
+        fields = {"category": GrammarCategory.TENSES.value, "item_key": "1", "set_key": "1", "total": total}
+        t2 = time.perf_counter()
+        stored = backend.save(learner_id, fields, progress.to_bytes(), version)
+        t3 = time.perf_counter()
+        if stored.progress != progress.to_bytes():
+            progress = ItemProgress.from_bytes(GrammarCategory.TENSES, "1", total, stored.progress)
+        sessions[learner_id] = (stored.version, progress)
+        loads.append(t1 - t0)
+        saves.append(t3 - t2)
+    results.put({"loads": loads, "saves": saves, "stats": backend.stats()})
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared session state across worker processes.")
+    parser.add_argument("--learners", type=int, default=500)
+    parser.add_argument("--answers", type=int, default=20, help="Exercises answered per learner.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", default="bench_session.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="session-bench-"), "sessions.db")
+    SessionBackend(path)
+    rng = random.Random(0)
+    # Each learner answers in order, but consecutive answers are spread over workers
+    order = [(f"learner-{n}", i) for i in range(args.answers) for n in range(args.learners)]
+    rng.shuffle(order)
+
+    requests, results = multiprocessing.Queue(), multiprocessing.Queue()
+    for request in order:
+        requests.put(request)
+    for _ in range(args.workers):
+        requests.put(None)
+    start = time.perf_counter()
+    procs = [multiprocessing.Process(target=worker, args=(path, requests, results, args.answers))
+             for _ in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    reports = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    seconds = time.perf_counter() - start
+
+    backend = SessionBackend(path)
+    lost = 0
+    for n in range(args.learners):
+        shared = backend.load(f"learner-{n}")
+        progress = ItemProgress.from_bytes(GrammarCategory.TENSES, "1", args.answers, shared.progress)
+        lost += args.answers - progress.answered_count
+    loads = [t for report in reports for t in report["loads"]]
+    saves = [t for report in reports for t in report["saves"]]
+    totals = {key: sum(report["stats"][key] for report in reports) for key in ("hits", "misses", "conflicts")}
+    row = {
+        "requests": len(order), "workers": args.workers, "requests_per_second": len(order) / seconds,
+        "load_p50_us": statistics.median(loads) * 1e6, "load_p99_us": percentile(loads, 0.99) * 1e6,
+        "save_p50_us": statistics.median(saves) * 1e6, "save_p99_us": percentile(saves, 0.99) * 1e6,
+        "cache_hit_rate": totals["hits"] / max(1, totals["hits"] + totals["misses"]),
+        "conflicts_merged": totals["conflicts"], "answers_lost": lost,
+    }
+    print(f"{row['requests']:,} requests from {args.learners} learners over {args.workers} workers: "
+          f"{row['requests_per_second']:,.0f} requests/s")
+    print(f"load  p50 {row['load_p50_us']:.0f} us  p99 {row['load_p99_us']:.0f} us  "
+          f"(cache hit rate {row['cache_hit_rate']:.0%})")
+    print(f"save  p50 {row['save_p50_us']:.0f} us  p99 {row['save_p99_us']:.0f} us")
+    print(f"concurrent saves merged: {row['conflicts_merged']}, answers lost: {row['answers_lost']}")
+
+    with open(args.out, "w") as f:
+        json.dump(row, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-session progress memory: legacy session_state layout vs ItemProgress.
+
+The legacy layout is rebuilt exactly as the app used to store it: a list of
+answer strings, a set of "submit_{item}_{i}" keys and one
+"answer_{item}_{i}" session_state entry per question.
+
+Run from the repository root:
+
+    python -m benchmarks.session_memory
+"""
+import argparse
+import json
+
+from grammar_corpus import GrammarCategory, deep_sizeof
+from learner_progress import ItemProgress
+
+CHOICES = ["does", "do", "doesn't"]
+
+def legacy_progress(item_key, total, answered):
+    """answers list + submitted_questions set + answer_* keys, as before."""
+    answers = []
+    submitted_questions = set()
+    answer_keys = {}
+    for i in range(answered):
+        # Fresh strings, as the widget values arrive deserialized per session
+        answer = "".join(CHOICES[i % 3])
+        answers.append(answer)
+        submitted_questions.add(f"submit_{item_key}_{i}")
+        answer_keys[f"answer_{item_key}_{i}"] = answer
+    return {"answers": answers, "submitted_questions": submitted_questions, **answer_keys}
+
+def compact_progress(item_key, total, answered):
+    progress = ItemProgress(GrammarCategory.TENSES, item_key, total)
+    for i in range(answered):
+        progress.submit(i, i % 3)
+    return progress
+
+def sizeof_progress(progress):
+    # __slots__ objects: count the record plus what its slots reference
+    size = deep_sizeof(progress)
+    for slot in ItemProgress.__slots__:
+        if slot not in ("category",):
+            size += deep_sizeof(getattr(progress, slot))
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = []
+    for total in args.sizes:
+        legacy = deep_sizeof(legacy_progress("1", total, total))
+        compact = sizeof_progress(compact_progress("1", total, total))
+        results.append({"cases": total, "legacy_bytes": legacy, "compact_bytes": compact,
+                        "ratio": round(legacy / compact, 1)})
+
+    print(f"{'cases':>8} {'legacy B':>12} {'compact B':>12} {'ratio':>7}")
+    for row in results:
+        print(f"{row['cases']:>8} {row['legacy_bytes']:>12} {row['compact_bytes']:>12} {row['ratio']:>6}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
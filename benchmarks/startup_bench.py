@@ -0,0 +1,127 @@
+"""
+Cold start and per-worker memory: built-in corpus, JSON and SQLite stores
+vs. a compiled snapshot of the same content.
+
+For each content source, starts --workers fresh Python processes at once.
+Each one imports the app's heavy dependencies (Streamlit, pandas, NumPy),
+opens the provider, fetches the first item (what the first page render
+waits for) and then every item (the search index and adaptive review walk
+the whole corpus), then reports its timings and memory from
+/proc/self/smaps_rollup and waits until all workers have reported, so they
+are alive together:
+
+    rss      resident pages of the worker, shared ones included
+    pss      rss with every shared page divided among the processes using it
+    shared   resident pages that are shared with other processes
+    content  rss added by opening and reading the corpus (after the imports)
+
+Run from the repository root (Linux only):
+
+    python -m benchmarks.startup_bench --cases 2000 --workers 4 --out bench_startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+WORKER = """
+import json, sys, time
+
+def memory():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                fields[name] = int(value.split()[0]) * 1024
+    return fields
+
+start = time.perf_counter()
+import numpy, pandas, streamlit
+imported = time.perf_counter()
+baseline = memory()
+from content_store import open_provider
+from grammar_corpus import GrammarCategory
+provider = open_provider(sys.argv[1], int(sys.argv[2]))
+opened = time.perf_counter()
+first = next(category for category in GrammarCategory if provider.item_keys(category))
+provider.item(first, provider.item_keys(first)[0])
+shown = time.perf_counter()
+cases = sum(len(provider.item(category, key)["usage_cases"])
+            for category in GrammarCategory for key in provider.item_keys(category))
+ready = time.perf_counter()
+loaded = memory()
+print(json.dumps({
+    "import_s": imported - start, "open_s": opened - imported, "first_item_s": shown - opened,
+    "read_all_s": ready - opened,
+    "cases": cases, "rss": loaded["Rss"], "pss": loaded["Pss"],
+    "shared": loaded["Shared_Clean"] + loaded["Shared_Dirty"],
+    "content_rss": loaded["Rss"] - baseline["Rss"],
+}), flush=True)
+sys.stdin.readline()
+"""
+
+def run_workers(spec, cases, workers):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER, spec, str(cases)], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, env=env) for _ in range(workers)]
+    reports = []
+    for proc in procs:
+        report = json.loads(proc.stdout.readline())
+        report["wall_s"] = time.perf_counter() - start
+        reports.append(report)
+    # Only release the workers once all of them have reported
+    for proc in procs:
+        proc.stdin.write("\n")
+        proc.stdin.close()
+        proc.wait()
+    return reports
+
+def summary(reports):
+    keys = ("import_s", "open_s", "first_item_s", "read_all_s", "wall_s", "rss", "pss", "shared", "content_rss")
+    return {key: sum(r[key] for r in reports) / len(reports) for key in keys} | {"cases": reports[0]["cases"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start and worker memory by content source.")
+    parser.add_argument("--cases", type=int, default=2000, help="Cases per item.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent worker processes per source.")
+    parser.add_argument("--out", default="bench_startup.json", help="JSON results file.")
+    args = parser.parse_args()
+
+    from content_store import export_json_dir, export_sqlite, open_provider
+    from corpus_snapshot import compile_snapshot
+
+    workdir = tempfile.mkdtemp(prefix="snapshot-bench-")
+    builtin = open_provider("builtin", args.cases)
+    export_json_dir(builtin, os.path.join(workdir, "json"))
+    export_sqlite(builtin, os.path.join(workdir, "corpus.db"))
+    snapshot = os.path.join(workdir, "corpus.snap")
+    start = time.perf_counter()
+    stats = compile_snapshot(builtin, snapshot)
+    print(f"Compiled {stats['cases']:,} cases ({stats['unique_cases']:,} unique, {stats['strings']:,} strings) "
+          f"to {stats['bytes'] / 2**20:.1f} MiB in {time.perf_counter() - start:.1f} s")
+
+    results = {}
+    print(f"\n{'source':<10} {'cases':>7} {'import s':>9} {'open s':>7} {'first s':>8} {'read all s':>11} {'ready s':>8} "
+          f"{'RSS MiB':>8} {'PSS MiB':>8} {'shared MiB':>11} {'content MiB':>12}")
+    sources = (("builtin", "builtin"), ("json", f"json:{os.path.join(workdir, 'json')}"),
+               ("sqlite", f"sqlite:{os.path.join(workdir, 'corpus.db')}"), ("snapshot", f"snapshot:{snapshot}"))
+    for name, spec in sources:
+        row = results[name] = summary(run_workers(spec, args.cases, args.workers))
+        print(f"{name:<10} {row['cases']:>7} {row['import_s']:>9.2f} {row['open_s']:>7.3f} {row['first_item_s']:>8.3f} {row['read_all_s']:>11.3f} "
+              f"{row['wall_s']:>8.2f} {row['rss'] / 2**20:>8.1f} {row['pss'] / 2**20:>8.1f} "
+              f"{row['shared'] / 2**20:>11.1f} {row['content_rss'] / 2**20:>12.1f}")
+    print(f"(means over {args.workers} concurrent workers; 'ready' is wall time from spawn)")
+    shutil.rmtree(workdir)
+
+    with open(args.out, "w") as f:
+        json.dump({"snapshot": stats, "workers": args.workers, "results": results}, f, indent=2)
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
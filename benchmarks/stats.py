@@ -0,0 +1,10 @@
+"""
+Summary statistics shared by the benchmarks.
+"""
+
+def percentile(values, q):
+    """The q-quantile (0..1) of values, nearest rank; None if there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
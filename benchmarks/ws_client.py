@@ -0,0 +1,262 @@
+"""
+Minimal Streamlit websocket client and local server launcher for benchmarks.
+
+StreamlitSession speaks the same protocol as the browser: it sends BackMsg
+rerun requests with widget state changes over /_stcore/stream and reads
+ForwardMsgs until the run finishes, recording wall time, messages, delta
+count and bytes received per rerun. Widgets are looked up by their user key
+or, when they have none, by label. Like the browser, it keeps the timers of
+fragments with run_every and fires them while idle(), and it keeps the
+cacheable messages it received and reports their hashes with every rerun,
+so the server sends a short reference instead of an element it already has.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+WIDGET_TYPES = ("radio", "selectbox", "button")
+# Script runs a cached message survives without being used (the server's
+# global.maxCachedMessageAge, which the browser applies to its cache)
+MAX_CACHED_MESSAGE_AGE = 2
+
+##############################################################################
+# LOCAL SERVER
+##############################################################################
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def streamlit_server(app_path, env=None, port=None, startup_timeout=60):
+    """Runs `streamlit run app_path` headless; yields (base_url, process)."""
+    port = port or free_port()
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", str(app_path),
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--server.enableXsrfProtection", "false",
+        "--server.enableCORS", "false",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    proc = subprocess.Popen(cmd, env={**os.environ, **(env or {})},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://{base_url}/_stcore/health", timeout=1):
+                    break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Streamlit server did not start")
+                time.sleep(0.2)
+        yield base_url, proc
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def process_cpu_seconds(pid):
+    """User + system CPU time a process has used so far (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def process_rss_bytes(pid):
+    """Resident set size of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return None
+
+##############################################################################
+# SESSION
+##############################################################################
+@dataclass
+class Widget:
+    id: str
+    kind: str
+    label: str
+    options: tuple
+    fragment_id: str
+
+@dataclass
+class RerunStats:
+    seconds: float
+    messages: int = 0
+    deltas: int = 0
+    bytes: int = 0
+    bytes_by_type: dict = field(default_factory=dict)
+    # new_element deltas by element type ("ref_hash" for cache references)
+    bytes_by_element: dict = field(default_factory=dict)
+    errors: int = 0
+
+class StreamlitSession:
+    """One browser-like session against a running Streamlit server."""
+
+    def __init__(self, base_url, query_string="", timeout=60):
+        self._connection = connect(f"ws://{base_url}/_stcore/stream", subprotocols=["streamlit"],
+                                   max_size=None, open_timeout=timeout)
+        self.ws = self._connection.__enter__()
+        self.query_string = query_string
+        self.timeout = timeout
+        self.widgets = {}
+        self.texts = []
+        # fragment id -> (interval, next due time) of fragments with run_every
+        self.auto_reruns = {}
+        # hash -> [cached ForwardMsg, script runs since it was last used]
+        self.message_cache = {}
+
+    def close(self):
+        self._connection.__exit__(None, None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def widget(self, name):
+        """Widget by user key or label, as seen in the latest reruns."""
+        return self.widgets[name]
+
+    def widgets_with_prefix(self, prefix):
+        return [w for name, w in self.widgets.items() if name.startswith(prefix)]
+
+    def rerun(self, states=(), fragment_id="", is_auto_rerun=False):
+        """Sends a rerun request with the given WidgetStates and waits for it."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.widget_states.widgets.extend(states)
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.is_auto_rerun = is_auto_rerun
+        msg.rerun_script.cached_message_hashes.extend(self.message_cache)
+        start = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        stats = RerunStats(seconds=0.0)
+        while True:
+            raw = self.ws.recv(timeout=self.timeout)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            stats.messages += 1
+            stats.bytes += len(raw)
+            stats.bytes_by_type[kind] = stats.bytes_by_type.get(kind, 0) + len(raw)
+            if kind == "ref_hash":
+                stats.bytes_by_element["ref_hash"] = stats.bytes_by_element.get("ref_hash", 0) + len(raw)
+                entry = self.message_cache[fwd.ref_hash]
+                entry[1] = 0
+                fwd = entry[0]
+                kind = fwd.WhichOneof("type")
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element.WhichOneof("type")
+                stats.bytes_by_element[element] = stats.bytes_by_element.get(element, 0) + len(raw)
+            if fwd.metadata.cacheable:
+                self.message_cache[fwd.hash] = [fwd, 0]
+            if kind == "new_session":
+                self._start_run(fwd.new_session.fragment_ids_this_run)
+            elif kind == "delta":
+                stats.deltas += 1
+                self._track(fwd.delta)
+            elif kind == "auto_rerun":
+                interval = fwd.auto_rerun.interval
+                self.auto_reruns[fwd.auto_rerun.fragment_id] = (interval, time.monotonic() + interval)
+            elif kind == "stop_auto_rerun":
+                for fragment_id in fwd.stop_auto_rerun.fragment_ids:
+                    self.auto_reruns.pop(fragment_id, None)
+            elif kind == "script_finished":
+                stats.errors += sum(1 for kind, _ in self.texts if kind == "exception")
+                self._age_message_cache()
+                # A callback-triggered rerun (e.g. st.rerun([...keys])) first
+                # ends the requested run early, then runs the new target.
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _age_message_cache(self):
+        for message_hash, entry in list(self.message_cache.items()):
+            entry[1] += 1
+            if entry[1] > MAX_CACHED_MESSAGE_AGE:
+                del self.message_cache[message_hash]
+
+    def _start_run(self, fragment_ids):
+        """
+        Forgets the widgets this run is about to redraw. A full run also drops
+        the fragment timers (it registers them again); fragment runs keep them.
+        """
+        self.texts = []
+        if not fragment_ids:
+            self.widgets = {}
+            self.auto_reruns = {}
+            return
+        rerun_ids = set(fragment_ids)
+        self.widgets = {name: w for name, w in self.widgets.items()
+                        if w.fragment_id not in rerun_ids}
+
+    def idle(self, seconds):
+        """
+        Stays on the page for ``seconds`` like an open browser tab, firing
+        fragment auto-reruns as they come due. Returns (RerunStats summed
+        over those reruns, number of reruns).
+        """
+        total = RerunStats(seconds=0.0)
+        reruns = 0
+        end = time.monotonic() + seconds
+        while self.auto_reruns:
+            fragment_id, (interval, due) = min(self.auto_reruns.items(), key=lambda timer: timer[1][1])
+            if due >= end:
+                break
+            time.sleep(max(0.0, due - time.monotonic()))
+            self.auto_reruns[fragment_id] = (interval, due + interval)
+            stats = self.rerun(fragment_id=fragment_id, is_auto_rerun=True)
+            reruns += 1
+            total.messages += stats.messages
+            total.deltas += stats.deltas
+            total.bytes += stats.bytes
+            total.errors += stats.errors
+        time.sleep(max(0.0, end - time.monotonic()))
+        total.seconds = seconds
+        return total, reruns
+
+    def _track(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.texts.append(("exception", element.exception.message))
+        elif kind in ("alert", "markdown"):
+            self.texts.append((kind, getattr(element, kind).body))
+        if kind not in WIDGET_TYPES:
+            return
+        proto = getattr(element, kind)
+        user_key = proto.id.rsplit("-", 1)[-1]
+        name = proto.label if user_key == "None" else user_key
+        self.widgets[name] = Widget(proto.id, kind, proto.label,
+                                    tuple(getattr(proto, "options", ())), delta.fragment_id)
+
+    def set_value(self, name, value):
+        """Changes a radio/selectbox value, like picking an option in the browser."""
+        widget = self.widget(name)
+        state = WidgetState(id=widget.id, string_value=value)
+        return self.rerun([state], fragment_id=widget.fragment_id)
+
+    def click(self, name):
+        widget = self.widget(name)
+        state = WidgetState(id=widget.id, trigger_value=True)
+        return self.rerun([state], fragment_id=widget.fragment_id)
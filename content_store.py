@@ -0,0 +1,436 @@
+"""
+Pluggable content providers for the Grammar Genius app.
+
+A provider answers three questions: which items a category has (with their
+names, for the sidebar), and what a single item contains. Only the index is
+loaded eagerly; items and their usage cases are fetched one at a time and
+kept in a small LRU cache, so a worker never holds a large corpus in memory.
+
+    builtin          the tenses_data / conditionals_data dicts (GrammarCorpus)
+    json:<dir>       index.json + one JSON file per item
+    sqlite:<file>    items + cases tables keyed by (category, item_key)
+    snapshot:<file>  compiled, memory-mapped snapshot (see corpus_snapshot.py)
+
+External stores can be hot-reloaded: CorpusWatcher polls the source and
+swaps in a new immutable CorpusVersion holding only the changed items.
+
+Export the built-in corpus to either format with:
+
+    python content_store.py export --json content/
+    python content_store.py export --sqlite content.db
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from grammar_corpus import (
+    DEFAULT_CASES_PER_ITEM,
+    CategoryView,
+    GrammarCategory,
+    GrammarCorpus,
+    deep_sizeof,
+    freeze,
+)
+
+logger = logging.getLogger(__name__)
+
+BUILTIN = "builtin"
+DEFAULT_SNAPSHOT = "corpus.snap"
+DEFAULT_CACHE_ITEMS = 32
+DEFAULT_RELOAD_SECONDS = 2.0
+CASE_FIELDS = ("title", "context", "question_type", "question", "choices",
+               "correct_choice", "explanation")
+
+##############################################################################
+# BASE PROVIDER - eager index, lazily fetched + LRU-cached items
+##############################################################################
+class CorpusVersion:
+    """
+    One immutable version of a provider's corpus: the item index, a
+    fingerprint per item, an LRU of the frozen items fetched so far and the
+    provider's handle on the data the index was read from (``source``, e.g.
+    a mapped snapshot file; None for stores read in place). A reload builds
+    a new version that shares every unchanged frozen item.
+    """
+
+    __slots__ = ("number", "index", "fingerprints", "items", "source")
+
+    def __init__(self, number, index, fingerprints, items, source=None):
+        self.number = number
+        self.index = index
+        self.fingerprints = fingerprints
+        self.items = items
+        self.source = source
+
+class ContentProvider:
+    """
+    Base class for external content stores.
+
+    Subclasses implement _load_index() -> ({category: {item_key: name}},
+    {(category, item_key): fingerprint}, source) and _fetch_item(version, category,
+    item_key) -> item dict, where version is the CorpusVersion the item is
+    fetched for (during a reload, the one being built). GrammarCorpus exposes the same public methods and serves
+    as the built-in provider.
+
+    Readers always go through the current CorpusVersion, which reload()
+    replaces with a single attribute assignment, so reruns never wait on a
+    reload.
+    """
+
+    def __init__(self, cache_items=DEFAULT_CACHE_ITEMS):
+        self._cache_items = cache_items
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._fetches = 0
+        self._fetch_seconds = 0.0
+        index, fingerprints, source = self._load_index()
+        self._version = CorpusVersion(1, index, fingerprints, OrderedDict(), source)
+
+    def _load_index(self):
+        raise NotImplementedError
+
+    def _fetch_item(self, version, category, item_key):
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        return self._version.number
+
+    def item_keys(self, category):
+        return tuple(self._version.index.get(category, ()))
+
+    def fingerprints(self):
+        """{(category, item_key): fingerprint} of the current version; changes when an item does."""
+        return self._version.fingerprints
+
+    def item_name(self, category, item_key):
+        return self._version.index[category][item_key]
+
+    def category(self, category):
+        return CategoryView(self, category)
+
+    def item(self, category, item_key):
+        return self._item_in(self._version, category, item_key)
+
+    def item_with_fingerprint(self, category, item_key):
+        """(item, fingerprint) from one version, for caches built from the item."""
+        version = self._version
+        return self._item_in(version, category, item_key), version.fingerprints[(category, item_key)]
+
+    def _item_in(self, version, category, item_key):
+        cache_key = (category, item_key)
+        with self._lock:
+            item = version.items.get(cache_key)
+            if item is not None:
+                version.items.move_to_end(cache_key)
+                return item
+        if item_key not in version.index.get(category, {}):
+            raise KeyError(item_key)
+        start = time.perf_counter()
+        item = freeze(self._fetch_item(version, category, item_key))
+        with self._lock:
+            self._fetches += 1
+            self._fetch_seconds += time.perf_counter() - start
+            version.items[cache_key] = item
+            version.items.move_to_end(cache_key)
+            while len(version.items) > self._cache_items:
+                version.items.popitem(last=False)
+        return item
+
+    def reload(self):
+        """
+        Re-reads the index and swaps in a new version if any item changed.
+        Changed items that were cached are refetched before the swap;
+        unchanged ones are shared with the previous version. Returns the
+        changed (category, item_key) pairs.
+        """
+        with self._reload_lock:
+            current = self._version
+            index, fingerprints, source = self._load_index()
+            changed = {
+                key for key in fingerprints.keys() | current.fingerprints.keys()
+                if fingerprints.get(key) != current.fingerprints.get(key)
+            }
+            if not changed:
+                return changed
+            with self._lock:
+                items = OrderedDict(
+                    (key, item) for key, item in current.items.items() if key not in changed)
+                in_use = [key for key in current.items if key in changed and key in fingerprints]
+            new_version = CorpusVersion(current.number + 1, index, fingerprints, items, source)
+            for category, item_key in in_use:
+                self._item_in(new_version, category, item_key)
+            self._version = new_version
+            return changed
+
+    def stats(self):
+        version = self._version
+        with self._lock:
+            cached = list(version.items.values())
+            fetches, seconds = self._fetches, self._fetch_seconds
+        return {
+            "version": version.number,
+            "items_total": sum(len(items) for items in version.index.values()),
+            "items_built": len(cached),
+            "fetches": fetches,
+            "build_seconds": seconds,
+            "approx_bytes": sum(deep_sizeof(item) for item in cached),
+        }
+
+##############################################################################
+# HOT RELOAD
+##############################################################################
+class CorpusWatcher:
+    """Daemon thread that calls provider.reload() every ``interval`` seconds."""
+
+    def __init__(self, provider, interval=DEFAULT_RELOAD_SECONDS):
+        self.provider = provider
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.provider.reload()
+            except Exception:
+                logger.exception("Corpus reload failed; keeping version %s", self.provider.version)
+                continue
+            if changed:
+                logger.info("Corpus version %s: %d item(s) changed",
+                            self.provider.version, len(changed))
+
+##############################################################################
+# JSON DIRECTORY
+##############################################################################
+class JsonDirProvider(ContentProvider):
+    """
+    <dir>/index.json maps category value -> {item_key: {"name", "file"}};
+    each file holds one item (formation, usage cases, examples...).
+    """
+
+    def __init__(self, path, cache_items=DEFAULT_CACHE_ITEMS):
+        self.path = Path(path)
+        super().__init__(cache_items)
+
+    def _load_index(self):
+        with open(self.path / "index.json", encoding="utf-8") as f:
+            raw = json.load(f)
+        index = {}
+        fingerprints = {}
+        for category in GrammarCategory:
+            entries = raw.get(category.value, {})
+            index[category] = {key: entry["name"] for key, entry in entries.items()}
+            for key, entry in entries.items():
+                path = self.path / entry["file"]
+                fingerprints[(category, key)] = (entry["name"], entry["file"], os.stat(path).st_mtime_ns)
+        return index, fingerprints, None
+
+    def _fetch_item(self, version, category, item_key):
+        # The version's own index: during a reload the file may have been added or renamed
+        rel = version.fingerprints[(category, item_key)][1]
+        with open(self.path / rel, encoding="utf-8") as f:
+            return json.load(f)
+
+##############################################################################
+# SQLITE
+##############################################################################
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    category TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    formation TEXT NOT NULL,
+    usage_explanation TEXT NOT NULL,
+    extra_examples TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (category, item_key)
+);
+CREATE TABLE IF NOT EXISTS cases (
+    category TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    context TEXT,
+    question_type TEXT NOT NULL,
+    question TEXT NOT NULL,
+    choices TEXT NOT NULL,
+    correct_choice TEXT NOT NULL,
+    explanation TEXT,
+    PRIMARY KEY (category, item_key, position)
+);
+-- Any edit bumps the item's revision, which hot reload compares
+CREATE TRIGGER IF NOT EXISTS items_revision AFTER UPDATE OF
+    name, formation, usage_explanation, extra_examples ON items
+BEGIN
+    UPDATE items SET revision = revision + 1 WHERE rowid = NEW.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS cases_revision_insert AFTER INSERT ON cases
+BEGIN
+    UPDATE items SET revision = revision + 1
+    WHERE category = NEW.category AND item_key = NEW.item_key;
+END;
+CREATE TRIGGER IF NOT EXISTS cases_revision_update AFTER UPDATE ON cases
+BEGIN
+    UPDATE items SET revision = revision + 1
+    WHERE category = NEW.category AND item_key = NEW.item_key;
+END;
+CREATE TRIGGER IF NOT EXISTS cases_revision_delete AFTER DELETE ON cases
+BEGIN
+    UPDATE items SET revision = revision + 1
+    WHERE category = OLD.category AND item_key = OLD.item_key;
+END;
+"""
+
+class SqliteProvider(ContentProvider):
+    """Read-only SQLite store; one connection per thread."""
+
+    def __init__(self, path, cache_items=DEFAULT_CACHE_ITEMS):
+        self.path = Path(path)
+        self._local = threading.local()
+        super().__init__(cache_items)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _load_index(self):
+        index = {category: {} for category in GrammarCategory}
+        fingerprints = {}
+        by_value = {category.value: category for category in GrammarCategory}
+        rows = self._connection().execute(
+            "SELECT category, item_key, name, rowid, revision FROM items ORDER BY rowid")
+        for category, item_key, name, rowid, revision in rows:
+            if category in by_value:
+                index[by_value[category]][item_key] = name
+                fingerprints[(by_value[category], item_key)] = (rowid, revision)
+        return index, fingerprints, None
+
+    def _fetch_item(self, version, category, item_key):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT name, formation, usage_explanation, extra_examples FROM items"
+            " WHERE category = ? AND item_key = ?", (category.value, item_key)).fetchone()
+        name, formation, usage_explanation, extra_examples = row
+        cases = conn.execute(
+            f"SELECT {', '.join(CASE_FIELDS)} FROM cases"
+            " WHERE category = ? AND item_key = ? ORDER BY position", (category.value, item_key))
+        usage_cases = []
+        for values in cases:
+            case = {k: v for k, v in zip(CASE_FIELDS, values) if v is not None}
+            case["choices"] = json.loads(case["choices"])
+            usage_cases.append(case)
+        return {
+            "name": name,
+            "formation": json.loads(formation),
+            "usage_explanation": json.loads(usage_explanation),
+            "usage_cases": usage_cases,
+            "extra_examples": json.loads(extra_examples),
+        }
+
+##############################################################################
+# OPENING + EXPORTING
+##############################################################################
+def default_content_source():
+    """The compiled snapshot if one has been built next to the app, else the built-in corpus."""
+    if os.path.exists(DEFAULT_SNAPSHOT):
+        logger.info("Serving the compiled snapshot %s (set GRAMMAR_CONTENT=builtin for the built-in corpus; "
+                    "GRAMMAR_CASES_PER_ITEM only sizes that one)", DEFAULT_SNAPSHOT)
+        return f"snapshot:{DEFAULT_SNAPSHOT}"
+    return BUILTIN
+
+def open_provider(spec=BUILTIN, cases_per_item=DEFAULT_CASES_PER_ITEM):
+    """Provider for "builtin", "json:<dir>", "sqlite:<file>" or "snapshot:<file>"."""
+    kind, _, location = spec.partition(":")
+    if kind == BUILTIN:
+        return GrammarCorpus(cases_per_item=cases_per_item)
+    if kind == "json":
+        return JsonDirProvider(location)
+    if kind == "sqlite":
+        return SqliteProvider(location)
+    if kind == "snapshot":
+        from corpus_snapshot import SnapshotProvider
+        return SnapshotProvider(location)
+    raise ValueError(f"Unknown content source {spec!r} "
+                     "(expected builtin, json:<dir>, sqlite:<file> or snapshot:<file>)")
+
+def _thaw(value):
+    """Plain dicts/lists from a frozen item, for serialization."""
+    if hasattr(value, "items"):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+def _iter_items(provider):
+    for category in GrammarCategory:
+        for item_key in provider.item_keys(category):
+            yield category, item_key, _thaw(provider.item(category, item_key))
+
+def export_json_dir(provider, path):
+    path = Path(path)
+    index = {}
+    for category, item_key, item in _iter_items(provider):
+        rel = f"{category.value.lower()}/{item_key}.json"
+        (path / rel).parent.mkdir(parents=True, exist_ok=True)
+        with open(path / rel, "w", encoding="utf-8") as f:
+            json.dump(item, f, ensure_ascii=False, indent=1)
+        index.setdefault(category.value, {})[item_key] = {"name": item["name"], "file": rel}
+    with open(path / "index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+
+def export_sqlite(provider, path):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executescript(SQLITE_SCHEMA)
+        for category, item_key, item in _iter_items(provider):
+            conn.execute("DELETE FROM cases WHERE category = ? AND item_key = ?",
+                         (category.value, item_key))
+            conn.execute(
+                "INSERT OR REPLACE INTO items"
+                " (category, item_key, name, formation, usage_explanation, extra_examples)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (category.value, item_key, item["name"], json.dumps(item["formation"]),
+                 json.dumps(item["usage_explanation"]), json.dumps(item.get("extra_examples", []))))
+            conn.executemany(
+                f"INSERT INTO cases VALUES (?, ?, ?, {', '.join('?' * len(CASE_FIELDS))})",
+                [(category.value, item_key, position,
+                  *(json.dumps(case[k]) if k == "choices" else case.get(k) for k in CASE_FIELDS))
+                 for position, case in enumerate(item["usage_cases"])])
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the built-in corpus to a content store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export")
+    target = export.add_mutually_exclusive_group(required=True)
+    target.add_argument("--json", help="Directory to write index.json + item files to.")
+    target.add_argument("--sqlite", help="SQLite file to write.")
+    export.add_argument("--cases", type=int, default=DEFAULT_CASES_PER_ITEM,
+                        help="Cases per item to generate.")
+    args = parser.parse_args()
+
+    provider = GrammarCorpus(cases_per_item=args.cases)
+    if args.json:
+        export_json_dir(provider, args.json)
+    else:
+        export_sqlite(provider, args.sqlite)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Compiled, memory-mapped corpus snapshots for the Grammar Genius app.
+
+The compiler reads any content provider, validates every usage case
+(correct_choice must be one of its choices, required fields present),
+deduplicates identical cases and writes one binary file:
+
+    header      magic, format version, section table, payload digest
+    strings     every distinct string once (UTF-8 blob + offsets)
+    items       one record per item: category, key, name, list/case ranges,
+                a digest of the item's content (its fingerprint)
+    lists       string ids of formation pairs, usage lines and examples
+    case_refs   case ids per item (shared by items with identical cases)
+    cases       string ids of each case's fields, its choice range and the
+                index of the correct choice
+    choices     string ids
+
+SnapshotProvider maps the file read-only: the sections are NumPy views over
+the mapping, so worker processes share its pages through the OS page cache
+and an item is only decoded when it is fetched. Writing a new snapshot
+(atomically replacing the file) is picked up by hot reload like any other
+content store.
+
+    python corpus_snapshot.py compile corpus.snap [--source json:content/] [--cases 20]
+    python corpus_snapshot.py info corpus.snap
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from content_store import BUILTIN, CASE_FIELDS, DEFAULT_CACHE_ITEMS, ContentProvider, open_provider
+from grammar_corpus import DEFAULT_CASES_PER_ITEM, GrammarCategory
+
+MAGIC = b"GGSNAP\r\n"
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF
+SECTIONS = ("string_offsets", "strings", "items", "lists", "case_refs", "cases", "choices")
+HEADER = struct.Struct("<8sII" + "QQ" * len(SECTIONS) + "32s")
+
+CATEGORIES = list(GrammarCategory)
+ITEM_DTYPE = np.dtype([
+    ("category", "<u4"), ("key", "<u4"), ("name", "<u4"),
+    ("formation", "<u4"), ("formation_count", "<u4"),
+    ("usage", "<u4"), ("usage_count", "<u4"),
+    ("examples", "<u4"), ("examples_count", "<u4"),
+    ("cases", "<u4"), ("case_count", "<u4"),
+    ("digest", "V16"),
+])
+CASE_DTYPE = np.dtype([
+    ("title", "<u4"), ("context", "<u4"), ("question_type", "<u4"), ("question", "<u4"),
+    ("explanation", "<u4"), ("choices", "<u4"), ("choice_count", "<u2"), ("correct", "<u2"),
+])
+SECTION_DTYPES = {
+    "string_offsets": np.dtype("<u8"), "strings": np.dtype("u1"), "items": ITEM_DTYPE,
+    "lists": np.dtype("<u4"), "case_refs": np.dtype("<u4"), "cases": CASE_DTYPE, "choices": np.dtype("<u4"),
+}
+REQUIRED_CASE_FIELDS = ("title", "question_type", "question", "choices", "correct_choice")
+
+class SnapshotError(ValueError):
+    """Invalid content (when compiling) or an unreadable snapshot file."""
+
+##############################################################################
+# COMPILER
+##############################################################################
+class _Builder:
+    def __init__(self):
+        self.string_ids = {}
+        self.strings = []
+        self.items = []
+        self.lists = []
+        self.case_refs = []
+        self.case_ids = {}
+        self.cases = []
+        self.choices = []
+        self.errors = []
+
+    def intern(self, text):
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def optional(self, text):
+        return NONE if text is None else self.intern(text)
+
+    def add_list(self, texts):
+        start = len(self.lists)
+        self.lists.extend(self.intern(text) for text in texts)
+        return start
+
+    def add_case(self, where, case):
+        missing = [field for field in REQUIRED_CASE_FIELDS if field not in case]
+        if missing:
+            self.errors.append(f"{where}: missing {', '.join(missing)}")
+            return None
+        choices = list(case["choices"])
+        if case["correct_choice"] not in choices:
+            self.errors.append(f"{where}: correct_choice {case['correct_choice']!r} is not one of {choices}")
+            return None
+        if len(set(choices)) != len(choices):
+            self.errors.append(f"{where}: duplicate choices {choices}")
+            return None
+        record = (self.intern(case["title"]), self.optional(case.get("context")),
+                  self.intern(case["question_type"]), self.intern(case["question"]),
+                  self.optional(case.get("explanation")),
+                  tuple(self.intern(choice) for choice in choices), choices.index(case["correct_choice"]))
+        case_id = self.case_ids.get(record)
+        if case_id is None:
+            case_id = self.case_ids[record] = len(self.cases)
+            self.cases.append(record)
+        return case_id
+
+    def add_item(self, category, item_key, item):
+        formation = [text for pair in item["formation"].items() for text in pair]
+        usage = list(item.get("usage_explanation", ()))
+        examples = list(item.get("extra_examples", ()))
+        cases, texts = [], []
+        for i, case in enumerate(item["usage_cases"]):
+            case_id = self.add_case(f"{category.value} {item_key} ({item['name']}) case {i + 1}", case)
+            if case_id is not None:
+                cases.append(case_id)
+                texts.append([case.get(field) for field in CASE_FIELDS])
+        # Digest of the text itself (string ids shift when other items change)
+        content = json.dumps([item["name"], formation, usage, examples, texts], ensure_ascii=False)
+        self.items.append((CATEGORIES.index(category), self.intern(item_key), self.intern(item["name"]),
+                           self.add_list(formation), len(formation) // 2,
+                           self.add_list(usage), len(usage),
+                           self.add_list(examples), len(examples),
+                           len(self.case_refs), len(cases),
+                           hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()))
+        self.case_refs.extend(cases)
+
+    def sections(self):
+        encoded = [text.encode("utf-8") for text in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        cases = np.zeros(len(self.cases), dtype=CASE_DTYPE)
+        for row, (title, context, question_type, question, explanation, choices, correct) in enumerate(self.cases):
+            cases[row] = (title, context, question_type, question, explanation, len(self.choices), len(choices),
+                          correct)
+            self.choices.extend(choices)
+        return {
+            "string_offsets": offsets.tobytes(),
+            "strings": b"".join(encoded),
+            "items": np.array(self.items, dtype=ITEM_DTYPE).tobytes(),
+            "lists": np.array(self.lists, dtype="<u4").tobytes(),
+            "case_refs": np.array(self.case_refs, dtype="<u4").tobytes(),
+            "cases": cases.tobytes(),
+            "choices": np.array(self.choices, dtype="<u4").tobytes(),
+        }
+
+def compile_snapshot(provider, path):
+    """
+    Validates and compiles every item of ``provider`` into a snapshot at
+    ``path`` (written to a temp file, then swapped in). Raises SnapshotError
+    listing every invalid case; returns compile statistics.
+    """
+    builder = _Builder()
+    total_cases = 0
+    for category in GrammarCategory:
+        for item_key in provider.item_keys(category):
+            item = provider.item(category, item_key)
+            total_cases += len(item["usage_cases"])
+            builder.add_item(category, item_key, item)
+    if builder.errors:
+        raise SnapshotError(f"{len(builder.errors)} invalid case(s):\n" + "\n".join(builder.errors))
+
+    sections = builder.sections()
+    table, payload, offset = [], [], HEADER.size
+    for name in SECTIONS:
+        data = sections[name]
+        padding = -offset % 8
+        payload.append(b"\0" * padding + data)
+        offset += padding
+        table += [offset, len(data)]
+        offset += len(data)
+    payload = b"".join(payload)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, *table, hashlib.sha256(payload).digest())
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return {"items": len(builder.items), "cases": total_cases, "unique_cases": len(builder.cases),
+            "strings": len(builder.strings), "bytes": HEADER.size + len(payload)}
+
+##############################################################################
+# READER
+##############################################################################
+class Snapshot:
+    """A read-only mapping of a snapshot file with NumPy views of its sections."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self.identity = _file_identity(f.fileno())
+            if self.identity[2] < HEADER.size:
+                raise SnapshotError(f"{self.path} is not a corpus snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, *rest = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a corpus snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} has snapshot format {version}, expected {FORMAT_VERSION}; recompile it")
+        self.digest = rest[-1]
+        table = rest[:-1]
+        for n, name in enumerate(SECTIONS):
+            offset, size = table[2 * n], table[2 * n + 1]
+            dtype = SECTION_DTYPES[name]
+            if offset + size > len(self._map) or size % dtype.itemsize:
+                raise SnapshotError(f"{self.path} is truncated or corrupt ({name} section)")
+            setattr(self, name, np.frombuffer(self._map, dtype=dtype, count=size // dtype.itemsize, offset=offset))
+        self._blob = memoryview(self._map)[table[2]:table[2] + table[3]]
+
+    def string(self, string_id):
+        if string_id == NONE:
+            return None
+        offsets = self.string_offsets
+        return str(self._blob[int(offsets[string_id]):int(offsets[string_id + 1])], "utf-8")
+
+    def _decoder(self):
+        """string(), but each id of one item decoded once and the str shared by its uses."""
+        decoded = {NONE: None}
+        offsets, blob = self.string_offsets, self._blob
+
+        def string(string_id):
+            text = decoded.get(string_id, False)
+            if text is False:
+                text = decoded[string_id] = str(blob[int(offsets[string_id]):int(offsets[string_id + 1])], "utf-8")
+            return text
+        return string
+
+    def item(self, row):
+        """Decodes one item record into the dict layout the other providers return."""
+        string = self._decoder()
+        (_, _, name, formation, formation_count, usage, usage_count,
+         examples, examples_count, first_case, case_count, _) = self.items[row].tolist()
+        lists = self.lists
+        formation = [string(s) for s in lists[formation:formation + 2 * formation_count].tolist()]
+        # One bulk conversion per section instead of a NumPy scalar per field
+        cases = self.cases[self.case_refs[first_case:first_case + case_count]].tolist()
+        low = min((case[5] for case in cases), default=0)
+        high = max((case[5] + case[6] for case in cases), default=0)
+        if high - low <= 4 * sum(case[6] for case in cases):
+            # An item's cases were compiled together, so their choices are (mostly) one range
+            span = self.choices[low:high].tolist()
+        else:
+            span = None
+        usage_cases = []
+        for title, context, question_type, question, explanation, first, count, correct in cases:
+            ids = span[first - low:first - low + count] if span is not None else \
+                self.choices[first:first + count].tolist()
+            choices = [string(choice) for choice in ids]
+            decoded = {"title": string(title)}
+            if context != NONE:
+                decoded["context"] = string(context)
+            decoded["question_type"] = string(question_type)
+            decoded["question"] = string(question)
+            decoded["choices"] = choices
+            decoded["correct_choice"] = choices[correct]
+            if explanation != NONE:
+                decoded["explanation"] = string(explanation)
+            usage_cases.append(decoded)
+        return {
+            "name": string(name),
+            "formation": dict(zip(formation[::2], formation[1::2])),
+            "usage_explanation": [string(s) for s in lists[usage:usage + usage_count].tolist()],
+            "usage_cases": usage_cases,
+            "extra_examples": [string(s) for s in lists[examples:examples + examples_count].tolist()],
+        }
+
+    def verify(self):
+        """True if the payload still matches the digest written by the compiler."""
+        return hashlib.sha256(memoryview(self._map)[HEADER.size:]).digest() == self.digest
+
+def _file_identity(fd):
+    stat = os.fstat(fd)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class SnapshotProvider(ContentProvider):
+    """
+    Content provider over a memory-mapped snapshot; remaps when the file is
+    replaced. Each CorpusVersion keeps its own Snapshot and row map as its
+    source, so readers still on an older version decode from the file that
+    version was indexed from.
+    """
+
+    def __init__(self, path, cache_items=DEFAULT_CACHE_ITEMS):
+        self.path = str(path)
+        self._index_cache = None
+        super().__init__(cache_items)
+
+    def _load_index(self):
+        try:
+            current = os.stat(self.path)
+            changed = self._index_cache is None or \
+                self._index_cache[2][0].identity != (current.st_ino, current.st_mtime_ns, current.st_size)
+        except FileNotFoundError:
+            if self._index_cache is None:
+                raise
+            changed = False
+        if changed:
+            snapshot = Snapshot(self.path)
+            index = {category: {} for category in GrammarCategory}
+            fingerprints, rows = {}, {}
+            for row, record in enumerate(snapshot.items):
+                category = CATEGORIES[int(record["category"])]
+                item_key = snapshot.string(int(record["key"]))
+                index[category][item_key] = snapshot.string(int(record["name"]))
+                fingerprints[(category, item_key)] = bytes(record["digest"])
+                rows[(category, item_key)] = row
+            self._index_cache = (index, fingerprints, (snapshot, rows))
+        return self._index_cache
+
+    def _fetch_item(self, version, category, item_key):
+        snapshot, rows = version.source
+        return snapshot.item(rows[(category, item_key)])
+
+##############################################################################
+# CLI
+##############################################################################
+def main():
+    parser = argparse.ArgumentParser(description="Compile the corpus to a memory-mappable snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("compile", help="Validate a content source and write a snapshot.")
+    build.add_argument("path", help="Snapshot file to write (e.g. corpus.snap).")
+    build.add_argument("--source", default=BUILTIN, help="builtin, json:<dir> or sqlite:<file>.")
+    build.add_argument("--cases", type=int, default=DEFAULT_CASES_PER_ITEM,
+                       help="Cases per item for the built-in corpus.")
+    info = sub.add_parser("info", help="Check a snapshot and print its contents summary.")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        try:
+            stats = compile_snapshot(open_provider(args.source, args.cases), args.path)
+        except SnapshotError as e:
+            sys.exit(str(e))
+        print(f"Wrote {args.path}: {stats}")
+    else:
+        try:
+            snapshot = Snapshot(args.path)
+        except SnapshotError as e:
+            sys.exit(str(e))
+        print(f"{args.path}: format {FORMAT_VERSION}, {len(snapshot.items)} items, {len(snapshot.cases)} unique cases, "
+              f"{len(snapshot.string_offsets) - 1} strings, {snapshot.identity[2]:,} bytes, "
+              f"digest {'ok' if snapshot.verify() else 'MISMATCH'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Procedural exercise generation for the Grammar Genius app.
+
+generate_exercise_set() builds a seeded, varied set of multiple-choice cases
+for one tense or conditional from sentence frames (subject, verb, complement,
+time expression). Correct answers and distractors come from the shared
+ConjugationTable in morphology. The same (category, name, seed) always yields
+the same set.
+
+ExerciseGenerator produces sets on a small thread pool ahead of time and
+keeps them in a bounded LRU keyed by (category, item_key, seed), so the app
+can switch to a fresh set without generating anything on the rerun path.
+"""
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from grammar_corpus import DEFAULT_CASES_PER_ITEM, GrammarCategory, freeze
+from morphology import FIRST_SINGULAR, NEGATIVE, OTHER, POSITIVE, THIRD_SINGULAR, conjugations
+
+DEFAULT_CACHE_SETS = 64
+DEFAULT_WORKERS = 2
+CHOICES_PER_CASE = 3
+# Builds per requested case before generate_exercise_set() gives up
+MAX_ATTEMPTS_PER_CASE = 20
+BLANK = "________"
+
+##############################################################################
+# SENTENCE FRAMES
+##############################################################################
+SUBJECTS = (
+    ("I", FIRST_SINGULAR), ("you", OTHER), ("he", THIRD_SINGULAR), ("she", THIRD_SINGULAR),
+    ("we", OTHER), ("they", OTHER), ("my brother", THIRD_SINGULAR), ("Anna", THIRD_SINGULAR),
+    ("our neighbours", OTHER), ("the students", OTHER),
+)
+
+FRAMES = (
+    ("play", "tennis"), ("watch", "the news"), ("cook", "dinner"), ("clean", "the kitchen"),
+    ("visit", "the museum"), ("study", "French"), ("walk", "to school"), ("work", "from home"),
+    ("call", "the doctor"), ("write", "an email"), ("read", "a novel"), ("eat", "lunch"),
+    ("drink", "coffee"), ("drive", "to the office"), ("take", "the bus"), ("buy", "groceries"),
+    ("make", "a cake"), ("go", "to the gym"), ("see", "a film"), ("speak", "to the manager"),
+    ("teach", "the class"), ("run", "in the park"), ("swim", "in the lake"), ("sing", "in a choir"),
+    ("fly", "to Madrid"), ("do", "the homework"), ("meet", "our friends"), ("leave", "the office"),
+    ("plan", "a trip"), ("paint", "the fence"), ("fix", "the bike"), ("wash", "the car"),
+)
+
+TIME_EXPRESSIONS = {
+    "Present Simple": ("every day", "on Sundays", "twice a week", "every morning"),
+    "Past Simple": ("yesterday", "last week", "two days ago", "in 2019"),
+    "Present Continuous": ("right now", "at the moment", "this week"),
+    "Past Continuous": ("when the phone rang", "at 8 pm yesterday", "all afternoon yesterday"),
+    "Present Perfect": ("already", "twice this year", "since March"),
+    "Future Simple": ("tomorrow", "next year", "next weekend"),
+    "Future Continuous": ("at this time tomorrow", "at noon tomorrow", "all day next Monday"),
+}
+
+# (if-subject, if-verb, if-complement, main subject, main verb, main complement)
+FACT_FRAMES = (
+    ("you", "heat", "ice", "it", "melt", ""),
+    ("you", "mix", "red and yellow", "you", "get", "orange"),
+    ("water", "reach", "100 degrees", "it", "boil", ""),
+    ("plants", "lack", "light", "they", "die", ""),
+    ("you", "press", "this button", "the machine", "stop", ""),
+    ("you", "drop", "a glass", "it", "break", ""),
+    ("people", "eat", "too much sugar", "they", "gain", "weight"),
+    ("you", "freeze", "water", "it", "turn", "into ice"),
+    ("babies", "get", "hungry", "they", "cry", ""),
+    ("you", "mix", "blue and yellow", "you", "get", "green"),
+    ("the sun", "set", "", "it", "get", "dark"),
+)
+HYPOTHETICAL_FRAMES = (
+    ("it", "rain", "", "we", "stay", "at home"),
+    ("I", "have", "more time", "I", "travel", "the world"),
+    ("she", "study", "harder", "she", "pass", "the exam"),
+    ("they", "leave", "early", "they", "catch", "the train"),
+    ("we", "save", "more money", "we", "buy", "a house"),
+    ("he", "practise", "every day", "he", "win", "the race"),
+    ("you", "ask", "politely", "the manager", "help", "you"),
+    ("Anna", "take", "the job", "she", "move", "to Berlin"),
+    ("my brother", "find", "his keys", "he", "drive", "to work"),
+    ("the students", "finish", "early", "they", "play", "football"),
+    ("you", "call", "me", "I", "bring", "the tickets"),
+    ("our neighbours", "sell", "their car", "they", "cycle", "to work"),
+    ("I", "win", "the lottery", "I", "buy", "a boat"),
+    ("we", "miss", "the bus", "we", "walk", "home"),
+)
+
+# pattern: (if-clause tense, main-clause tense, clauses that may carry the
+# blank). The other clause would be ambiguous: a third conditional main
+# clause also reads as mixed, a mixed if-clause as second.
+CONDITIONALS = {
+    "Zero Conditional": ("Present Simple", "Present Simple", ("if", "main")),
+    "First Conditional": ("Present Simple", "Future Simple", ("if", "main")),
+    "Second Conditional": ("Past Simple", "Present Conditional", ("if", "main")),
+    "Third Conditional": ("Past Perfect", "Perfect Conditional", ("if",)),
+    "Mixed Conditional": ("Past Perfect", "Present Conditional", ("main",)),
+}
+
+# Tense mix-ups learners actually make, per pattern and clause; every one is
+# ungrammatical in that slot
+CONFUSIONS = {
+    ("Zero Conditional", "if"): ("Future Simple",),
+    ("Zero Conditional", "main"): ("Perfect Conditional",),
+    ("First Conditional", "if"): ("Future Simple",),
+    ("First Conditional", "main"): ("Perfect Conditional", "Present Conditional"),
+    ("Second Conditional", "if"): ("Present Simple", "Present Conditional", "Future Simple"),
+    ("Second Conditional", "main"): ("Future Simple", "Perfect Conditional"),
+    ("Third Conditional", "if"): ("Past Simple", "Perfect Conditional", "Present Perfect"),
+    ("Mixed Conditional", "main"): ("Perfect Conditional", "Future Simple"),
+}
+
+def _person(subject):
+    for name, person in SUBJECTS:
+        if name == subject:
+            return person
+    return OTHER if subject.endswith("s") else THIRD_SINGULAR
+
+##############################################################################
+# CASE GENERATION
+##############################################################################
+def _sentence(*parts):
+    return " ".join(p for p in parts if p)
+
+def _case(rng, n, context, question, correct, distractors, explanation):
+    """A usage case, or None if the table had too few distractors for it."""
+    if len(distractors) < CHOICES_PER_CASE - 1:
+        return None
+    choices = [correct] + distractors[:CHOICES_PER_CASE - 1]
+    rng.shuffle(choices)
+    return {
+        "title": f"Case #{n}",
+        "context": context,
+        "question_type": "multiple_choice",
+        "question": question,
+        "choices": choices,
+        "correct_choice": correct,
+        "explanation": explanation,
+    }
+
+def _tense_case(rng, tense, formation, n):
+    subject, person = rng.choice(SUBJECTS)
+    verb, complement = rng.choice(FRAMES)
+    when = rng.choice(TIME_EXPRESSIONS[tense])
+    kind = rng.choice(("Positive", "Negative", "Question"))
+    k = CHOICES_PER_CASE - 1
+    if kind == "Question":
+        correct, rest = conjugations.question(verb, tense, person)
+        distractors = conjugations.question_distractors(verb, tense, person, k, rng)
+        question = f"{BLANK} {_sentence(subject, rest, complement, when)}?"
+    else:
+        polarity = POSITIVE if kind == "Positive" else NEGATIVE
+        correct = conjugations.phrase(verb, tense, person, polarity)
+        distractors = conjugations.distractors(verb, tense, person, polarity, k, rng)
+        question = f"{_sentence(subject[0].upper() + subject[1:], BLANK, complement, when)}."
+    return _case(rng, n, f"{tense}, {kind.lower()} form.", question, correct, distractors,
+                 f"{formation.get(kind, tense)} → '{correct}'.")
+
+def _conditional_case(rng, pattern, formation, n):
+    if_tense, main_tense, blank_clauses = CONDITIONALS[pattern]
+    frame = rng.choice(FACT_FRAMES if pattern == "Zero Conditional" else HYPOTHETICAL_FRAMES)
+    if_subject, if_verb, if_comp, main_subject, main_verb, main_comp = frame
+    clause = rng.choice(blank_clauses)
+    # Only the main clause is negated; a negated if-clause reads oddly in most frames
+    polarity = NEGATIVE if clause == "main" and rng.random() < 0.3 else POSITIVE
+    if_part = conjugations.phrase(if_verb, if_tense, _person(if_subject))
+    main_part = conjugations.phrase(main_verb, main_tense, _person(main_subject), polarity)
+    if clause == "if":
+        verb, tense, person, correct, if_part = if_verb, if_tense, _person(if_subject), if_part, BLANK
+    else:
+        verb, tense, person, correct, main_part = main_verb, main_tense, _person(main_subject), main_part, BLANK
+    confusions = [conjugations.phrase(verb, t, person, polarity) for t in CONFUSIONS[(pattern, clause)]]
+    confusions = [c for c in dict.fromkeys(confusions) if c != correct]
+    k = CHOICES_PER_CASE - 1
+    distractors = rng.sample(confusions, min(1, len(confusions)))
+    distractors += [d for d in conjugations.distractors(verb, tense, person, polarity, k, rng)
+                    if d not in distractors][:k - len(distractors)]
+    suffix = " now" if pattern == "Mixed Conditional" else ""
+    question = f"If {_sentence(if_subject, if_part, if_comp)}, {_sentence(main_subject, main_part, main_comp)}{suffix}."
+    rule = formation.get("Negative" if polarity == NEGATIVE else "Positive", pattern)
+    return _case(rng, n, f"{pattern}, {clause} clause.", question, correct, distractors,
+                 f"{rule} → '{correct}'.")
+
+def can_generate(category, name):
+    return name in (TIME_EXPRESSIONS if category == GrammarCategory.TENSES else CONDITIONALS)
+
+def validate_case(case):
+    """Problems with a generated case (empty list if it is well-formed)."""
+    problems = []
+    choices = case["choices"]
+    if len(set(choices)) != len(choices):
+        problems.append("duplicate choices")
+    if case["correct_choice"] not in choices:
+        problems.append("correct_choice not among choices")
+    if case["question"].count(BLANK) != 1:
+        problems.append("question must have exactly one blank")
+    return problems
+
+def generate_exercise_set(category, name, seed, count=DEFAULT_CASES_PER_ITEM, formation=None):
+    """
+    ``count`` distinct usage cases for a tense/conditional, deterministic for
+    (category, name, seed). ``formation`` (the item's rules) feeds the
+    explanations. Raises ValueError if the templates keep failing to build
+    cases (more than MAX_ATTEMPTS_PER_CASE builds per case).
+    """
+    rng = random.Random(f"{category.value}|{name}|{seed}")
+    build = _tense_case if category == GrammarCategory.TENSES else _conditional_case
+    formation = formation or {}
+    cases, seen = [], set()
+    attempts = 0
+    while len(cases) < count:
+        if attempts >= count * MAX_ATTEMPTS_PER_CASE:
+            raise ValueError(f"built only {len(cases)} of {count} cases for {name!r} in {attempts} attempts")
+        case = build(rng, name, formation, len(cases) + 1)
+        attempts += 1
+        if case is None:
+            continue
+        # Small template spaces may run out of new sentences; allow repeats then
+        if case["question"] in seen and attempts < count * 3:
+            continue
+        seen.add(case["question"])
+        cases.append(case)
+    return cases
+
+##############################################################################
+# BACKGROUND GENERATOR + LRU CACHE
+##############################################################################
+class ExerciseGenerator:
+    """
+    Generates exercise sets on a thread pool and caches them in a bounded
+    LRU keyed by (category, item_key, seed). get() never generates; it only
+    returns what prefetch() has already finished.
+    """
+
+    def __init__(self, cache_sets=DEFAULT_CACHE_SETS, workers=DEFAULT_WORKERS):
+        self._cache = OrderedDict()
+        self._cache_sets = cache_sets
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exercise-gen")
+        self.hits = self.misses = self.evictions = 0
+
+    def prefetch(self, category, item_key, name, seed, count=DEFAULT_CASES_PER_ITEM, formation=None):
+        """Schedules generation of a set unless it is cached or in flight."""
+        key = (category, item_key, seed)
+        with self._lock:
+            if key in self._cache or key in self._pending:
+                return
+            self._pending[key] = self._pool.submit(
+                self._generate, key, name, count, dict(formation or {}))
+
+    def _generate(self, key, name, count, formation):
+        try:
+            cases = freeze(generate_exercise_set(key[0], name, key[2], count, formation))
+        except BaseException:
+            # So the next prefetch() or generate() tries again
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        # One acquisition, so no caller sees the set neither cached nor pending
+        with self._lock:
+            self._pending.pop(key, None)
+            self._cache[key] = cases
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_sets:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return cases
+
+    def get(self, category, item_key, seed):
+        """The cached set, or None if it is not ready (or was evicted)."""
+        key = (category, item_key, seed)
+        with self._lock:
+            cases = self._cache.get(key)
+            if cases is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cases
+
+    def generate(self, category, item_key, name, seed, count=DEFAULT_CASES_PER_ITEM, formation=None):
+        """
+        The set, waiting for it to be generated if needed (e.g. a learner's
+        set restored on a worker that never prefetched it).
+        """
+        key = (category, item_key, seed)
+        with self._lock:
+            cases = self._cache.get(key)
+            if cases is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cases
+            self.misses += 1
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._pool.submit(
+                    self._generate, key, name, count, dict(formation or {}))
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return {"cached_sets": len(self._cache), "pending": len(self._pending),
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
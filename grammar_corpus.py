@@ -0,0 +1,424 @@
+"""
+Grammar content for the Grammar Genius app.
+
+The tense/conditional descriptions and the exercise builders live here so the
+corpus is built once per process and shared read-only by every Streamlit
+session, instead of being rebuilt on each script rerun.
+"""
+import logging
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from enum import Enum
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+##############################################################################
+# ENUM FOR GRAMMAR CATEGORIES
+##############################################################################
+class GrammarCategory(Enum):
+    TENSES = "Tenses"
+    CONDITIONALS = "Conditionals"
+
+##############################################################################
+# HELPER DATA BUILDERS: Exercises for Tenses & Conditionals (20 per item by default)
+##############################################################################
+DEFAULT_CASES_PER_ITEM = 20
+
+def build_exercises_for_tense(tense_name, count=DEFAULT_CASES_PER_ITEM):
+    usage_cases = []
+    for i in range(1, count + 1):
+        question_type = "multiple_choice"
+        # We'll alternate Affirmative, Negative, Question patterns
+        if i % 3 == 1:
+            question = f"He ________ {tense_name} tasks each week (#{i})."
+            choices = ["does", "do", "doesn't"]
+            correct_choice = "does"
+            explanation = f"For {tense_name}, 'He' often uses 'does' in present contexts."
+        elif i % 3 == 2:
+            question = f"They ________ any {tense_name} exercises (#{i})."
+            choices = ["do not do", "didn't do", "haven't done"]
+            correct_choice = "do not do"
+            explanation = f"In {tense_name}, we might use 'do not do' for a simple negative."
+        else:
+            question = f"________ you apply {tense_name} daily (#{i})?"
+            choices = ["Do", "Will", "Have"]
+            correct_choice = "Do"
+            explanation = f"In {tense_name}, forming questions with 'Do' + subject is standard."
+
+        usage_cases.append({
+            "title": f"Case #{i}",
+            "context": f"Scenario for {tense_name}, example {i}.",
+            "question_type": question_type,
+            "question": question,
+            "choices": choices,
+            "correct_choice": correct_choice,
+            "explanation": explanation
+        })
+    return usage_cases
+
+def build_exercises_for_conditional(cond_name, count=DEFAULT_CASES_PER_ITEM):
+    usage_cases = []
+    for i in range(1, count + 1):
+        question_type = "multiple_choice"
+        if i % 3 == 1:
+            question = f"If you ________ the {cond_name}, you might succeed (#{i})."
+            choices = ["follow", "follows", "following"]
+            correct_choice = "follow"
+            explanation = f"For {cond_name}, 'if' + present simple => main clause can have 'might'."
+        elif i % 3 == 2:
+            question = f"If they didn't hurry, they ________ it in {cond_name} (#{i})."
+            choices = ["wouldn't get", "won't get", "haven't got"]
+            correct_choice = "wouldn't get"
+            explanation = f"{cond_name}: 'wouldn't' + base form for negative hypothetical outcomes."
+        else:
+            question = f"________ you handle {cond_name} conditions if needed (#{i})?"
+            choices = ["Would", "Do", "Are"]
+            correct_choice = "Would"
+            explanation = f"In {cond_name}, 'Would you ...?' is typical for hypothetical questions."
+
+        usage_cases.append({
+            "title": f"Case #{i}",
+            "context": f"Real-life scenario for {cond_name}, example {i}",
+            "question_type": question_type,
+            "question": question,
+            "choices": choices,
+            "correct_choice": correct_choice,
+            "explanation": explanation
+        })
+    return usage_cases
+
+##############################################################################
+# TENSES DATA (7 Tenses) with 20 usage cases each
+##############################################################################
+tenses_data = {
+    "1": {
+        "name": "Present Simple",
+        "formation": {
+            "Positive": "Subject + base form",
+            "Negative": "Subject + do/does + not + base form",
+            "Question": "Do/Does + subject + base form?",
+            "Short answer": "Yes, I do / No, I don't"
+        },
+        "usage_explanation": [
+            "General truths, habits, and routines."
+        ],
+        "extra_examples": [
+            "I play tennis on Sundays.",
+            "He doesn't eat seafood."
+        ]
+    },
+    "2": {
+        "name": "Past Simple",
+        "formation": {
+            "Positive": "Subject + past form",
+            "Negative": "Subject + did not + base form",
+            "Question": "Did + subject + base form?",
+            "Short answer": "Yes, I did / No, I didn't"
+        },
+        "usage_explanation": [
+            "Actions completed at a specific time in the past."
+        ],
+        "extra_examples": [
+            "I visited Rome last year.",
+            "They didn't like the movie."
+        ]
+    },
+    "3": {
+        "name": "Present Continuous",
+        "formation": {
+            "Positive": "Subject + am/is/are + verb-ing",
+            "Negative": "Subject + am/is/are + not + verb-ing",
+            "Question": "Am/Is/Are + subject + verb-ing?",
+            "Short answer": "Yes, I am / No, I'm not"
+        },
+        "usage_explanation": [
+            "Actions happening right now, temporary situations."
+        ],
+        "extra_examples": [
+            "I am learning Spanish at the moment.",
+            "She isn't working this week."
+        ]
+    },
+    "4": {
+        "name": "Past Continuous",
+        "formation": {
+            "Positive": "Subject + was/were + verb-ing",
+            "Negative": "Subject + was/were + not + verb-ing",
+            "Question": "Was/Were + subject + verb-ing?",
+            "Short answer": "Yes, I was / No, I wasn't"
+        },
+        "usage_explanation": [
+            "Actions in progress at a moment in the past, or interrupted actions."
+        ],
+        "extra_examples": [
+            "I was driving when you called.",
+            "They weren't sleeping at midnight."
+        ]
+    },
+    "5": {
+        "name": "Present Perfect",
+        "formation": {
+            "Positive": "Subject + have/has + past participle",
+            "Negative": "Subject + have/has + not + past participle",
+            "Question": "Have/Has + subject + past participle?",
+            "Short answer": "Yes, I have / No, I haven't"
+        },
+        "usage_explanation": [
+            "Actions from the past that affect the present or have no specified time."
+        ],
+        "extra_examples": [
+            "I have seen that film twice.",
+            "She hasn't finished her project yet."
+        ]
+    },
+    "6": {
+        "name": "Future Simple",
+        "formation": {
+            "Positive": "Subject + will + base form",
+            "Negative": "Subject + will + not + base form",
+            "Question": "Will + subject + base form?",
+            "Short answer": "Yes, I will / No, I won't"
+        },
+        "usage_explanation": [
+            "Spontaneous decisions, predictions, offers, promises."
+        ],
+        "extra_examples": [
+            "We will travel next month.",
+            "He won't agree to that idea."
+        ]
+    },
+    "7": {
+        "name": "Future Continuous",
+        "formation": {
+            "Positive": "Subject + will be + verb-ing",
+            "Negative": "Subject + will + not + be + verb-ing",
+            "Question": "Will + subject + be + verb-ing?",
+            "Short answer": "Yes, I will / No, I won't"
+        },
+        "usage_explanation": [
+            "Actions that will be ongoing at a certain time in the future."
+        ],
+        "extra_examples": [
+            "I will be waiting for you at noon.",
+            "They won't be working on Sunday."
+        ]
+    }
+}
+
+##############################################################################
+# 5 CONDITIONALS: Zero, First, Second, Third, Mixed (each 20 usage cases)
+##############################################################################
+conditionals_data = {
+    "0": {
+        "name": "Zero Conditional",
+        "formation": {
+            "Positive": "If + present simple, present simple",
+            "Negative": "If + present simple, present simple (negative)",
+            "Question": "Do/Does + subject + base form?",
+            "Short answer": "N/A"
+        },
+        "usage_explanation": [
+            "Facts always true under certain conditions.",
+            "General truths or cause-and-effect."
+        ],
+        "extra_examples": [
+            "If you heat water, it boils.",
+            "If you leave ice in the sun, it melts."
+        ]
+    },
+    "1": {
+        "name": "First Conditional",
+        "formation": {
+            "Positive": "If + present simple, will + base form",
+            "Negative": "If + present simple, will + not + base form",
+            "Question": "Will + subject + base form?",
+            "Short answer": "Yes, I will / No, I won't"
+        },
+        "usage_explanation": [
+            "Real or likely future situations.",
+            "Cause-effect in the future."
+        ],
+        "extra_examples": [
+            "If it rains, I'll take an umbrella.",
+            "If we don't hurry, we'll miss the bus."
+        ]
+    },
+    "2": {
+        "name": "Second Conditional",
+        "formation": {
+            "Positive": "If + past simple, would + base form",
+            "Negative": "If + past simple, would + not + base form",
+            "Question": "Would + subject + base form?",
+            "Short answer": "Yes, I would / No, I wouldn't"
+        },
+        "usage_explanation": [
+            "Unreal/imaginary situations in the present/future.",
+            "Hypothetical or unlikely scenarios."
+        ],
+        "extra_examples": [
+            "If I had a car, I would drive to the beach.",
+            "She would help if she were here."
+        ]
+    },
+    "3": {
+        "name": "Third Conditional",
+        "formation": {
+            "Positive": "If + past perfect, would + have + past participle",
+            "Negative": "If + past perfect, would + not + have + past participle",
+            "Question": "Would + subject + have + past participle?",
+            "Short answer": "Yes, I would've / No, I wouldn't have"
+        },
+        "usage_explanation": [
+            "Past situations that didn't happen, imagining different outcomes."
+        ],
+        "extra_examples": [
+            "If I had known, I would've arrived earlier.",
+            "We wouldn't have missed the show if we had left on time."
+        ]
+    },
+    "4": {
+        "name": "Mixed Conditional",
+        "formation": {
+            "Positive": "If + past perfect, would + base form",
+            "Negative": "If + past perfect, would + not + base form",
+            "Question": "Would + subject + base form? (if-clause in past perfect)",
+            "Short answer": "Yes, I would / No, I wouldn't"
+        },
+        "usage_explanation": [
+            "Combines a past hypothetical with a present/future result."
+        ],
+        "extra_examples": [
+            "If I had studied medicine, I'd be a doctor now.",
+            "If he had left on time, he wouldn't be stuck in traffic right now."
+        ]
+    }
+}
+
+##############################################################################
+# IMMUTABLE, LAZILY BUILT CORPUS
+##############################################################################
+CATEGORY_SOURCES = {
+    GrammarCategory.TENSES: (tenses_data, build_exercises_for_tense),
+    GrammarCategory.CONDITIONALS: (conditionals_data, build_exercises_for_conditional),
+}
+
+def freeze(value):
+    """Recursively turns dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def deep_sizeof(value, _seen=None):
+    """Approximate memory footprint (bytes) of a nested container structure."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (Mapping, MappingProxyType)):
+        for k, v in value.items():
+            size += deep_sizeof(k, _seen) + deep_sizeof(v, _seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += deep_sizeof(v, _seen)
+    return size
+
+class CategoryView(Mapping):
+    """
+    Read-only {item_key: item} mapping for one category.
+    Items (including their usage cases) are built on first access.
+    """
+
+    def __init__(self, corpus, category):
+        self._corpus = corpus
+        self._category = category
+
+    def __getitem__(self, item_key):
+        return self._corpus.item(self._category, item_key)
+
+    def __iter__(self):
+        return iter(self._corpus.item_keys(self._category))
+
+    def __len__(self):
+        return len(self._corpus.item_keys(self._category))
+
+    def name(self, item_key):
+        """Item name without building its exercises (used for sidebar options)."""
+        return self._corpus.item_name(self._category, item_key)
+
+class GrammarCorpus:
+    """
+    Immutable, process-wide corpus shared by all sessions.
+
+    Only the item names are known up front; each item is frozen and cached the
+    first time it is requested, so a session only pays for what it opens.
+    Build time and approximate memory are tracked per item (see ``stats()``).
+    """
+
+    def __init__(self, sources=None, cases_per_item=DEFAULT_CASES_PER_ITEM):
+        self._sources = sources if sources is not None else CATEGORY_SOURCES
+        self.cases_per_item = cases_per_item
+        self._items = {}
+        self._build_seconds = {}
+        self._build_bytes = {}
+        self._lock = threading.Lock()
+
+    # The built-in corpus never changes while the process runs
+    version = 1
+
+    def item_keys(self, category):
+        return tuple(self._sources[category][0])
+
+    def fingerprints(self):
+        return {(category, item_key): 0 for category in self._sources for item_key in self._sources[category][0]}
+
+    def item_name(self, category, item_key):
+        return self._sources[category][0][item_key]["name"]
+
+    def category(self, category):
+        return CategoryView(self, category)
+
+    def item_with_fingerprint(self, category, item_key):
+        return self.item(category, item_key), 0
+
+    def item(self, category, item_key):
+        cache_key = (category, item_key)
+        item = self._items.get(cache_key)
+        if item is not None:
+            return item
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is None:
+                item = self._build_item(category, item_key)
+                self._items[cache_key] = item
+        return item
+
+    def _build_item(self, category, item_key):
+        spec_dict, builder = self._sources[category]
+        spec = spec_dict[item_key]
+        start = time.perf_counter()
+        item = freeze(dict(spec, usage_cases=builder(spec["name"], self.cases_per_item)))
+        elapsed = time.perf_counter() - start
+        self._build_seconds[(category, item_key)] = elapsed
+        self._build_bytes[(category, item_key)] = deep_sizeof(item)
+        logger.info(
+            "Built %s item %s (%s) in %.2f ms, ~%d bytes",
+            category.value, item_key, spec["name"], elapsed * 1000,
+            self._build_bytes[(category, item_key)],
+        )
+        return item
+
+    def stats(self):
+        """Build time and approximate memory for the items built so far."""
+        return {
+            "items_total": sum(len(spec) for spec, _ in self._sources.values()),
+            "items_built": len(self._items),
+            "build_seconds": sum(self._build_seconds.values()),
+            "approx_bytes": sum(self._build_bytes.values()),
+        }
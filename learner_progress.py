@@ -0,0 +1,100 @@
+"""
+Compact per-session progress for the Grammar Genius app.
+
+One ItemProgress record per selected item replaces the old list of answer
+strings, the set of "submit_{item}_{i}" keys and the per-question answer
+keys in st.session_state.
+"""
+from array import array
+
+NO_CHOICE = -1
+
+##############################################################################
+# ITEM PROGRESS - submitted bitset + chosen-option indices
+##############################################################################
+class ItemProgress:
+    """
+    Progress for one tense/conditional.
+
+    ``submitted`` is a bitset (one bit per exercise) and ``choices`` holds the
+    index of the chosen option per exercise as a signed byte (NO_CHOICE when
+    nothing was recorded); ``missed`` holds the first wrong option chosen, the
+    same way. The answered count is kept alongside, so reading it is O(1);
+    resetting means dropping the record.
+    """
+
+    __slots__ = ("category", "item_key", "total", "answered_count", "_submitted", "_choices", "_missed")
+
+    def __init__(self, category, item_key, total):
+        self.category = category
+        self.item_key = item_key
+        self.total = total
+        self.answered_count = 0
+        self._submitted = bytearray((total + 7) // 8)
+        self._choices = array("b", [NO_CHOICE]) * total
+        self._missed = array("b", [NO_CHOICE]) * total
+
+    def belongs_to(self, category, item_key):
+        return self.category == category and self.item_key == item_key
+
+    def is_submitted(self, i):
+        return bool(self._submitted[i >> 3] & (1 << (i & 7)))
+
+    def choice(self, i):
+        """Index of the option chosen for exercise i, or NO_CHOICE."""
+        return self._choices[i]
+
+    def submit(self, i, choice_index):
+        """Marks exercise i as submitted with the given option index."""
+        if not self.is_submitted(i):
+            self._submitted[i >> 3] |= 1 << (i & 7)
+            self.answered_count += 1
+        self._choices[i] = choice_index
+
+    def miss(self, i, choice_index):
+        """Records a wrong answer to exercise i (only the first one is kept)."""
+        if self._missed[i] == NO_CHOICE:
+            self._missed[i] = choice_index
+
+    def missed_choice(self, i):
+        """Index of the first wrong option chosen for exercise i, or NO_CHOICE."""
+        return self._missed[i]
+
+    def first_unanswered(self):
+        """Index of the first exercise not yet submitted (total if all are)."""
+        for byte_index, byte in enumerate(self._submitted):
+            if byte != 0xFF:
+                for bit in range(8):
+                    i = (byte_index << 3) + bit
+                    if i >= self.total or not byte & (1 << bit):
+                        return min(i, self.total)
+        return self.total
+
+    def is_complete(self):
+        return self.answered_count == self.total
+
+    def merge(self, other):
+        """Adds the submissions of another record of the same exercises (e.g. from a second tab)."""
+        for i in range(min(self.total, other.total)):
+            if other.is_submitted(i) and not self.is_submitted(i):
+                self.submit(i, other.choice(i))
+            if other.missed_choice(i) != NO_CHOICE:
+                self.miss(i, other.missed_choice(i))
+
+    def to_bytes(self):
+        """The submitted bitset, the choices and the first misses, for shared session storage."""
+        return bytes(self._submitted) + self._choices.tobytes() + self._missed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, category, item_key, total, data):
+        progress = cls(category, item_key, total)
+        size = len(progress._submitted)
+        # Records saved before misses were tracked end after the choices
+        if len(data) not in (size + total, size + 2 * total):
+            raise ValueError(f"expected {size + 2 * total} bytes of progress for {total} exercises, got {len(data)}")
+        progress._submitted[:] = data[:size]
+        progress._choices = array("b", data[size:size + total])
+        if len(data) == size + 2 * total:
+            progress._missed = array("b", data[size + total:])
+        progress.answered_count = sum(bin(byte).count("1") for byte in progress._submitted)
+        return progress
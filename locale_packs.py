@@ -0,0 +1,267 @@
+"""
+Translations of the Grammar Genius content and UI, loaded on demand.
+
+English is not a pack: it is the corpus itself and the app's own strings.
+Every other language is a directory of packs:
+
+    <root>/<locale>/ui.json
+        {"@language": "Deutsch", "<English UI text>": "<translation>", ...}
+    <root>/<locale>/<category>/<item_key>.json
+        {"formation": {"Positive": "..."},
+         "usage_explanation": ["...", ...],
+         "usage_cases": {"<case index>": {"explanation": "...", "context": "..."}}}
+
+Anything a pack leaves out - the whole pack, a key, a list entry, a case -
+falls back to English. Item packs are read the first time a learner opens
+that item in that language and kept, with the localized item built from
+them, in a process-wide LRU shared by all sessions; a worker only holds the
+(locale, item) pairs that are in use. Localized items are keyed by the
+English item's fingerprint, so a refetched copy of the same item reuses
+them. UI packs are small and kept once read.
+
+Write English templates for translators with:
+
+    python locale_packs.py template de --out locales/
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+
+from grammar_corpus import DEFAULT_CASES_PER_ITEM, GrammarCategory, GrammarCorpus, deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+ENGLISH = "en"
+DEFAULT_LOCALES_DIR = "locales"
+DEFAULT_CACHE_PACKS = 256
+# Corpus versions of one item localized at once (sessions pin the item they opened)
+MAX_SOURCES_PER_PACK = 2
+# Usage-case fields a pack may translate; questions and choices stay English
+CASE_TEXT_FIELDS = ("explanation", "context")
+
+def _pick(translations, i, english):
+    if i < len(translations) and translations[i]:
+        return translations[i]
+    return english
+
+def localize(item, pack, cases=True):
+    """
+    Read-only copy of item with the pack's strings in place of the English
+    ones. Untranslated values (and usage cases) are shared with item.
+    cases=False leaves the usage cases alone (generated sets, which the
+    pack's case indices do not describe).
+    """
+    if not pack:
+        return item
+    localized = dict(item)
+    formation = pack.get("formation")
+    if formation:
+        localized["formation"] = MappingProxyType(
+            {form: formation.get(form) or rule for form, rule in item["formation"].items()})
+    usage = pack.get("usage_explanation")
+    if usage:
+        localized["usage_explanation"] = tuple(
+            _pick(usage, i, line) for i, line in enumerate(item["usage_explanation"]))
+    case_packs = pack.get("usage_cases")
+    if cases and case_packs:
+        usage_cases = list(item["usage_cases"])
+        for index, fields in case_packs.items():
+            i = int(index)
+            if i >= len(usage_cases):
+                continue
+            case = usage_cases[i]
+            translated = {f: fields[f] for f in CASE_TEXT_FIELDS if fields.get(f) and f in case}
+            if translated:
+                usage_cases[i] = MappingProxyType(dict(case, **translated))
+        localized["usage_cases"] = tuple(usage_cases)
+    return MappingProxyType(localized)
+
+class PackEntry:
+    """
+    (((fingerprint, localized item), ...), pack) for one (locale, item),
+    replaced as a whole so concurrent readers always see a matching pair. It
+    holds the localized copies of the last MAX_SOURCES_PER_PACK versions of
+    the English item, oldest first. The pack is None if the locale has none;
+    once a localized item is built it keeps only its item-level strings, the
+    translated cases live in the localized items.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, pack):
+        self.state = ((), pack)
+
+class LocalePacks:
+    """
+    Process-wide translations under root, shared read-only by all sessions.
+
+    localize() returns the item in the given language; the localized copy is
+    rebuilt only when the English item's fingerprint changes (a corpus
+    reload), so sessions on the same (locale, item) share one copy.
+    """
+
+    def __init__(self, root=DEFAULT_LOCALES_DIR, cache_packs=DEFAULT_CACHE_PACKS):
+        self.root = Path(root)
+        self._cache_packs = cache_packs
+        self._packs = OrderedDict()
+        self._ui = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._loads = 0
+        self._load_seconds = 0.0
+        found = sorted(p.name for p in self.root.iterdir() if p.is_dir()) if self.root.is_dir() else []
+        self._locales = (ENGLISH,) + tuple(name for name in found if name != ENGLISH)
+
+    def locales(self):
+        """ENGLISH followed by every locale with a pack directory."""
+        return self._locales
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable locale pack %s", path, exc_info=True)
+            return None
+
+    ##########################################################################
+    # UI TEXT
+    ##########################################################################
+    def ui(self, locale):
+        """{English text: translation} for the UI shell ({} for English or no pack)."""
+        table = self._ui.get(locale)
+        if table is None:
+            table = {}
+            if locale != ENGLISH and locale in self._locales:
+                table = self._read(self.root / locale / "ui.json") or {}
+            self._ui[locale] = table
+        return table
+
+    def text(self, locale, english):
+        """english in the given language, or english itself when untranslated."""
+        if locale == ENGLISH:
+            return english
+        return self.ui(locale).get(english) or english
+
+    def language_name(self, locale):
+        """How the language calls itself, for the language picker."""
+        return "English" if locale == ENGLISH else self.ui(locale).get("@language") or locale
+
+    ##########################################################################
+    # ITEM PACKS
+    ##########################################################################
+    def _read_item_pack(self, locale, category, item_key):
+        if locale not in self._locales:
+            return None
+        return self._read(self.root / locale / category.value.lower() / f"{item_key}.json")
+
+    def _entry(self, locale, category, item_key):
+        cache_key = (locale, category, item_key)
+        with self._lock:
+            entry = self._packs.get(cache_key)
+            if entry is not None:
+                self._packs.move_to_end(cache_key)
+                self._hits += 1
+                return entry
+        start = time.perf_counter()
+        entry = PackEntry(self._read_item_pack(locale, category, item_key))
+        with self._lock:
+            self._loads += 1
+            self._load_seconds += time.perf_counter() - start
+            entry = self._packs.setdefault(cache_key, entry)
+            self._packs.move_to_end(cache_key)
+            while len(self._packs) > self._cache_packs:
+                self._packs.popitem(last=False)
+        return entry
+
+    def localize(self, locale, category, item_key, item, fingerprint=None, cases=True):
+        """
+        item (the English corpus item, or a set generated from it) in the
+        given language. fingerprint is the provider's fingerprint of item
+        (see item_with_fingerprint(); None for a corpus that never changes).
+        """
+        if locale == ENGLISH:
+            return item
+        entry = self._entry(locale, category, item_key)
+        sources, pack = entry.state
+        if not cases:
+            return localize(item, pack, cases=False)
+        for source, localized in sources:
+            if source == fingerprint:
+                return localized
+        # A changed English item: the cases are read again from the pack file
+        if sources:
+            pack = self._read_item_pack(locale, category, item_key)
+        localized = localize(item, pack)
+        if pack:
+            pack = {k: v for k, v in pack.items() if k != "usage_cases"}
+        entry.state = (sources[1 - MAX_SOURCES_PER_PACK:] + ((fingerprint, localized),), pack)
+        return localized
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._packs.values())
+            hits, loads, seconds = self._hits, self._loads, self._load_seconds
+        return {
+            "locales": len(self._locales),
+            "packs_cached": len(entries),
+            "hits": hits,
+            "loads": loads,
+            "load_seconds": seconds,
+            "approx_bytes": deep_sizeof([e.state for e in entries]),
+        }
+
+##############################################################################
+# TEMPLATES FOR TRANSLATORS
+##############################################################################
+def item_template(item):
+    """Item pack holding the English strings, for a translator to overwrite."""
+    return {
+        "formation": dict(item["formation"]),
+        "usage_explanation": list(item["usage_explanation"]),
+        "usage_cases": {
+            str(i): {f: case[f] for f in CASE_TEXT_FIELDS if case.get(f)}
+            for i, case in enumerate(item["usage_cases"])
+        },
+    }
+
+def write_templates(provider, root, locale, translate=None):
+    """
+    Writes an item pack per corpus item under root/locale; translate(text)
+    maps each English string (default: left in English).
+    """
+    translate = translate or (lambda text: text)
+    for category in GrammarCategory:
+        directory = Path(root) / locale / category.value.lower()
+        directory.mkdir(parents=True, exist_ok=True)
+        for item_key in provider.item_keys(category):
+            pack = item_template(provider.item(category, item_key))
+            pack["formation"] = {form: translate(rule) for form, rule in pack["formation"].items()}
+            pack["usage_explanation"] = [translate(line) for line in pack["usage_explanation"]]
+            pack["usage_cases"] = {i: {f: translate(text) for f, text in fields.items()}
+                                   for i, fields in pack["usage_cases"].items()}
+            with open(directory / f"{item_key}.json", "w", encoding="utf-8") as f:
+                json.dump(pack, f, ensure_ascii=False, indent=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write English item pack templates for a new locale.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    template = sub.add_parser("template")
+    template.add_argument("locale", help="Locale code, e.g. de or pt-BR.")
+    template.add_argument("--out", default=DEFAULT_LOCALES_DIR, help="Locale packs directory.")
+    template.add_argument("--cases", type=int, default=DEFAULT_CASES_PER_ITEM,
+                          help="Cases per item to generate.")
+    args = parser.parse_args()
+    if args.locale == ENGLISH:
+        parser.error("English is the corpus itself and needs no pack")
+    write_templates(GrammarCorpus(cases_per_item=args.cases), args.out, args.locale)
+
+if __name__ == "__main__":
+    main()
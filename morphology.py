@@ -0,0 +1,342 @@
+"""
+Verb morphology for the Grammar Genius exercise generator.
+
+ConjugationTable precomputes the five forms (base, 3rd person, past, past
+participle, -ing) of every verb in its lexicon into one flat array of
+interned-string indices. A verb phrase for (verb, tense, person, polarity) is
+its tense pattern (auxiliary + which form) applied to one array slot, so a
+lookup is a couple of dict/array reads.
+
+Distractors come from the same table: the wrong person, or an auxiliary
+combined with a verb form it does not license ("does plays", "is play",
+"will played"). Those are never grammatical, unlike the forms of other tenses,
+which often are with the same sentence.
+
+The verbs "be" and the modals are not in the lexicon; they don't follow the
+do-support patterns the tenses are built from.
+"""
+import sys
+from array import array
+
+##############################################################################
+# LEXICON
+##############################################################################
+# base past participle
+IRREGULAR = """
+arise arose arisen; awake awoke awoken; bear bore borne; beat beat beaten;
+become became become; begin began begun; bend bent bent; bet bet bet;
+bind bound bound; bite bit bitten; bleed bled bled; blow blew blown;
+break broke broken; breed bred bred; bring brought brought;
+broadcast broadcast broadcast; build built built; burst burst burst;
+buy bought bought; catch caught caught; choose chose chosen; cling clung clung;
+come came come; cost cost cost; creep crept crept; cut cut cut; deal dealt dealt;
+dig dug dug; do did done; draw drew drawn; drink drank drunk; drive drove driven;
+eat ate eaten; fall fell fallen; feed fed fed; feel felt felt; fight fought fought;
+find found found; flee fled fled; fling flung flung; fly flew flown;
+forbid forbade forbidden; forecast forecast forecast; forget forgot forgotten;
+forgive forgave forgiven; freeze froze frozen; get got got; give gave given;
+go went gone; grind ground ground; grow grew grown; hang hung hung; have had had;
+hear heard heard; hide hid hidden; hit hit hit; hold held held; hurt hurt hurt;
+keep kept kept; kneel knelt knelt; know knew known; lay laid laid; lead led led;
+leave left left; lend lent lent; let let let; lie lay lain; light lit lit;
+lose lost lost; make made made; mean meant meant; meet met met;
+mistake mistook mistaken; overcome overcame overcome; overtake overtook overtaken;
+pay paid paid; put put put; quit quit quit; read read read; ride rode ridden;
+ring rang rung; rise rose risen; run ran run; say said said; see saw seen;
+seek sought sought; sell sold sold; send sent sent; set set set; sew sewed sewn;
+shake shook shaken; shine shone shone; shoot shot shot; show showed shown;
+shrink shrank shrunk; shut shut shut; sing sang sung; sink sank sunk; sit sat sat;
+sleep slept slept; slide slid slid; speak spoke spoken; speed sped sped;
+spend spent spent; spin spun spun; split split split; spread spread spread;
+spring sprang sprung; stand stood stood; steal stole stolen; stick stuck stuck;
+sting stung stung; stink stank stunk; strike struck struck; string strung strung;
+swear swore sworn; sweep swept swept; swim swam swum; swing swung swung;
+take took taken; teach taught taught; tear tore torn; tell told told;
+think thought thought; throw threw thrown; understand understood understood;
+undertake undertook undertaken; upset upset upset; wake woke woken; wear wore worn;
+weave wove woven; weep wept wept; win won won; wind wound wound;
+withdraw withdrew withdrawn; write wrote written
+"""
+
+REGULAR = """
+accept add admire admit advise afford agree allow announce annoy answer apologise
+appear applaud appreciate approve argue arrange arrive ask attach attack attempt
+attend attract avoid bake balance ban bathe beg behave belong boil book borrow
+bounce bow box brake breathe brush bump burn call calculate camp care carry carve
+cause challenge change charge chase cheat check cheer chew choke chop clap clean
+clear climb close coach collect comb command complain complete concentrate concern
+confess connect consider contain continue control cook copy correct cough count cover
+crack crash crawl cross crush cry cure cycle damage dance dare decide decorate
+delay deliver depend describe deserve destroy develop die disagree disappear
+discover dislike divide double doubt drag drain dress drop drown dry earn employ
+empty encourage end enjoy enter entertain escape examine excuse exercise exist
+expand expect explain explode extend face fail fasten fear fetch fill film fire
+finish fit fix flap flash float flood flow fold follow force form frighten fry gain gather
+glow glue grab greet grin grip groan guarantee guard guess guide hammer hand handle
+happen harm hate head heal heat help hop hope hug hum hunt hurry identify ignore
+imagine impress improve include increase inform injure intend interrupt introduce
+invent invite itch jog join joke judge juggle jump kick kill kiss knit knock label
+lack land last laugh launch learn level lick like list listen live load lock look
+love manage march mark marry match measure melt memorise mend milk miss mix moan
+move multiply nail name need nod note notice obey object observe obtain occur
+offend offer open order owe own pack paddle paint park pass paste pat pause pedal
+peel perform permit phone pick pinch place plan plant play please plug point poke
+polish pop post pour practise pray prefer prepare present press pretend prevent
+print produce promise protect provide pull pump punch punish push question queue
+race rain raise reach realise receive recognise record reduce refuse regret reject
+relax release rely remain remember remind remove repair repeat replace reply report
+request rescue retire return rinse risk rob rock roll rot rub ruin rule rush sail
+satisfy save scare scatter scold scrape scratch scream scrub search separate serve
+settle share shave shelter shiver shock shop shout shrug sigh sign signal sip ski
+skip slap slip smash smile smoke snatch sneeze sniff snore snow soak sound spare
+spell spill spoil spot spray squash squeeze stain stamp stare start stay step stir
+stop store strap stretch strip stuff study succeed suffer suggest supply support
+suppose surprise surround suspect switch talk tap taste tease telephone test thank
+tick tickle tie tip touch tour trace trade train transfer trap travel treat tremble
+trick trip trot trust try tug tumble turn twist type unite unlock unpack use vanish
+visit wait walk wander want warm warn wash waste watch water wave weigh welcome
+whisper whistle wink wipe wish wobble wonder work worry wrap wreck wrestle yawn
+yell zip
+"""
+
+# Stressed final syllable: the consonant doubles ("admitted", "beginning")
+DOUBLE_FINAL = frozenset(
+    "admit commit omit permit submit emit regret prefer refer occur deter incur recur "
+    "transfer confer defer infer equip begin forget upset forbid outwit acquit quit".split())
+
+VOWELS = "aeiou"
+
+##############################################################################
+# REGULAR MORPHOLOGY
+##############################################################################
+def _doubles_final(verb):
+    """Whether -ed/-ing double the final consonant (stop -> stopped, travel -> travelled)."""
+    if verb in DOUBLE_FINAL:
+        return True
+    if len(verb) < 3 or verb[-1] in VOWELS + "wxy" or verb[-2] not in VOWELS or verb[-3] in VOWELS:
+        return False
+    if verb[-1] == "l":
+        return True
+    vowel_groups = sum(1 for i, c in enumerate(verb) if c in VOWELS and (i == 0 or verb[i - 1] not in VOWELS))
+    return vowel_groups == 1
+
+def _third_person(verb):
+    if verb == "have":
+        return "has"
+    if verb.endswith(("s", "sh", "ch", "x", "z", "o")):
+        return verb + "es"
+    if verb.endswith("y") and verb[-2] not in VOWELS:
+        return verb[:-1] + "ies"
+    return verb + "s"
+
+def _ing(verb):
+    if verb.endswith("ie"):
+        return verb[:-2] + "ying"
+    if verb.endswith("e") and not verb.endswith(("ee", "ye", "oe")) and verb != "be":
+        return verb[:-1] + "ing"
+    if _doubles_final(verb):
+        return verb + verb[-1] + "ing"
+    return verb + "ing"
+
+def _regular_past(verb):
+    if verb.endswith("e"):
+        return verb + "d"
+    if verb.endswith("y") and verb[-2] not in VOWELS:
+        return verb[:-1] + "ied"
+    if _doubles_final(verb):
+        return verb + verb[-1] + "ed"
+    return verb + "ed"
+
+def _parse_irregular(text):
+    table = {}
+    for entry in text.split(";"):
+        base, past, participle = entry.split()
+        table[base] = (past, participle)
+    return table
+
+IRREGULAR_FORMS = _parse_irregular(IRREGULAR)
+LEXICON = tuple(IRREGULAR_FORMS) + tuple(v for v in REGULAR.split() if v not in IRREGULAR_FORMS)
+
+def verb_forms(verb):
+    """(base, 3rd person, past, past participle, -ing) worked out from the rules."""
+    if verb in IRREGULAR_FORMS:
+        past, participle = IRREGULAR_FORMS[verb]
+    else:
+        past = participle = _regular_past(verb)
+    return verb, _third_person(verb), past, participle, _ing(verb)
+
+##############################################################################
+# TENSE PATTERNS
+##############################################################################
+BASE, THIRD, PAST, PARTICIPLE, ING = range(5)
+FORMS_PER_VERB = 5
+
+FIRST_SINGULAR, THIRD_SINGULAR, OTHER = range(3)
+PERSONS = (FIRST_SINGULAR, THIRD_SINGULAR, OTHER)
+POSITIVE, NEGATIVE = 0, 1
+
+TENSE_NAMES = (
+    "Present Simple", "Past Simple", "Present Continuous", "Past Continuous",
+    "Present Perfect", "Future Simple", "Future Continuous",
+    # Conditional clauses
+    "Past Perfect", "Present Conditional", "Perfect Conditional",
+)
+TENSE_IDS = {name: i for i, name in enumerate(TENSE_NAMES)}
+
+_BE = {FIRST_SINGULAR: ("am", "am not"), THIRD_SINGULAR: ("is", "isn't"), OTHER: ("are", "aren't")}
+_WAS = {FIRST_SINGULAR: ("was", "wasn't"), THIRD_SINGULAR: ("was", "wasn't"), OTHER: ("were", "weren't")}
+_HAVE = {FIRST_SINGULAR: ("have", "haven't"), THIRD_SINGULAR: ("has", "hasn't"), OTHER: ("have", "haven't")}
+
+def _pattern(tense, person):
+    """
+    (positive lead, slot, negative lead, slot, question aux, lead, slot): the
+    words before the verb form and which of the verb's forms follows them.
+    """
+    if tense == "Present Simple":
+        if person == THIRD_SINGULAR:
+            return "", THIRD, "doesn't", BASE, "Does", "", BASE
+        return "", BASE, "don't", BASE, "Do", "", BASE
+    if tense == "Past Simple":
+        return "", PAST, "didn't", BASE, "Did", "", BASE
+    if tense in ("Present Continuous", "Past Continuous"):
+        aux, negated = (_BE if tense == "Present Continuous" else _WAS)[person]
+        return aux, ING, negated, ING, aux.capitalize(), "", ING
+    if tense == "Present Perfect":
+        aux, negated = _HAVE[person]
+        return aux, PARTICIPLE, negated, PARTICIPLE, aux.capitalize(), "", PARTICIPLE
+    if tense == "Future Simple":
+        return "will", BASE, "won't", BASE, "Will", "", BASE
+    if tense == "Future Continuous":
+        return "will be", ING, "won't be", ING, "Will", "be", ING
+    if tense == "Past Perfect":
+        return "had", PARTICIPLE, "hadn't", PARTICIPLE, "Had", "", PARTICIPLE
+    if tense == "Present Conditional":
+        return "would", BASE, "wouldn't", BASE, "Would", "", BASE
+    return "would have", PARTICIPLE, "wouldn't have", PARTICIPLE, "Would", "have", PARTICIPLE
+
+# Flat, verb-independent: PATTERNS[tense_id * 3 + person]
+PATTERNS = tuple(_pattern(tense, person) for tense in TENSE_NAMES for person in PERSONS)
+
+# Which verb forms may follow a word; "" is a finite verb with no auxiliary
+_LICENSES = {"": (BASE, THIRD, PAST)}
+for _word in ("do", "does", "did", "don't", "doesn't", "didn't", "will", "won't", "would", "wouldn't"):
+    _LICENSES[_word] = (BASE,)
+for _word in ("am", "is", "are", "was", "were", "not", "isn't", "aren't", "wasn't", "weren't", "be"):
+    _LICENSES[_word] = (ING, PARTICIPLE)
+for _word in ("has", "have", "had", "hasn't", "haven't", "hadn't"):
+    _LICENSES[_word] = (PARTICIPLE,)
+
+def _licensed(lead):
+    return _LICENSES[lead.rsplit(" ", 1)[-1].lower()]
+
+def _group_by_license(leads):
+    """((licensed slots, leads), ...) so a check runs once per auxiliary family."""
+    groups = {}
+    for lead in leads:
+        groups.setdefault(_licensed(lead), []).append(lead)
+    return tuple((slots, tuple(group)) for slots, group in groups.items())
+
+LEAD_GROUPS = {
+    POSITIVE: _group_by_license(dict.fromkeys(p[0] for p in PATTERNS if p[0])),
+    NEGATIVE: _group_by_license(dict.fromkeys(p[2] for p in PATTERNS)),
+}
+QUESTION_AUX_GROUPS = _group_by_license(dict.fromkeys(p[4] for p in PATTERNS))
+
+##############################################################################
+# CONJUGATION TABLE
+##############################################################################
+class ConjugationTable:
+    """
+    Precomputed forms for a verb lexicon. ``_forms`` holds FORMS_PER_VERB
+    indices into the interned ``_strings`` per verb, so irregular and regular
+    verbs cost the same and shared forms ("read", "cut") are stored once.
+    """
+
+    def __init__(self, verbs=LEXICON):
+        self._ids = {}
+        self._strings = []
+        self._forms = array("I")
+        string_ids = {}
+        for verb in verbs:
+            if verb in self._ids:
+                continue
+            self._ids[verb] = len(self._ids)
+            for form in verb_forms(verb):
+                string_id = string_ids.get(form)
+                if string_id is None:
+                    string_id = string_ids[form] = len(self._strings)
+                    self._strings.append(form)
+                self._forms.append(string_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, verb):
+        return verb in self._ids
+
+    def form(self, verb, slot):
+        return self._strings[self._forms[self._ids[verb] * FORMS_PER_VERB + slot]]
+
+    def forms(self, verb):
+        offset = self._ids[verb] * FORMS_PER_VERB
+        return tuple(self._strings[i] for i in self._forms[offset:offset + FORMS_PER_VERB])
+
+    def phrase(self, verb, tense, person, polarity=POSITIVE):
+        """The verb phrase, e.g. ("play", "Present Perfect", THIRD_SINGULAR, NEGATIVE) -> "hasn't played"."""
+        pattern = PATTERNS[TENSE_IDS[tense] * 3 + person]
+        lead, slot = (pattern[0], pattern[1]) if polarity == POSITIVE else (pattern[2], pattern[3])
+        form = self._strings[self._forms[self._ids[verb] * FORMS_PER_VERB + slot]]
+        return f"{lead} {form}" if lead else form
+
+    def question(self, verb, tense, person):
+        """(auxiliary, rest) of a question: ("Does", "play"), ("Will", "be playing")."""
+        _, _, _, _, aux, lead, slot = PATTERNS[TENSE_IDS[tense] * 3 + person]
+        form = self.form(verb, slot)
+        return aux, (f"{lead} {form}" if lead else form)
+
+    def distractors(self, verb, tense, person, polarity, k, rng):
+        """
+        Up to k wrong phrases: first the wrong person and this tense's
+        auxiliary with an unlicensed form, then other auxiliaries of the same
+        polarity with the correct form.
+        """
+        pattern = PATTERNS[TENSE_IDS[tense] * 3 + person]
+        lead, slot = (pattern[0], pattern[1]) if polarity == POSITIVE else (pattern[2], pattern[3])
+        forms = self.forms(verb)
+        form = forms[slot]
+        correct = f"{lead} {form}" if lead else form
+        close = [self.phrase(verb, tense, p, polarity) for p in PERSONS if p != person]
+        licensed = {forms[s] for s in _licensed(lead)}
+        close += [f"{lead} {f}" if lead else f for f in forms if f not in licensed]
+        far = [f"{other} {form}" for slots, leads in LEAD_GROUPS[polarity]
+               if all(forms[s] != form for s in slots) for other in leads]
+        return self._pick(correct, close, far, k, rng)
+
+    def question_distractors(self, verb, tense, person, k, rng):
+        """Up to k auxiliaries that can't open the question (other families, wrong person)."""
+        aux, rest = self.question(verb, tense, person)
+        first_word = rest.split(" ", 1)[0]
+        forms = self.forms(verb)
+        close = [self.question(verb, tense, p)[0] for p in PERSONS if p != person]
+        # "be"/"have" in the rest ("Will she be playing") are bare infinitives
+        bare = first_word in ("be", "have") and first_word != rest
+        far = [other for slots, auxes in QUESTION_AUX_GROUPS
+               if not (bare and BASE in slots) and all(forms[s] != first_word for s in slots)
+               for other in auxes]
+        return self._pick(aux, close, far, k, rng)
+
+    @staticmethod
+    def _pick(correct, close, far, k, rng):
+        close = [c for c in dict.fromkeys(close) if c != correct]
+        far = [c for c in dict.fromkeys(far) if c != correct and c not in close]
+        picked = rng.sample(close, min(k, len(close)))
+        return picked + rng.sample(far, min(k - len(picked), len(far)))
+
+    def nbytes(self):
+        """Approximate memory of the table (array + strings + verb index), in bytes."""
+        return (self._forms.buffer_info()[1] * self._forms.itemsize
+                + sum(sys.getsizeof(s) for s in self._strings)
+                + sys.getsizeof(self._strings) + sys.getsizeof(self._ids))
+
+# Shared by the generator and the benchmarks
+conjugations = ConjugationTable()
@@ -0,0 +1,187 @@
+"""
+Persistent learner progress for the Grammar Genius app.
+
+Submissions are queued in memory and written to a local SQLite database
+(WAL mode) by a background writer thread in batches, so a Submit click never
+waits on disk I/O. When a learner opens an item again - after a refresh,
+reconnect or server restart - their ItemProgress is restored from the
+database, including the first wrong option chosen for each exercise. The
+learner's adaptive-review cards (ease, lapses, next due time) are stored the
+same way, so review intervals survive a refresh or restart.
+"""
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from grammar_corpus import GrammarCategory
+from learner_progress import NO_CHOICE, ItemProgress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    learner_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    case_index INTEGER NOT NULL,
+    choice_index INTEGER NOT NULL,
+    submitted_at REAL NOT NULL,
+    missed_index INTEGER NOT NULL DEFAULT -1,
+    PRIMARY KEY (learner_id, category, item_key, case_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS review_cards (
+    learner_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    case_index INTEGER NOT NULL,
+    due REAL NOT NULL,
+    interval REAL NOT NULL,
+    ease REAL NOT NULL,
+    repetitions INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    PRIMARY KEY (learner_id, category, item_key, case_index)
+) WITHOUT ROWID;
+"""
+
+# A row is submitted once choice_index is set; a miss alone leaves it at
+# NO_CHOICE. Only the first miss per exercise is kept.
+UPSERT = f"""
+INSERT INTO submissions (learner_id, category, item_key, case_index, choice_index, submitted_at, missed_index)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (learner_id, category, item_key, case_index) DO UPDATE SET
+    choice_index = CASE WHEN excluded.choice_index = {NO_CHOICE} THEN choice_index ELSE excluded.choice_index END,
+    submitted_at = CASE WHEN excluded.choice_index = {NO_CHOICE} THEN submitted_at ELSE excluded.submitted_at END,
+    missed_index = CASE WHEN missed_index = {NO_CHOICE} THEN excluded.missed_index ELSE missed_index END
+"""
+
+REVIEW_UPSERT = "INSERT OR REPLACE INTO review_cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+##############################################################################
+# WRITE-BEHIND PROGRESS STORE
+##############################################################################
+class ProgressStore:
+    """
+    SQLite-backed submissions with a single background writer.
+
+    record() only appends a (statement, row) pair to a queue. The writer
+    thread takes whatever has queued up (at most ``batch_size`` rows, waiting up to ``flush_seconds``
+    for more) and commits it in one transaction. Reads share one connection
+    under ``_read_lock`` (not one per thread: Streamlit runs each rerun on a
+    new thread), which WAL lets run alongside the writer.
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self.batches_written = 0
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Databases from before misses were stored
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(submissions)")]
+            if "missed_index" not in columns:
+                conn.execute(f"ALTER TABLE submissions ADD COLUMN missed_index INTEGER NOT NULL DEFAULT {NO_CHOICE}")
+        conn.close()
+        self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        self._writer = threading.Thread(target=self._write_loop, name="progress-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, learner_id, category, item_key, case_index, choice_index):
+        """Queues one submission; returns immediately."""
+        self._queue.put((UPSERT, (learner_id, category.value, item_key, case_index, choice_index, time.time(),
+                                  NO_CHOICE)))
+
+    def record_miss(self, learner_id, category, item_key, case_index, choice_index):
+        """Queues a wrong answer (kept only if it is the exercise's first); returns immediately."""
+        self._queue.put((UPSERT, (learner_id, category.value, item_key, case_index, NO_CHOICE, time.time(),
+                                  choice_index)))
+
+    def record_review(self, learner_id, card):
+        """Queues the scheduling state of a reviewed spaced_repetition.Card; returns immediately."""
+        category, item_key, case_index = card.key
+        self._queue.put((REVIEW_UPSERT, (learner_id, category.value, item_key, case_index, card.due,
+                                         card.interval, card.ease, card.repetitions, card.lapses)))
+
+    def load(self, learner_id, category, item_key, total):
+        """ItemProgress for the learner's stored submissions and first misses on this item."""
+        progress = ItemProgress(category, item_key, total)
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT case_index, choice_index, missed_index FROM submissions"
+                " WHERE learner_id = ? AND category = ? AND item_key = ?",
+                (learner_id, category.value, item_key)).fetchall()
+        for case_index, choice_index, missed_index in rows:
+            if case_index >= total:
+                continue
+            if choice_index != NO_CHOICE:
+                progress.submit(case_index, choice_index)
+            if missed_index != NO_CHOICE:
+                progress.miss(case_index, missed_index)
+        return progress
+
+    def load_reviews(self, learner_id):
+        """[((category, item_key, case_index), due, interval, ease, repetitions, lapses), ...] of reviewed cards."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT category, item_key, case_index, due, interval, ease, repetitions, lapses FROM review_cards"
+                " WHERE learner_id = ?", (learner_id,)).fetchall()
+        return [((GrammarCategory(category), item_key, case_index), *state)
+                for category, item_key, case_index, *state in rows]
+
+    def flush(self):
+        """Blocks until everything queued so far is committed."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _next_batch(self):
+        """Blocks for one row, then gathers more until the batch is full or idle."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            rows = batch[:-1] if stop else batch
+            try:
+                if rows:
+                    with conn:
+                        # Consecutive rows of one statement go in one executemany, in queue order
+                        for statement, group in itertools.groupby(rows, key=lambda row: row[0]):
+                            conn.executemany(statement, [params for _, params in group])
+                    self.rows_written += len(rows)
+                    self.batches_written += 1
+            except sqlite3.Error:
+                logger.exception("Dropped a batch of %d progress rows", len(rows))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                conn.close()
+                return
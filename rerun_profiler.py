@@ -0,0 +1,154 @@
+"""
+Opt-in per-phase rerun profiling for the Grammar Genius app.
+
+Enabled with the GRAMMAR_PROFILE=1 environment variable or the ?profile=1
+query parameter. Each full rerun times its phases (corpus, css, sidebar,
+screens...) and counts the delta messages (elements) each phase emits.
+Samples go to a rotating JSONL log and to process-wide rolling p50/p95 stats.
+When disabled, the app uses NULL_PROFILE, whose phases are a shared no-op
+context manager.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+PROFILE_ENV = "GRAMMAR_PROFILE"
+PROFILE_LOG_ENV = "GRAMMAR_PROFILE_LOG"
+DEFAULT_LOG_PATH = "rerun_profile.jsonl"
+ROLLING_WINDOW = 500
+
+##############################################################################
+# PROCESS-WIDE ROLLING STATS + JSONL LOG
+##############################################################################
+class PhaseStats:
+    """Rolling window of phase durations (seconds), shared by all sessions."""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self._samples = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            samples = self._samples.get(phase)
+            if samples is None:
+                samples = self._samples[phase] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def percentiles(self, phase):
+        """(p50, p95) in seconds over the rolling window, or (None, None)."""
+        with self._lock:
+            samples = sorted(self._samples.get(phase, ()))
+        if not samples:
+            return None, None
+        return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def summary(self):
+        with self._lock:
+            phases = list(self._samples)
+        return {phase: self.percentiles(phase) for phase in phases}
+
+phase_stats = PhaseStats()
+
+_log_lock = threading.Lock()
+
+def _profile_logger():
+    """JSONL logger with a rotating file handler, created on first use."""
+    logger = logging.getLogger("grammar_genius.rerun_profile")
+    with _log_lock:
+        if not logger.handlers:
+            path = os.environ.get(PROFILE_LOG_ENV, DEFAULT_LOG_PATH)
+            handler = RotatingFileHandler(path, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+##############################################################################
+# PER-RERUN PROFILE
+##############################################################################
+class _CountingEnqueue:
+    """Wraps the script context's enqueue and counts delta messages."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.deltas = 0
+
+    def __call__(self, msg):
+        if msg.WhichOneof("type") == "delta":
+            self.deltas += 1
+        self.inner(msg)
+
+class RerunProfile:
+    """Timings and element counts for the phases of one full rerun."""
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = []
+        self._started = time.perf_counter()
+        self._ctx = get_script_run_ctx()
+        self._counter = None
+        if self._ctx is not None:
+            enqueue = self._ctx._enqueue
+            # A rerun interrupted by st.stop()/st.rerun() may have left ours behind
+            if isinstance(enqueue, _CountingEnqueue):
+                enqueue = enqueue.inner
+            self._counter = _CountingEnqueue(enqueue)
+            self._ctx._enqueue = self._counter
+
+    @contextmanager
+    def phase(self, name):
+        deltas_before = self._counter.deltas if self._counter else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            deltas = (self._counter.deltas if self._counter else 0) - deltas_before
+            self.phases.append({"phase": name, "seconds": elapsed, "elements": deltas})
+            phase_stats.add(name, elapsed)
+
+    def finish(self):
+        """Stops counting, records the total and appends the rerun to the log."""
+        total = time.perf_counter() - self._started
+        if self._ctx is not None and self._ctx._enqueue is self._counter:
+            self._ctx._enqueue = self._counter.inner
+        phase_stats.add("total", total)
+        record = {
+            "ts": time.time(),
+            "total_seconds": total,
+            "elements": self._counter.deltas if self._counter else None,
+            "phases": self.phases,
+        }
+        _profile_logger().info(json.dumps(record))
+        return record
+
+class _NullProfile:
+    """Disabled profiler: phases are a shared no-op context manager."""
+
+    enabled = False
+    phases = ()
+    _noop = nullcontext()
+
+    def phase(self, name):
+        return self._noop
+
+    def finish(self):
+        return None
+
+NULL_PROFILE = _NullProfile()
+
+def start_rerun_profile(query_params):
+    """RerunProfile if profiling is switched on for this rerun, else NULL_PROFILE."""
+    if os.environ.get(PROFILE_ENV) == "1" or query_params.get("profile") == "1":
+        return RerunProfile()
+    return NULL_PROFILE
@@ -0,0 +1,316 @@
+"""
+Full-text search over the Grammar Genius corpus.
+
+Documents are the searchable texts of every item: each usage case (its
+question, context and explanation together) and each line of an item's
+usage_explanation and extra_examples. Text is lowercased and split into
+words, keeping contractions whole ("wouldn't").
+
+Each term's postings are NumPy arrays: doc ids (ascending), their weights
+(the term count scaled down by document length) and the positions in
+descending weight order. A query ranks documents by the sum of idf * weight
+over its terms. Every query term must match, and the last one also matches
+as a prefix, so results update while the learner types:
+
+* one term (or prefix): the best documents are the heads of the weight order;
+* several: the best-weighted documents of the rarest whole-word term are
+  looked up in the other terms' id arrays (binary search); if other
+  documents could still make the top results, the rest of that term's
+  documents are scored against a dense score vector per other term.
+
+All of it runs in NumPy, so no Python code runs per document.
+
+The index tracks a fingerprint per item. sync() re-indexes only the items
+whose fingerprint changed since the last call and drops removed ones; only
+the postings of the terms those items use are rebuilt.
+"""
+import bisect
+import heapq
+import itertools
+import math
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CASE_FIELDS = ("question", "context", "explanation")
+ITEM_FIELDS = ("usage_explanation", "extra_examples")
+MIN_PREFIX = 2
+MAX_PREFIX_TERMS = 32
+SCAN_CHUNK = 512
+CACHED_QUERIES = 256
+DEFAULT_LIMIT = 10
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+##############################################################################
+# INDEX
+##############################################################################
+class SearchIndex:
+    """
+    Inverted index with prefix matching. A doc is (category, item_key,
+    case_index, field, line): case docs have field None, item docs have
+    case_index None and the field and line of their text.
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self._doc_terms = {}
+        self._item_docs = {}
+        self._fingerprints = {}
+        self._postings = {}
+        self._terms = []
+        self._added = {}
+        self._removed = set()
+        self._next_doc = itertools.count()
+        self._id_limit = 0
+        self._version = None
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    ##########################################################################
+    # INDEXING - changes are buffered, then applied per term by _refresh()
+    ##########################################################################
+    def _add_doc(self, location, text):
+        terms = tokenize(text)
+        if not terms:
+            return
+        doc_id = next(self._next_doc)
+        self._id_limit = doc_id + 1
+        self._docs[doc_id] = location
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        norm = 1.0 / math.sqrt(len(terms))
+        for term, count in counts.items():
+            self._added.setdefault(term, []).append((doc_id, count * norm))
+        # One shared string per term across docs, not one per occurrence
+        self._doc_terms[doc_id] = tuple(sys.intern(term) for term in counts)
+        self._item_docs[location[:2]].append(doc_id)
+
+    def _remove_item(self, category, item_key):
+        for doc_id in self._item_docs.pop((category, item_key), ()):
+            del self._docs[doc_id]
+            self._removed.add(doc_id)
+            for term in self._doc_terms.pop(doc_id):
+                self._added.setdefault(term, [])
+
+    def _index_item(self, category, item_key, item):
+        self._remove_item(category, item_key)
+        self._item_docs[(category, item_key)] = []
+        for i, case in enumerate(item["usage_cases"]):
+            self._add_doc((category, item_key, i, None, None),
+                          " ".join(case[field] for field in CASE_FIELDS if case.get(field)))
+        for field in ITEM_FIELDS:
+            for line, text in enumerate(item.get(field, ())):
+                self._add_doc((category, item_key, None, field, line), text)
+
+    def _refresh(self):
+        """Rebuilds the postings of the terms touched since the last refresh."""
+        if not self._added:
+            return
+        removed = np.fromiter(self._removed, dtype=np.int32, count=len(self._removed))
+        new_terms, gone_terms = [], set()
+        for term, additions in self._added.items():
+            ids, weights, _ = self._postings.get(term, (np.empty(0, np.int32), np.empty(0, np.float32), None))
+            if len(removed) and len(ids):
+                keep = ~np.isin(ids, removed)
+                ids, weights = ids[keep], weights[keep]
+            if additions:
+                # New doc ids are always the largest, so ids stay sorted
+                added_ids, added_weights = zip(*additions)
+                ids = np.concatenate([ids, np.array(added_ids, dtype=np.int32)])
+                weights = np.concatenate([weights, np.array(added_weights, dtype=np.float32)])
+            if not len(ids):
+                if self._postings.pop(term, None) is not None:
+                    gone_terms.add(term)
+                continue
+            if term not in self._postings:
+                new_terms.append(term)
+            self._postings[term] = (ids, weights, np.argsort(-weights, kind="stable").astype(np.int32))
+        if new_terms or gone_terms:
+            kept = (term for term in self._terms if term not in gone_terms)
+            self._terms = list(heapq.merge(kept, sorted(new_terms)))
+        self._added.clear()
+        self._removed.clear()
+        self._results.clear()
+
+    def index_item(self, category, item_key, item, fingerprint=None):
+        """Adds an item, replacing any documents it had."""
+        with self._lock:
+            self._index_item(category, item_key, item)
+            self._fingerprints[(category, item_key)] = fingerprint
+            self._refresh()
+
+    def remove_item(self, category, item_key):
+        with self._lock:
+            self._remove_item(category, item_key)
+            self._fingerprints.pop((category, item_key), None)
+            self._refresh()
+
+    def sync(self, corpus):
+        """
+        Brings the index up to date with a content provider: only items whose
+        fingerprint changed are (re)indexed. Cheap when the corpus version is
+        the one last synced. Returns the number of items indexed or removed.
+        """
+        if corpus.version == self._version:
+            return 0
+        with self._lock:
+            version = corpus.version
+            fingerprints = corpus.fingerprints()
+            changed = 0
+            for key in [key for key in self._fingerprints if key not in fingerprints]:
+                self._remove_item(*key)
+                del self._fingerprints[key]
+                changed += 1
+            for (category, item_key), fingerprint in fingerprints.items():
+                known = (category, item_key) in self._fingerprints
+                if not known or self._fingerprints[(category, item_key)] != fingerprint:
+                    self._index_item(category, item_key, corpus.item(category, item_key))
+                    self._fingerprints[(category, item_key)] = fingerprint
+                    changed += 1
+            self._refresh()
+            self._version = version
+        return changed
+
+    ##########################################################################
+    # QUERYING
+    ##########################################################################
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self._terms, prefix)
+        terms = []
+        for term in itertools.islice(self._terms, start, start + MAX_PREFIX_TERMS):
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        [(score, (category, item_key, case_index, field, line)), ...], best
+        first. Recent results are cached until the index changes, as every
+        rerun of the page repeats the query in the search box.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            cache_key = (tuple(tokens), limit)
+            results = self._results.get(cache_key)
+            if results is None:
+                results = self._results[cache_key] = self._search(tokens, limit)
+                if len(self._results) > CACHED_QUERIES:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(cache_key)
+            return results
+
+    def _search(self, tokens, limit):
+        total = len(self._docs)
+        groups = []
+        for n, token in enumerate(tokens):
+            if n == len(tokens) - 1 and len(token) >= MIN_PREFIX:
+                terms = self._expand(token)
+            else:
+                terms = [token] if token in self._postings else []
+            if not terms:
+                return []
+            groups.append([(math.log(1 + total / len(self._postings[term][0])),) + self._postings[term]
+                           for term in terms])
+        if len(groups) == 1:
+            ids, scores = self._best_of(groups[0], limit)
+        else:
+            ids, scores = self._match_all(groups, limit)
+        if len(ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(float(scores[i]), self._docs[int(ids[i])]) for i in order]
+
+    def _best_of(self, group, limit):
+        """(ids, scores) of the best ``limit`` documents of every term in one group."""
+        heads = [(idf, ids, weights, order[:limit]) for idf, ids, weights, order in group]
+        return _max_per_doc(np.concatenate([ids[head] for _, ids, _, head in heads]),
+                            np.concatenate([idf * weights[head] for idf, _, weights, head in heads]))
+
+    def _match_all(self, groups, limit):
+        """(ids, scores) of the best documents matching every group (at least ``limit`` if there are)."""
+        whole_words = [group for group in groups if len(group) == 1]
+        driver = min(whole_words, key=lambda group: len(group[0][1]))
+        others = [group for group in groups if group is not driver]
+        idf, driver_ids, driver_weights, driver_order = driver[0]
+
+        # Best-weighted chunk first, in id order so the binary searches walk forwards
+        head = np.sort(driver_order[:SCAN_CHUNK])
+        ids, scores = driver_ids[head], idf * driver_weights[head]
+        for group in others:
+            extra = _lookup(group, ids)
+            keep = extra > 0
+            ids, scores = ids[keep], scores[keep] + extra[keep]
+        if len(driver_order) <= SCAN_CHUNK:
+            return ids, scores
+        if len(ids) >= limit:
+            # Done if no other document could beat the current top results
+            others_best = sum(max(term_idf * weights[order[0]] for term_idf, _, weights, order in group)
+                              for group in others)
+            kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            if kth >= idf * driver_weights[driver_order[SCAN_CHUNK]] + others_best:
+                return ids, scores
+
+        # Otherwise score the rest against one dense vector per other group
+        rest = driver_order[SCAN_CHUNK:]
+        rest_ids, rest_scores = driver_ids[rest], idf * driver_weights[rest]
+        for group in others:
+            dense = np.zeros(self._id_limit, dtype=np.float32)
+            if len(group) == 1:
+                term_idf, term_ids, weights, _ = group[0]
+                dense[term_ids] = term_idf * weights
+            else:
+                for term_idf, term_ids, weights, _ in group:
+                    dense[term_ids] = np.maximum(dense[term_ids], term_idf * weights)
+            extra = dense[rest_ids]
+            keep = extra > 0
+            rest_ids, rest_scores = rest_ids[keep], rest_scores[keep] + extra[keep]
+        return np.concatenate([ids, rest_ids]), np.concatenate([scores, rest_scores])
+
+    def stats(self):
+        with self._lock:
+            return {"documents": len(self._docs), "terms": len(self._terms),
+                    "postings": sum(len(ids) for ids, _, _ in self._postings.values()),
+                    "postings_bytes": sum(sum(a.nbytes for a in arrays) for arrays in self._postings.values()),
+                    "items": len(self._item_docs), "version": self._version}
+
+def _lookup(group, ids):
+    """Each doc's score for one group (the best of its terms; 0 where none matches)."""
+    scores = np.zeros(len(ids), dtype=np.float32)
+    for idf, term_ids, weights, _ in group:
+        pos = np.minimum(np.searchsorted(term_ids, ids), len(term_ids) - 1)
+        np.maximum(scores, np.where(term_ids[pos] == ids, idf * weights[pos], 0), out=scores)
+    return scores
+
+def _max_per_doc(ids, scores):
+    """Collapses repeated doc ids (a prefix matching several terms of a doc), keeping the best score."""
+    if len(ids) < 2:
+        return ids, scores
+    order = np.lexsort((-scores, ids))
+    ids, scores = ids[order], scores[order]
+    first = np.ones(len(ids), dtype=bool)
+    first[1:] = ids[1:] != ids[:-1]
+    return ids[first], scores[first]
+
+def hit_text(corpus, location):
+    """The text a search hit points at (re-read from the corpus, not stored in the index)."""
+    category, item_key, case_index, field, line = location
+    item = corpus.item(category, item_key)
+    if case_index is not None:
+        return item["usage_cases"][case_index]["question"]
+    return item[field][line]
@@ -0,0 +1,160 @@
+"""
+Shared session state for running the Grammar Genius app on several workers.
+
+st.session_state lives in one Streamlit process, so a learner who lands on
+another worker (a load balancer without sticky sessions, a second tab, a
+restarted worker) would start over. This backend keeps the fields that
+matter for picking up mid-quiz - the open item (and generated set), review
+mode, pagination and the item's ItemProgress - in one SQLite row per
+learner, shared by every worker on the host (WAL mode, so readers never
+wait for a writer).
+
+Every save bumps the row's version. Each process keeps a read-through LRU of
+decoded rows: load() only asks SQLite for the version and re-reads the row
+when another worker has changed it. A save from a session that missed
+another worker's save (two tabs answering at once) keeps its own fields but
+merges the other worker's submissions into its progress, so no answer is
+lost.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from grammar_corpus import GrammarCategory
+from learner_progress import ItemProgress
+
+DEFAULT_CACHE_SESSIONS = 4096
+BUSY_TIMEOUT_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS learner_sessions (
+    learner_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    progress BLOB,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+class SharedSession:
+    """One learner's stored state: ``fields`` (JSON-able dict) and ``progress`` (ItemProgress.to_bytes())."""
+
+    __slots__ = ("version", "fields", "progress")
+
+    def __init__(self, version, fields, progress):
+        self.version = version
+        self.fields = fields
+        self.progress = progress
+
+def _merge_progress(fields, progress, stored):
+    """Our progress plus the submissions a concurrent save stored for the same exercise set."""
+    if progress is None or stored.progress is None or \
+            (fields.get("set_key"), fields.get("total")) != (stored.fields.get("set_key"), stored.fields.get("total")):
+        return progress
+    category = GrammarCategory(fields["category"])
+    ours = ItemProgress.from_bytes(category, fields["set_key"], fields["total"], progress)
+    ours.merge(ItemProgress.from_bytes(category, fields["set_key"], fields["total"], stored.progress))
+    return ours.to_bytes()
+
+##############################################################################
+# SQLITE BACKEND + PER-PROCESS CACHE
+##############################################################################
+class SessionBackend:
+    """
+    Versioned learner rows in a shared SQLite file, with a per-process LRU of
+    decoded rows. Safe to use from every script thread of a process: they
+    share one connection, taken in turn under ``_db_lock`` (Streamlit runs
+    every rerun on a new thread, so per-thread connections would be opened
+    again on each rerun).
+    """
+
+    def __init__(self, path, cache_sessions=DEFAULT_CACHE_SESSIONS):
+        self.path = str(path)
+        self.cache_sessions = cache_sessions
+        self.hits = self.misses = self.saves = self.conflicts = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        # Autocommit; save() opens its own write transaction
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _cached(self, learner_id, version):
+        with self._lock:
+            session = self._cache.get(learner_id)
+            if session is None or session.version != version:
+                return None
+            self._cache.move_to_end(learner_id)
+            return session
+
+    def _remember(self, learner_id, session):
+        with self._lock:
+            current = self._cache.get(learner_id)
+            if current is None or current.version <= session.version:
+                self._cache[learner_id] = session
+            self._cache.move_to_end(learner_id)
+            while len(self._cache) > self.cache_sessions:
+                self._cache.popitem(last=False)
+
+    def load(self, learner_id):
+        """The learner's SharedSession (None if nothing was saved yet); re-read only if its version moved."""
+        conn = self._conn
+        with self._db_lock:
+            row = conn.execute("SELECT version FROM learner_sessions WHERE learner_id = ?", (learner_id,)).fetchone()
+        if row is None:
+            return None
+        session = self._cached(learner_id, row[0])
+        if session is not None:
+            self.hits += 1
+            return session
+        self.misses += 1
+        with self._db_lock:
+            row = conn.execute("SELECT version, fields, progress FROM learner_sessions WHERE learner_id = ?",
+                               (learner_id,)).fetchone()
+        if row is None:
+            return None
+        session = SharedSession(row[0], json.loads(row[1]), row[2])
+        self._remember(learner_id, session)
+        return session
+
+    def save(self, learner_id, fields, progress, base_version):
+        """
+        Stores the learner's state as a new version and returns what was
+        stored. ``base_version`` is the version the session last loaded or
+        saved (None for none); if the row has moved on since, submissions
+        from the newer row are merged into ``progress`` (same exercise set).
+        """
+        conn = self._conn
+        with self._db_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT version, fields, progress FROM learner_sessions WHERE learner_id = ?",
+                                   (learner_id,)).fetchone()
+                version = 1
+                if row is not None:
+                    version = row[0] + 1
+                    if row[0] != base_version:
+                        self.conflicts += 1
+                        progress = _merge_progress(fields, progress,
+                                                   SharedSession(row[0], json.loads(row[1]), row[2]))
+                conn.execute("INSERT OR REPLACE INTO learner_sessions VALUES (?, ?, ?, ?, ?)",
+                             (learner_id, version, json.dumps(fields), progress, time.time()))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self.saves += 1
+        session = SharedSession(version, fields, progress)
+        self._remember(learner_id, session)
+        return session
+
+    def stats(self):
+        with self._lock:
+            cached = len(self._cache)
+        return {"cached_sessions": cached, "hits": self.hits, "misses": self.misses,
+                "saves": self.saves, "conflicts": self.conflicts}
@@ -0,0 +1,145 @@
+"""
+Spaced-repetition scheduling for the Grammar Genius app.
+
+Every usage case of every tense and conditional is a card, identified by
+(GrammarCategory, item_key, case_index). Cards follow a simplified SM-2
+model: a correct answer grows the interval by the card's ease, a wrong one
+(a lapse) lowers the ease and brings the card back within a minute.
+
+ReviewScheduler keeps one learner's cards in a min-heap ordered by due time,
+so picking the next card is O(log n). Rescheduling pushes a fresh heap entry
+and leaves the old one behind; stale entries are skipped when they surface
+and the heap is rebuilt once they outnumber the cards.
+"""
+import heapq
+import itertools
+
+from grammar_corpus import GrammarCategory
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+EASE_PENALTY = 0.2
+LEARNING_STEP = 10 * 60
+RELEARN_STEP = 60
+GRADUATING_INTERVAL = 24 * 60 * 60
+
+##############################################################################
+# CARD STATE
+##############################################################################
+class Card:
+    """Scheduling state of one usage case."""
+
+    __slots__ = ("key", "due", "interval", "ease", "repetitions", "lapses", "heap_seq")
+
+    def __init__(self, key, due):
+        self.key = key
+        self.due = due
+        self.interval = 0.0
+        self.ease = DEFAULT_EASE
+        self.repetitions = 0
+        self.lapses = 0
+        self.heap_seq = -1
+
+    def review(self, correct, now):
+        """Applies one answer and sets the next due time."""
+        if correct:
+            if self.repetitions == 0:
+                self.interval = LEARNING_STEP
+            elif self.repetitions == 1:
+                self.interval = GRADUATING_INTERVAL
+            else:
+                self.interval *= self.ease
+            self.repetitions += 1
+        else:
+            self.lapses += 1
+            self.repetitions = 0
+            self.interval = RELEARN_STEP
+            self.ease = max(MIN_EASE, self.ease - EASE_PENALTY)
+        self.due = now + self.interval
+
+##############################################################################
+# SCHEDULER
+##############################################################################
+class ReviewScheduler:
+    """One learner's cards plus a heap of (due, seq, key) entries."""
+
+    def __init__(self):
+        self._cards = {}
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __contains__(self, key):
+        return key in self._cards
+
+    def card(self, key):
+        return self._cards[key]
+
+    def add_cards(self, keys, now):
+        """Adds new cards (due now, in the given order); existing cards are kept."""
+        added = False
+        for key in keys:
+            if key not in self._cards:
+                card = self._cards[key] = Card(key, now)
+                card.heap_seq = next(self._seq)
+                self._heap.append((card.due, card.heap_seq, key))
+                added = True
+        if added:
+            heapq.heapify(self._heap)
+
+    def add_item(self, category, item_key, case_count, now):
+        self.add_cards([(category, item_key, i) for i in range(case_count)], now)
+
+    def add_corpus(self, corpus, now):
+        """
+        Cards for every item of every GrammarCategory in the corpus. New cards
+        are interleaved (case 1 of every item, then case 2, ...), so a fresh
+        deck mixes tenses and conditionals.
+        """
+        items = [(category, item_key, len(corpus.item(category, item_key)["usage_cases"]))
+                 for category in GrammarCategory for item_key in corpus.item_keys(category)]
+        longest = max((count for _, _, count in items), default=0)
+        self.add_cards([(category, item_key, i) for i in range(longest)
+                        for category, item_key, count in items if i < count], now)
+
+    def _push(self, card):
+        card.heap_seq = next(self._seq)
+        heapq.heappush(self._heap, (card.due, card.heap_seq, card.key))
+        if len(self._heap) > 2 * len(self._cards) + 64:
+            self._heap = [(c.due, c.heap_seq, c.key) for c in self._cards.values()]
+            heapq.heapify(self._heap)
+
+    def peek(self):
+        """The card due soonest (possibly not due yet), or None if there are no cards."""
+        heap = self._heap
+        while heap:
+            due, seq, key = heap[0]
+            card = self._cards.get(key)
+            if card is not None and card.heap_seq == seq:
+                return card
+            heapq.heappop(heap)
+        return None
+
+    def restore(self, key, due, interval, ease, repetitions, lapses):
+        """Sets a card's stored scheduling state (e.g. from ProgressStore.load_reviews())."""
+        card = self._cards[key]
+        card.due, card.interval, card.ease = due, interval, ease
+        card.repetitions, card.lapses = repetitions, lapses
+        self._push(card)
+
+    def discard(self, key):
+        """Forgets a card (e.g. its case was removed from the corpus)."""
+        self._cards.pop(key, None)
+
+    def review(self, key, correct, now):
+        """Records an answer for a card and reschedules it."""
+        card = self._cards[key]
+        card.review(correct, now)
+        self._push(card)
+        return card
+
+    def due_count(self, now):
+        """How many cards are due (O(n); for display, not for selection)."""
+        return sum(1 for card in self._cards.values() if card.due <= now)
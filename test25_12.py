@@ -1,34 +1,58 @@
 import streamlit as st
+import os
+import pandas as pd
+import hmac
 import random
-from enum import Enum
+import time
+import uuid
+
+from answer_analytics import GENERATED_CASE, AnswerAnalytics
+from batch_grading import BatchGrader
+from content_store import BUILTIN, DEFAULT_RELOAD_SECONDS, CorpusWatcher, default_content_source, open_provider
+from exercise_gen import ExerciseGenerator, can_generate
+from grammar_corpus import DEFAULT_CASES_PER_ITEM, GrammarCategory
+from learner_progress import NO_CHOICE, ItemProgress
+from locale_packs import DEFAULT_LOCALES_DIR, ENGLISH, LocalePacks
+from progress_store import ProgressStore
+from rerun_profiler import phase_stats, start_rerun_profile
+from search_index import SearchIndex, hit_text
+from session_backend import SessionBackend
+from spaced_repetition import ReviewScheduler
+from timed_exam import DEFAULT_EXAM_MINUTES, TimedExam
 
 ##############################################################################
 # PAGE CONFIG - set page title & layout
 ##############################################################################
 st.set_page_config(page_title="Grammar Genius App", layout="wide")
 
-##############################################################################
-# ENUM FOR GRAMMAR CATEGORIES
-##############################################################################
-class GrammarCategory(Enum):
-    TENSES = "Tenses"
-    CONDITIONALS = "Conditionals"
+# Per-phase timings, only when GRAMMAR_PROFILE=1 or ?profile=1
+profiler = start_rerun_profile(st.query_params)
 
 ##############################################################################
-# SESSION STATE + RANDOM MESSAGES
+# SESSION STATE + MOTIVATIONAL MESSAGES
 ##############################################################################
 # Ensure reset_questions is declared before usage
 
 def reset_questions():
     """
-    Clears answers, clears which questions were submitted, resets review mode,
-    and reshuffles motivational messages if they exist.
+    Clears answers and which questions were submitted (by dropping the progress
+    record), unpins the current item and resets review mode and pagination.
     """
-    st.session_state.answers = []
-    st.session_state.submitted_questions = set()
+    st.session_state.progress = None
+    st.session_state.pinned_item = None
     st.session_state.review_mode = False
-    if "randomized_messages" in st.session_state:
-        random.shuffle(st.session_state["randomized_messages"])
+    st.session_state.page_start = None
+    st.session_state.exam_feedback = None
+    st.session_state.timed_exam = None
+    st.session_state.timed_refused = None
+
+# Learners are identified by ?learner=<id>, so a refresh or reconnect keeps it
+if "learner_id" not in st.session_state:
+    learner_id = st.query_params.get("learner")
+    if not learner_id:
+        learner_id = uuid.uuid4().hex
+        st.query_params["learner"] = learner_id
+    st.session_state.learner_id = learner_id
 
 if "selected_category" not in st.session_state:
     st.session_state.selected_category = GrammarCategory.TENSES
@@ -36,434 +60,615 @@ if "selected_category" not in st.session_state:
 if "selected_item_key" not in st.session_state:
     st.session_state.selected_item_key = None
 
-if "answers" not in st.session_state:
-    st.session_state.answers = []
+# ItemProgress for the selected item (created when its exercises are shown)
+if "progress" not in st.session_state:
+    st.session_state.progress = None
 
-if "submitted_questions" not in st.session_state:
-    st.session_state.submitted_questions = set()
+# (category, item_key, set_key, item, fingerprint) the learner is working on;
+# survives corpus reloads. set_key is item_key, or "<item_key>~<seed>" for a
+# generated set; fingerprint is the corpus item's (keys its translations)
+if "pinned_item" not in st.session_state:
+    st.session_state.pinned_item = None
+
+# Seed of the generated set the "New exercise set" button switches to next
+if "next_exercise_seed" not in st.session_state:
+    st.session_state.next_exercise_seed = random.randrange(1 << 31)
 
 if "review_mode" not in st.session_state:
     st.session_state.review_mode = False
 
-if "randomized_messages" not in st.session_state:
-    st.session_state["randomized_messages"] = [
-        "You're on fire! 🔥",
-        "Keep smashing it! 💥",
-        "Fantastic answer! Your words are shining brighter now! 🌟",
-        "You're a grammar wizard! 🧙‍♂️",
-        "Way to go, champ! 🏆",
-        "Bravo! That's the spirit! Your linguistic muscles are flexing! 👏",
-        "Grammar genius at work! Your sentences sparkle like diamonds! 🧠",
-        "Outstanding! The grammar gods are smiling upon you now! 🥳",
-        "You're unstoppable! The universe is taking notes from your syntax! 🚀",
-        "Wonderful! Each answer you give writes poetry in the sky! 🎩✨",
-        "You're dazzling! These sentences are lining up to be in your presence! ✨🌈",
-        "Impressive! Your answers radiate confidence and linguistic flair! 💎💃",
-        "Marvelous! The grammar galaxy bows before your might! 🌌🏅",
-        "Astonishing! Every verb you conjure becomes a masterpiece! 🎉📚",
-        "Magnificent! Even dictionaries blush at your command of words! 🦄📖",
-        "Incredible! Grammarians form fan clubs in your honor! 🎶💫",
-        "Stupendous! Your verb forms could charm the toughest critics! 🍀💬",
-        "Glorious! Your tense usage now inspires entire textbooks! 🦋🔥",
-        "Remarkable! Each reply is like a linguistic symphony in action! 🎼🌍",
-        "Spectacular! Your English prowess bursts forth like cosmic fireworks! 💥🚀🎉"
-    ]
+# Practice window start; None follows the first unanswered exercise
+if "page_start" not in st.session_state:
+    st.session_state.page_start = None
+
+# (set_key, {case index: True/False/None}) from the last "Submit all"
+if "exam_feedback" not in st.session_state:
+    st.session_state.exam_feedback = None
+
+# TimedExam of the set on screen in "Timed exam" mode (None until started), and
+# the exercise whose answer came in after the deadline
+if "timed_exam" not in st.session_state:
+    st.session_state.timed_exam = None
+if "timed_refused" not in st.session_state:
+    st.session_state.timed_refused = None
 
-random.shuffle(st.session_state["randomized_messages"])
+# Adaptive review: the learner's ReviewScheduler, the card on screen and the
+# (card key, answer, correct) of the last graded card
+if "review_scheduler" not in st.session_state:
+    st.session_state.review_scheduler = None
+if "review_card" not in st.session_state:
+    st.session_state.review_card = None
+if "review_feedback" not in st.session_state:
+    st.session_state.review_feedback = None
+
+MOTIVATIONAL_MESSAGES = (
+    "You're on fire! 🔥",
+    "Keep smashing it! 💥",
+    "Fantastic answer! Your words are shining brighter now! 🌟",
+    "You're a grammar wizard! 🧙‍♂️",
+    "Way to go, champ! 🏆",
+    "Bravo! That's the spirit! Your linguistic muscles are flexing! 👏",
+    "Grammar genius at work! Your sentences sparkle like diamonds! 🧠",
+    "Outstanding! The grammar gods are smiling upon you now! 🥳",
+    "You're unstoppable! The universe is taking notes from your syntax! 🚀",
+    "Wonderful! Each answer you give writes poetry in the sky! 🎩✨",
+    "You're dazzling! These sentences are lining up to be in your presence! ✨🌈",
+    "Impressive! Your answers radiate confidence and linguistic flair! 💎💃",
+    "Marvelous! The grammar galaxy bows before your might! 🌌🏅",
+    "Astonishing! Every verb you conjure becomes a masterpiece! 🎉📚",
+    "Magnificent! Even dictionaries blush at your command of words! 🦄📖",
+    "Incredible! Grammarians form fan clubs in your honor! 🎶💫",
+    "Stupendous! Your verb forms could charm the toughest critics! 🍀💬",
+    "Glorious! Your tense usage now inspires entire textbooks! 🦋🔥",
+    "Remarkable! Each reply is like a linguistic symphony in action! 🎼🌍",
+    "Spectacular! Your English prowess bursts forth like cosmic fireworks! 💥🚀🎉",
+)
+
+# The order this session shows the messages in: a permutation seeded by the
+# learner id, drawn once instead of reshuffling the list on every rerun
+if "message_order" not in st.session_state:
+    order = list(range(len(MOTIVATIONAL_MESSAGES)))
+    random.Random(st.session_state.learner_id).shuffle(order)
+    st.session_state.message_order = tuple(order)
+
+def motivational_message(n):
+    """The n-th message of this session (the last one once they run out)."""
+    order = st.session_state.message_order
+    return tr(MOTIVATIONAL_MESSAGES[order[min(n, len(order) - 1)]])
 
 ##############################################################################
-# CUSTOM CSS - Black background, orange headings, dark-blue sidebar
+# STYLING - black background, dark-blue sidebar and white text come from the
+# theme (.streamlit/config.toml) instead of a stylesheet re-sent on every
+# rerun; only the orange headings, which the theme cannot colour, stay here
 ##############################################################################
-st.markdown("""
-<style>
-/* Main page background black, default text white */
-body, [data-testid="stAppViewContainer"], [data-testid="stAppViewBody"] {
-    background-color: #000000 !important;
-    color: #ffffff !important;
-}
+with profiler.phase("css"):
+    st.markdown("<style>h1, h2, h3 {color: #ff5722 !important;}</style>", unsafe_allow_html=True)
 
-/* Dark blue sidebar, white text */
-[data-testid="stSidebar"] {
-    background-color: #013369 !important;
-    color: #ffffff !important;
-}
+##############################################################################
+# CORPUS - built once per process, shared read-only by all sessions
+##############################################################################
+@st.cache_resource
+def load_corpus(content_source, cases_per_item, reload_seconds):
+    """
+    Process-wide content provider; items are fetched lazily on first access.
+    External stores are watched and hot-reloaded in the background.
+    """
+    provider = open_provider(content_source, cases_per_item)
+    if content_source != BUILTIN and reload_seconds > 0:
+        CorpusWatcher(provider, reload_seconds).start()
+    return provider
 
-/* Headings remain orange (#ff5722) */
-h1, h2, h3 {
-    color: #ff5722 !important;
-    font-family: "Trebuchet MS", sans-serif;
-}
+with profiler.phase("corpus"):
+    # GRAMMAR_CONTENT picks the store (builtin, json:<dir>, sqlite:<file>,
+    # snapshot:<file>; default: corpus.snap if compiled, else builtin);
+    # GRAMMAR_CASES_PER_ITEM sizes the synthetic built-in banks (benchmarks);
+    # GRAMMAR_RELOAD_SECONDS is the hot-reload poll interval (0 disables it)
+    corpus = load_corpus(
+        os.environ.get("GRAMMAR_CONTENT") or default_content_source(),
+        int(os.environ.get("GRAMMAR_CASES_PER_ITEM", DEFAULT_CASES_PER_ITEM)),
+        float(os.environ.get("GRAMMAR_RELOAD_SECONDS", DEFAULT_RELOAD_SECONDS)),
+    )
+    tenses_data = corpus.category(GrammarCategory.TENSES)
+    conditionals_data = corpus.category(GrammarCategory.CONDITIONALS)
 
-/* Tweak the main container spacing if needed */
-main > div {
-    padding-top: 20px;
-}
-</style>
-""", unsafe_allow_html=True)
-
-##############################################################################
-# HELPER DATA BUILDERS: 20 Exercises for Tenses & Conditionals
-##############################################################################
-def build_20_exercises_for_tense(tense_name):
-    usage_cases = []
-    for i in range(1, 21):
-        question_type = "multiple_choice"
-        # We'll alternate Affirmative, Negative, Question patterns
-        if i % 3 == 1:
-            question = f"He ________ {tense_name} tasks each week (#{i})."
-            choices = ["does", "do", "doesn't"]
-            correct_choice = "does"
-            explanation = f"For {tense_name}, 'He' often uses 'does' in present contexts."
-        elif i % 3 == 2:
-            question = f"They ________ any {tense_name} exercises (#{i})."
-            choices = ["do not do", "didn't do", "haven't done"]
-            correct_choice = "do not do"
-            explanation = f"In {tense_name}, we might use 'do not do' for a simple negative."
-        else:
-            question = f"________ you apply {tense_name} daily (#{i})?"
-            choices = ["Do", "Will", "Have"]
-            correct_choice = "Do"
-            explanation = f"In {tense_name}, forming questions with 'Do' + subject is standard."
-
-        usage_cases.append({
-            "title": f"Case #{i}",
-            "context": f"Scenario for {tense_name}, example {i}.",
-            "question_type": question_type,
-            "question": question,
-            "choices": choices,
-            "correct_choice": correct_choice,
-            "explanation": explanation
-        })
-    return usage_cases
-
-def build_20_exercises_for_conditional(cond_name):
-    usage_cases = []
-    for i in range(1, 21):
-        question_type = "multiple_choice"
-        if i % 3 == 1:
-            question = f"If you ________ the {cond_name}, you might succeed (#{i})."
-            choices = ["follow", "follows", "following"]
-            correct_choice = "follow"
-            explanation = f"For {cond_name}, 'if' + present simple => main clause can have 'might'."
-        elif i % 3 == 2:
-            question = f"If they didn't hurry, they ________ it in {cond_name} (#{i})."
-            choices = ["wouldn't get", "won't get", "haven't got"]
-            correct_choice = "wouldn't get"
-            explanation = f"{cond_name}: 'wouldn't' + base form for negative hypothetical outcomes."
+##############################################################################
+# LOCALE PACKS - translations loaded on demand, shared by all sessions
+##############################################################################
+@st.cache_resource
+def load_locale_packs(root):
+    """Process-wide LocalePacks, or None when translations are switched off."""
+    return LocalePacks(root) if root else None
+
+# GRAMMAR_LOCALES is the locale packs directory; "" serves English only
+locale_packs = load_locale_packs(os.environ.get("GRAMMAR_LOCALES", DEFAULT_LOCALES_DIR))
+
+def tr(text):
+    """UI text in the learner's language (English when untranslated)."""
+    if locale_packs is None:
+        return text
+    return locale_packs.text(st.session_state.get("locale", ENGLISH), text)
+
+def translator():
+    """tr() bound to the learner's current language, for widget format_func."""
+    if locale_packs is None:
+        return str
+    locale = st.session_state.get("locale", ENGLISH)
+    return lambda text: locale_packs.text(locale, text)
+
+def localize_item(category, item_key, item, fingerprint, cases=True):
+    """A corpus item (or a set generated from it, cases=False) in the learner's language."""
+    if locale_packs is None:
+        return item
+    return locale_packs.localize(st.session_state.get("locale", ENGLISH), category, item_key, item, fingerprint,
+                                 cases)
+
+def remember_locale():
+    """Language picker callback: keeps the choice in ?lang= across refreshes."""
+    st.query_params["lang"] = st.session_state.locale
+
+##############################################################################
+# PROGRESS STORE - submissions persisted by a background writer
+##############################################################################
+@st.cache_resource
+def load_progress_store(path):
+    """Process-wide ProgressStore, or None when persistence is switched off."""
+    return ProgressStore(path) if path else None
+
+# GRAMMAR_PROGRESS_DB="" keeps progress in the session only
+progress_store = load_progress_store(os.environ.get("GRAMMAR_PROGRESS_DB", "progress.db"))
+
+##############################################################################
+# ANSWER ANALYTICS - every graded answer, aggregated across sessions
+##############################################################################
+@st.cache_resource
+def load_answer_analytics(path):
+    """Process-wide aggregator, or None when analytics are switched off."""
+    return AnswerAnalytics(path) if path else None
+
+# GRAMMAR_ANALYTICS_FILE="" switches analytics off
+answer_analytics = load_answer_analytics(os.environ.get("GRAMMAR_ANALYTICS_FILE", "analytics.json"))
+
+# The Analytics view is for staff: set GRAMMAR_ADMIN_KEY and open the app with ?admin=<key>
+ADMIN_KEY = os.environ.get("GRAMMAR_ADMIN_KEY", "")
+
+def is_admin():
+    # Bytes: compare_digest() rejects non-ASCII str
+    return bool(ADMIN_KEY) and hmac.compare_digest(st.query_params.get("admin", "").encode(), ADMIN_KEY.encode())
+
+def record_answer(item_key, i, choice_index, correct, category=None):
+    if answer_analytics is not None:
+        answer_analytics.record(st.session_state.learner_id, category or st.session_state.selected_category,
+                                item_key, i, choice_index, correct)
+
+##############################################################################
+# EXERCISE SETS - fresh sets generated ahead of time on a thread pool
+##############################################################################
+@st.cache_resource
+def load_exercise_generator():
+    """Process-wide generator; its LRU of sets is shared by all sessions."""
+    return ExerciseGenerator()
+
+exercise_generator = load_exercise_generator()
+
+def prefetch_next_set(info):
+    """Starts generating the learner's next set in the background (no-op if done)."""
+    category, item_key = st.session_state.pinned_item[:2]
+    if can_generate(category, info["name"]):
+        exercise_generator.prefetch(category, item_key, info["name"], st.session_state.next_exercise_seed,
+                                    len(info["usage_cases"]), info["formation"])
+
+def switch_to_next_set():
+    """
+    "New exercise set" callback: swaps in the prefetched set if it is ready,
+    so the click never waits on generation.
+    """
+    category, item_key, _, item, fingerprint = st.session_state.pinned_item
+    seed = st.session_state.next_exercise_seed
+    cases = exercise_generator.get(category, item_key, seed)
+    if cases is None:
+        st.toast("Your next exercise set is still being prepared - try again in a moment.")
+        return
+    st.session_state.pinned_item = (category, item_key, f"{item_key}~{seed}", dict(item, usage_cases=cases),
+                                    fingerprint)
+    st.session_state.next_exercise_seed = random.randrange(1 << 31)
+    st.session_state.progress = None
+    st.session_state.review_mode = False
+    st.session_state.page_start = None
+    st.session_state.exam_feedback = None
+    st.session_state.timed_exam = None
+    st.session_state.timed_refused = None
+
+##############################################################################
+# BATCH GRADER - class answer sheets graded off the script thread
+##############################################################################
+@st.cache_resource
+def load_batch_grader():
+    """Process-wide grader; sheets are graded on its thread pool."""
+    return BatchGrader()
+
+batch_grader = load_batch_grader()
+
+##############################################################################
+# SEARCH - inverted index over the corpus, kept in sync incrementally
+##############################################################################
+@st.cache_resource
+def load_search_index(_corpus):
+    """Process-wide index; built on the first search, then only changed items are re-indexed."""
+    return SearchIndex()
+
+search_index = load_search_index(corpus)
+
+def jump_to_hit(location):
+    """Search result callback: opens the hit's item (on the page of its exercise)."""
+    category, item_key, case_index, _, _ = location
+    st.session_state.view = "Practice"
+    st.session_state.category_choice = category.value
+    picker = "tense_choice" if category == GrammarCategory.TENSES else "conditional_choice"
+    st.session_state[picker] = f"{item_key}. {corpus.item_name(category, item_key)}"
+    st.session_state.selected_category = category
+    st.session_state.selected_item_key = item_key
+    reset_questions()
+    if case_index is not None:
+        st.session_state.page_start = case_index // st.session_state.page_size * st.session_state.page_size
+
+def show_search():
+    """Sidebar search box with ranked, clickable results."""
+    query = st.sidebar.text_input(tr("Search exercises:"), key="search_query",
+                                  placeholder='e.g. "umbrella" or "wouldn\'t"')
+    if not query.strip():
+        return
+    search_index.sync(corpus)
+    hits = search_index.search(query)
+    if not hits:
+        st.sidebar.caption(tr("No matches."))
+        return
+    for n, (_, location) in enumerate(hits):
+        category, item_key, case_index, field, _ = location
+        try:
+            name = corpus.item_name(category, item_key)
+            text = hit_text(corpus, location)
+        except (KeyError, IndexError):
+            # Removed by a reload since the last sync
+            continue
+        if case_index is not None:
+            label = f"{name} · {corpus.item(category, item_key)['usage_cases'][case_index]['title']}"
         else:
-            question = f"________ you handle {cond_name} conditions if needed (#{i})?"
-            choices = ["Would", "Do", "Are"]
-            correct_choice = "Would"
-            explanation = f"In {cond_name}, 'Would you ...?' is typical for hypothetical questions."
-
-        usage_cases.append({
-            "title": f"Case #{i}",
-            "context": f"Real-life scenario for {cond_name}, example {i}",
-            "question_type": question_type,
-            "question": question,
-            "choices": choices,
-            "correct_choice": correct_choice,
-            "explanation": explanation
-        })
-    return usage_cases
-
-##############################################################################
-# TENSES DATA (7 Tenses) with 20 usage cases each
-##############################################################################
-tenses_data = {
-    "1": {
-        "name": "Present Simple",
-        "formation": {
-            "Positive": "Subject + base form",
-            "Negative": "Subject + do/does + not + base form",
-            "Question": "Do/Does + subject + base form?",
-            "Short answer": "Yes, I do / No, I don't"
-        },
-        "usage_explanation": [
-            "General truths, habits, and routines."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Present Simple"),
-        "extra_examples": [
-            "I play tennis on Sundays.",
-            "He doesn't eat seafood."
-        ]
-    },
-    "2": {
-        "name": "Past Simple",
-        "formation": {
-            "Positive": "Subject + past form",
-            "Negative": "Subject + did not + base form",
-            "Question": "Did + subject + base form?",
-            "Short answer": "Yes, I did / No, I didn't"
-        },
-        "usage_explanation": [
-            "Actions completed at a specific time in the past."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Past Simple"),
-        "extra_examples": [
-            "I visited Rome last year.",
-            "They didn't like the movie."
-        ]
-    },
-    "3": {
-        "name": "Present Continuous",
-        "formation": {
-            "Positive": "Subject + am/is/are + verb-ing",
-            "Negative": "Subject + am/is/are + not + verb-ing",
-            "Question": "Am/Is/Are + subject + verb-ing?",
-            "Short answer": "Yes, I am / No, I'm not"
-        },
-        "usage_explanation": [
-            "Actions happening right now, temporary situations."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Present Continuous"),
-        "extra_examples": [
-            "I am learning Spanish at the moment.",
-            "She isn't working this week."
-        ]
-    },
-    "4": {
-        "name": "Past Continuous",
-        "formation": {
-            "Positive": "Subject + was/were + verb-ing",
-            "Negative": "Subject + was/were + not + verb-ing",
-            "Question": "Was/Were + subject + verb-ing?",
-            "Short answer": "Yes, I was / No, I wasn't"
-        },
-        "usage_explanation": [
-            "Actions in progress at a moment in the past, or interrupted actions."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Past Continuous"),
-        "extra_examples": [
-            "I was driving when you called.",
-            "They weren't sleeping at midnight."
-        ]
-    },
-    "5": {
-        "name": "Present Perfect",
-        "formation": {
-            "Positive": "Subject + have/has + past participle",
-            "Negative": "Subject + have/has + not + past participle",
-            "Question": "Have/Has + subject + past participle?",
-            "Short answer": "Yes, I have / No, I haven't"
-        },
-        "usage_explanation": [
-            "Actions from the past that affect the present or have no specified time."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Present Perfect"),
-        "extra_examples": [
-            "I have seen that film twice.",
-            "She hasn't finished her project yet."
-        ]
-    },
-    "6": {
-        "name": "Future Simple",
-        "formation": {
-            "Positive": "Subject + will + base form",
-            "Negative": "Subject + will + not + base form",
-            "Question": "Will + subject + base form?",
-            "Short answer": "Yes, I will / No, I won't"
-        },
-        "usage_explanation": [
-            "Spontaneous decisions, predictions, offers, promises."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Future Simple"),
-        "extra_examples": [
-            "We will travel next month.",
-            "He won't agree to that idea."
-        ]
-    },
-    "7": {
-        "name": "Future Continuous",
-        "formation": {
-            "Positive": "Subject + will be + verb-ing",
-            "Negative": "Subject + will + not + be + verb-ing",
-            "Question": "Will + subject + be + verb-ing?",
-            "Short answer": "Yes, I will / No, I won't"
-        },
-        "usage_explanation": [
-            "Actions that will be ongoing at a certain time in the future."
-        ],
-        "usage_cases": build_20_exercises_for_tense("Future Continuous"),
-        "extra_examples": [
-            "I will be waiting for you at noon.",
-            "They won't be working on Sunday."
-        ]
-    }
-}
+            label = f"{name} · {field.replace('_', ' ')}"
+        st.sidebar.button(label, key=f"search_hit_{n}", on_click=jump_to_hit, args=(location,))
+        st.sidebar.caption(text)
 
 ##############################################################################
-# 5 CONDITIONALS: Zero, First, Second, Third, Mixed (each 20 usage cases)
-##############################################################################
-conditionals_data = {
-    "0": {
-        "name": "Zero Conditional",
-        "formation": {
-            "Positive": "If + present simple, present simple",
-            "Negative": "If + present simple, present simple (negative)",
-            "Question": "Do/Does + subject + base form?",
-            "Short answer": "N/A"
-        },
-        "usage_explanation": [
-            "Facts always true under certain conditions.",
-            "General truths or cause-and-effect."
-        ],
-        "usage_cases": build_20_exercises_for_conditional("Zero Conditional"),
-        "extra_examples": [
-            "If you heat water, it boils.",
-            "If you leave ice in the sun, it melts."
-        ]
-    },
-    "1": {
-        "name": "First Conditional",
-        "formation": {
-            "Positive": "If + present simple, will + base form",
-            "Negative": "If + present simple, will + not + base form",
-            "Question": "Will + subject + base form?",
-            "Short answer": "Yes, I will / No, I won't"
-        },
-        "usage_explanation": [
-            "Real or likely future situations.",
-            "Cause-effect in the future."
-        ],
-        "usage_cases": build_20_exercises_for_conditional("First Conditional"),
-        "extra_examples": [
-            "If it rains, I'll take an umbrella.",
-            "If we don't hurry, we'll miss the bus."
-        ]
-    },
-    "2": {
-        "name": "Second Conditional",
-        "formation": {
-            "Positive": "If + past simple, would + base form",
-            "Negative": "If + past simple, would + not + base form",
-            "Question": "Would + subject + base form?",
-            "Short answer": "Yes, I would / No, I wouldn't"
-        },
-        "usage_explanation": [
-            "Unreal/imaginary situations in the present/future.",
-            "Hypothetical or unlikely scenarios."
-        ],
-        "usage_cases": build_20_exercises_for_conditional("Second Conditional"),
-        "extra_examples": [
-            "If I had a car, I would drive to the beach.",
-            "She would help if she were here."
-        ]
-    },
-    "3": {
-        "name": "Third Conditional",
-        "formation": {
-            "Positive": "If + past perfect, would + have + past participle",
-            "Negative": "If + past perfect, would + not + have + past participle",
-            "Question": "Would + subject + have + past participle?",
-            "Short answer": "Yes, I would've / No, I wouldn't have"
-        },
-        "usage_explanation": [
-            "Past situations that didn't happen, imagining different outcomes."
-        ],
-        "usage_cases": build_20_exercises_for_conditional("Third Conditional"),
-        "extra_examples": [
-            "If I had known, I would've arrived earlier.",
-            "We wouldn't have missed the show if we had left on time."
-        ]
-    },
-    "4": {
-        "name": "Mixed Conditional",
-        "formation": {
-            "Positive": "If + past perfect, would + base form",
-            "Negative": "If + past perfect, would + not + base form",
-            "Question": "Would + subject + base form? (if-clause in past perfect)",
-            "Short answer": "Yes, I would / No, I wouldn't"
-        },
-        "usage_explanation": [
-            "Combines a past hypothetical with a present/future result."
-        ],
-        "usage_cases": build_20_exercises_for_conditional("Mixed Conditional"),
-        "extra_examples": [
-            "If I had studied medicine, I'd be a doctor now.",
-            "If he had left on time, he wouldn't be stuck in traffic right now."
-        ]
+# SHARED SESSION STATE - progress fields shared by every worker process
+##############################################################################
+@st.cache_resource
+def load_session_backend(path):
+    """Process-wide SessionBackend, or None when session state stays in this worker."""
+    return SessionBackend(path) if path else None
+
+# GRAMMAR_SESSION_DB="" keeps session state in the worker the learner is on
+session_backend = load_session_backend(os.environ.get("GRAMMAR_SESSION_DB", "sessions.db"))
+
+# Version of the learner's shared row this session last loaded or saved, and
+# the (fields, progress) it held
+if "shared_version" not in st.session_state:
+    st.session_state.shared_version = None
+if "shared_saved" not in st.session_state:
+    st.session_state.shared_saved = None
+
+def _shared_fields():
+    """(fields, progress bytes) of the session as the backend stores them."""
+    category = st.session_state.selected_category
+    item_key = st.session_state.selected_item_key
+    pinned = st.session_state.pinned_item
+    set_key = pinned[2] if pinned is not None and pinned[:2] == (category, item_key) else None
+    progress = st.session_state.progress
+    if progress is None or set_key is None or not progress.belongs_to(category, set_key):
+        progress = None
+    fields = {
+        "category": category.value,
+        "item_key": item_key,
+        "set_key": set_key,
+        "total": progress.total if progress is not None else None,
+        "review_mode": st.session_state.review_mode,
+        "page_start": st.session_state.page_start,
     }
-}
+    return fields, progress.to_bytes() if progress is not None else None
+
+def save_shared_state():
+    """Stores the session's progress fields if they changed since the last load or save."""
+    if session_backend is None:
+        return
+    fields, progress = _shared_fields()
+    if st.session_state.shared_saved == (fields, progress):
+        return
+    shared = session_backend.save(st.session_state.learner_id, fields, progress, st.session_state.shared_version)
+    st.session_state.shared_version = shared.version
+    st.session_state.shared_saved = (shared.fields, shared.progress)
+    if shared.progress != progress:
+        # Submissions saved meanwhile by another worker or tab were merged in
+        st.session_state.progress = ItemProgress.from_bytes(
+            st.session_state.selected_category, fields["set_key"], fields["total"], shared.progress)
+
+def _restore_pinned_item(category, item_key, set_key):
+    """pinned_item for a stored set key; a generated set is rebuilt from its seed."""
+    item, fingerprint = corpus.item_with_fingerprint(category, item_key)
+    if set_key == item_key:
+        return (category, item_key, set_key, item, fingerprint)
+    seed = int(set_key.split("~", 1)[1])
+    cases = exercise_generator.generate(category, item_key, item["name"], seed, len(item["usage_cases"]),
+                                        item["formation"])
+    return (category, item_key, set_key, dict(item, usage_cases=cases), fingerprint)
+
+def restore_shared_state():
+    """
+    Adopts the learner's stored progress fields when they are newer than what
+    this session has seen: the learner arrived from another worker, or used
+    another tab in between.
+    """
+    if session_backend is None:
+        return
+    shared = session_backend.load(st.session_state.learner_id)
+    if shared is None or shared.version == st.session_state.shared_version:
+        return
+    fields = shared.fields
+    category = GrammarCategory(fields["category"])
+    item_key, pinned, progress = fields["item_key"], None, None
+    if item_key is not None:
+        try:
+            option = f"{item_key}. {corpus.item_name(category, item_key)}"
+            if fields["set_key"] is not None:
+                pinned = _restore_pinned_item(category, item_key, fields["set_key"])
+        except (KeyError, ValueError):
+            # Removed by a corpus reload since it was saved
+            item_key = None
+    if pinned is not None and shared.progress is not None and fields["total"] == len(pinned[3]["usage_cases"]):
+        progress = ItemProgress.from_bytes(category, fields["set_key"], fields["total"], shared.progress)
+
+    # The sidebar widgets follow the restored selection
+    st.session_state.category_choice = category.value
+    picker = "tense_choice" if category == GrammarCategory.TENSES else "conditional_choice"
+    if item_key is not None:
+        st.session_state[picker] = option
+    else:
+        st.session_state.pop(picker, None)
+    st.session_state.selected_category = category
+    st.session_state.selected_item_key = item_key
+    st.session_state.pinned_item = pinned
+    st.session_state.progress = progress
+    st.session_state.review_mode = fields["review_mode"] and item_key is not None
+    st.session_state.page_start = fields["page_start"]
+    st.session_state.exam_feedback = None
+    st.session_state.shared_version = shared.version
+    st.session_state.shared_saved = (fields, shared.progress)
+
+with profiler.phase("restore_state"):
+    restore_shared_state()
 
 ##############################################################################
 # HELPER: get_current_data()
 ##############################################################################
 def get_current_data():
-    """Returns (data_dict, item_key) for whichever Tense/Conditional is chosen."""
-    if st.session_state.selected_category == GrammarCategory.TENSES:
-        if st.session_state.selected_item_key:
-            return tenses_data, st.session_state.selected_item_key
-        else:
-            return None, None
-    else:
-        if st.session_state.selected_item_key:
-            return conditionals_data, st.session_state.selected_item_key
-        else:
-            return None, None
+    """
+    Returns (data_dict, set_key) for whichever Tense/Conditional is chosen,
+    in the learner's language. The English item is pinned in the session, so
+    a corpus reload only reaches the learner once they pick another item.
+    """
+    item_key = st.session_state.selected_item_key
+    if not item_key:
+        return None, None
+    category = st.session_state.selected_category
+    pinned = st.session_state.pinned_item
+    if pinned is None or pinned[:2] != (category, item_key):
+        pinned = (category, item_key, item_key, *corpus.item_with_fingerprint(category, item_key))
+        st.session_state.pinned_item = pinned
+    category, item_key, set_key, item, fingerprint = pinned
+    return {set_key: localize_item(category, item_key, item, fingerprint, cases=set_key == item_key)}, set_key
 
 ##############################################################################
 # SIDEBAR CODE
 ##############################################################################
-st.sidebar.title("Grammar Categories")
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100]
+VIEWS = ["Practice", "Adaptive review", "Teacher grading", "Analytics"]
+ANSWER_MODES = ["One at a time", "Submit all", "Timed exam"]
 
-cat_choice = st.sidebar.radio("Select a category:", [GrammarCategory.TENSES.value, GrammarCategory.CONDITIONALS.value])
-if cat_choice == GrammarCategory.TENSES.value:
-    st.session_state.selected_category = GrammarCategory.TENSES
-else:
-    st.session_state.selected_category = GrammarCategory.CONDITIONALS
-
-if st.session_state.selected_category == GrammarCategory.TENSES:
-    st.sidebar.subheader("Select a Tense")
-    tense_opts = ["Select a tense..."] + [f"{k}. {tenses_data[k]['name']}" for k in tenses_data]
-    chosen_tense = st.sidebar.selectbox("Choose a tense:", tense_opts)
-    if chosen_tense != "Select a tense...":
-        key_str = chosen_tense.split('.')[0].strip()
-        if key_str != st.session_state.selected_item_key:
-            st.session_state.selected_item_key = key_str
-            reset_questions()
+def show_language_picker():
+    """Language of the explanations and UI; only shown when locale packs exist."""
+    locales = locale_packs.locales() if locale_packs is not None else (ENGLISH,)
+    if len(locales) < 2:
+        return
+    lang = st.query_params.get("lang")
+    st.sidebar.selectbox("🌐", locales, index=locales.index(lang) if lang in locales else 0, key="locale",
+                         format_func=locale_packs.language_name, on_change=remember_locale,
+                         label_visibility="collapsed")
+
+def show_sidebar():
+    """Language, mode, category/item pickers and display settings."""
+    show_language_picker()
+    option_text = translator()
+    views = VIEWS if is_admin() else VIEWS[:-1]
+    if st.session_state.get("view") not in views:
+        st.session_state.view = views[0]
+    st.sidebar.radio(tr("Mode:"), views, key="view", horizontal=True, format_func=option_text)
+    st.sidebar.title(tr("Grammar Categories"))
+
+    cat_choice = st.sidebar.radio(tr("Select a category:"), [GrammarCategory.TENSES.value, GrammarCategory.CONDITIONALS.value],
+                                  key="category_choice", format_func=option_text)
+    if cat_choice == GrammarCategory.TENSES.value:
+        st.session_state.selected_category = GrammarCategory.TENSES
     else:
-        st.session_state.selected_item_key = None
-        reset_questions()
-else:
-    st.sidebar.subheader("Select a Conditional")
-    cond_opts = ["Select a conditional..."] + [f"{k}. {conditionals_data[k]['name']}" for k in conditionals_data]
-    chosen_cond = st.sidebar.selectbox("Choose a conditional:", cond_opts)
-    if chosen_cond != "Select a conditional...":
-        key_str = chosen_cond.split('.')[0].strip()
-        if key_str != st.session_state.selected_item_key:
-            st.session_state.selected_item_key = key_str
+        st.session_state.selected_category = GrammarCategory.CONDITIONALS
+
+    if st.session_state.selected_category == GrammarCategory.TENSES:
+        st.sidebar.subheader(tr("Select a Tense"))
+        tense_opts = [tr("Select a tense...")] + [f"{k}. {tenses_data.name(k)}" for k in tenses_data]
+        chosen_tense = st.sidebar.selectbox(tr("Choose a tense:"), tense_opts, key="tense_choice")
+        if chosen_tense != tense_opts[0]:
+            key_str = chosen_tense.split('.')[0].strip()
+            if key_str != st.session_state.selected_item_key:
+                st.session_state.selected_item_key = key_str
+                reset_questions()
+        else:
+            st.session_state.selected_item_key = None
             reset_questions()
     else:
-        st.session_state.selected_item_key = None
-        reset_questions()
+        st.sidebar.subheader(tr("Select a Conditional"))
+        cond_opts = [tr("Select a conditional...")] + [f"{k}. {conditionals_data.name(k)}" for k in conditionals_data]
+        chosen_cond = st.sidebar.selectbox(tr("Choose a conditional:"), cond_opts, key="conditional_choice")
+        if chosen_cond != cond_opts[0]:
+            key_str = chosen_cond.split('.')[0].strip()
+            if key_str != st.session_state.selected_item_key:
+                st.session_state.selected_item_key = key_str
+                reset_questions()
+        else:
+            st.session_state.selected_item_key = None
+            reset_questions()
+
+    show_search()
+
+    st.sidebar.subheader(tr("Display"))
+    st.sidebar.selectbox(tr("Exercises per page:"), PAGE_SIZE_OPTIONS, index=1, key="page_size")
+    st.sidebar.radio(tr("Answer mode:"), ANSWER_MODES, key="answer_mode", format_func=option_text,
+                     help=tr("'Submit all' grades every exercise on the page in one go; "
+                             "'Timed exam' grades all open exercises when time runs out."))
+    if st.session_state.answer_mode == "Timed exam":
+        # GRAMMAR_EXAM_MINUTES sets the default exam length
+        st.sidebar.number_input(tr("Minutes per exam:"), min_value=0.5, max_value=120.0, step=0.5, key="exam_minutes",
+                                value=float(os.environ.get("GRAMMAR_EXAM_MINUTES", DEFAULT_EXAM_MINUTES)))
+
+with profiler.phase("sidebar"):
+    show_sidebar()
+
+##############################################################################
+# PROGRESS HELPERS
+##############################################################################
+def get_progress(item_key, total_questions):
+    """
+    The session's ItemProgress for item_key, created on first use from the
+    learner's stored submissions (if progress is persisted).
+    """
+    progress = st.session_state.progress
+    category = st.session_state.selected_category
+    if progress is None or not progress.belongs_to(category, item_key):
+        if progress_store is not None:
+            progress = progress_store.load(st.session_state.learner_id, category, item_key, total_questions)
+        else:
+            progress = ItemProgress(category, item_key, total_questions)
+        st.session_state.progress = progress
+    return progress
+
+def case_markup(case):
+    """Title, context and question of an exercise as one markdown element."""
+    parts = [f"**{case['title']}**"]
+    if "context" in case:
+        parts.append(f"Context: {case['context']}")
+    parts.append(case["question"])
+    return "\n\n".join(parts)
+
+def answer_text(case, choice_index):
+    """The option text for a recorded choice index ("" if none)."""
+    if choice_index == NO_CHOICE:
+        return ""
+    return case["choices"][choice_index]
+
+##############################################################################
+# PAGINATION - only a window of exercises is rendered per rerun
+##############################################################################
+def _set_state(state_key, value):
+    st.session_state[state_key] = value
+
+def show_pager(state_key, start, total, page_size, label="exercises"):
+    """Previous/next controls for the window [start, start + page_size)."""
+    if total <= page_size:
+        return
+    end = min(start + page_size, total)
+    colPrev, colInfo, colNext = st.columns([1, 3, 1])
+    colPrev.button("◀ Previous", key=f"{state_key}_prev", disabled=start == 0,
+                   on_click=_set_state, args=(state_key, max(0, start - page_size)))
+    colInfo.caption(f"Showing {label} {start + 1}–{end} of {total}")
+    colNext.button("Next ▶", key=f"{state_key}_next", disabled=end >= total,
+                   on_click=_set_state, args=(state_key, end))
+
+def show_answered_summary(progress, cases):
+    """One compact element for already-submitted cards: [(index, case), ...]."""
+    if not cases:
+        return
+    lines = [
+        f"- ✅ **{case['title']}**: {answer_text(case, progress.choice(i))}"
+        for i, case in cases
+    ]
+    st.markdown("\n".join(lines))
 
 ##############################################################################
 # SCREENS
 ##############################################################################
+WELCOME_TEXT = """
+Get ready to boost your English grammar skills in a fun and interactive way!
+
+1. Use the sidebar to choose Tenses or Conditionals.
+2. Select which Tense/Conditional you want to practice.
+3. Each item has 20 multiple-choice exercises, including negative & question forms.
+   Click 'New exercise set' whenever you want a fresh, different set.
+4. Answer them all to unlock a special 'Expert!' badge!
+5. You can also review your answers afterward.
+"""
+
 def show_welcome():
-    st.title("Welcome to the Grammar Genius Game! 🎉✨🎮")
-    st.write("""
-    Get ready to boost your English grammar skills in a fun and interactive way!
-    
-    1. Use the sidebar to choose Tenses or Conditionals.
-    2. Select which Tense/Conditional you want to practice.
-    3. Each item has 20 multiple-choice exercises, including negative & question forms.
-    4. Answer them all to unlock a special 'Expert!' badge!
-    5. You can also review your answers afterward.
-    """)
+    st.title(tr("Welcome to the Grammar Genius Game! 🎉✨🎮"))
+    st.write(tr(WELCOME_TEXT))
+
+def review_table(usage_cases, progress):
+    """
+    One row per exercise, built column by column: the learner's first answer
+    (the first wrong one if they missed it), the correct answer, whether the
+    first answer was right, and the explanation.
+    """
+    first_answers, right = [], []
+    for i, case in enumerate(usage_cases):
+        missed = progress.missed_choice(i)
+        first_answers.append(answer_text(case, missed if missed != NO_CHOICE else progress.choice(i)))
+        right.append(missed == NO_CHOICE and progress.is_submitted(i))
+    return pd.DataFrame({
+        "Exercise": [case["title"] for case in usage_cases],
+        "Question": [case["question"] for case in usage_cases],
+        "Your answer": first_answers,
+        "Correct answer": [case["correct_choice"] for case in usage_cases],
+        "Right first time": right,
+        "Explanation": [case.get("explanation", "") for case in usage_cases],
+    })
 
 def show_review(data_dict, item_key):
+    """Every exercise of the item as one sortable, searchable table."""
     st.header("Review Your Answers")
     usage_cases = data_dict[item_key]["usage_cases"]
-    for i, case in enumerate(usage_cases):
-        st.write(f"**{case['title']}**")
-        if "question" in case:
-            st.write(f"Question: {case['question']}")
-        user_answer = st.session_state.get(f"answer_{item_key}_{i}", "")
-        st.write(f"Your answer: {user_answer} 🏆")
+    progress = get_progress(item_key, len(usage_cases))
+    table = review_table(usage_cases, progress)
+    mistakes = len(table) - int(table["Right first time"].sum())
+    st.caption(f"{len(table) - mistakes} of {len(table)} right at the first try, {mistakes} missed. "
+               "Click a column header to sort; search the table from its toolbar.")
+    if st.toggle("Show only mistakes", key="review_mistakes_only"):
+        table = table[~table["Right first time"]]
+    st.dataframe(table, hide_index=True, column_config={
+        "Question": st.column_config.TextColumn(width="large"),
+        "Right first time": st.column_config.CheckboxColumn(),
+        "Explanation": st.column_config.TextColumn(width="large"),
+    })
     st.write("Great job! Feel free to pick another item from the sidebar if you wish.")
 
+@st.cache_data(max_entries=512, show_spinner=False)
+def theory_markup(name, formation, usage_explanation, extra_examples, headings):
+    """
+    (theory, examples) markdown of an item: its name, formation rules and
+    usage as one element, built once per item and language rather than
+    as a dozen elements on every rerun.
+    """
+    formed, used = headings
+    theory = "\n\n".join(
+        [f"## {name}", f"### {formed}"]
+        + [f"**{form_type}:** {form_rule}" for form_type, form_rule in formation]
+        + [f"### {used}", "\n".join("- " + usage for usage in usage_explanation)]
+    )
+    return theory, "\n".join("- " + ex for ex in extra_examples)
+
 def show_explanation_and_questions():
     data_dict, item_key = get_current_data()
     if not data_dict or not item_key:
@@ -471,35 +676,33 @@ def show_explanation_and_questions():
 
     info = data_dict[item_key]
 
-    st.header(info["name"])
-    st.subheader("How is it formed?")
-    for form_type, form_rule in info["formation"].items():
-        st.markdown(f"**{form_type}:** {form_rule}")
-
-    st.subheader("When do we use it?")
-    for usage in info["usage_explanation"]:
-        st.write("- " + usage)
-
-    with st.expander("More Examples"):
-        if "extra_examples" in info:
-            for ex in info["extra_examples"]:
-                st.write("- " + ex)
+    theory, examples = theory_markup(info["name"], tuple(info["formation"].items()),
+                                     tuple(info["usage_explanation"]), tuple(info.get("extra_examples", ())),
+                                     (tr("How is it formed?"), tr("When do we use it?")))
+    st.markdown(theory)
+    with st.expander(tr("More Examples")):
+        if examples:
+            st.markdown(examples)
 
     usage_cases = info["usage_cases"]
     total_questions = len(usage_cases)
-    answered_count = len(st.session_state.answers)
+    progress = get_progress(item_key, total_questions)
+    exam = st.session_state.timed_exam
+    if exam is not None and exam.set_key == item_key and not exam.is_graded() and exam.expired():
+        # Time ran out while the clock was not on screen: grade before showing progress
+        finish_timed_exam(item_key, usage_cases)
+    answered_count = progress.answered_count
 
     if st.session_state.review_mode:
-        show_review(data_dict, item_key)
+        with profiler.phase("show_review"):
+            show_review(data_dict, item_key)
         return
 
     st.write("### Practice Exercises")
-    colA, colB = st.columns(2)
-    colA.metric("Exercises Answered", f"{answered_count}")
-    colB.metric("Total Exercises", f"{total_questions}")
-
-    progress_val = int((answered_count / total_questions) * 100)
-    st.progress(progress_val)
+    if can_generate(st.session_state.selected_category, info["name"]):
+        prefetch_next_set(info)
+        st.button("🎲 New exercise set", on_click=switch_to_next_set)
+    show_progress(total_questions)
 
     # If all answered, user gets a badge
     if answered_count == total_questions:
@@ -509,70 +712,595 @@ def show_explanation_and_questions():
             st.session_state.review_mode = True
         return
 
-    # Display each usage case
-    for i, case in enumerate(usage_cases):
-        answer_key = f"answer_{item_key}_{i}"
-        submit_key = f"submit_{item_key}_{i}"
-
-        # If already answered
-        if submit_key in st.session_state.submitted_questions:
-            st.write(f"**{case['title']}**")
-            if "context" in case:
-                st.write(f"Context: {case['context']}")
-            st.write(case["question"])
-            user_answer = st.session_state.get(answer_key, "")
-            st.write(f"Your answer: {user_answer}")
+    # Only a window of the bank is rendered: by default the page holding the
+    # first unanswered exercise, unless the learner paged elsewhere.
+    page_size = st.session_state.page_size
+    start = st.session_state.page_start
+    if start is None:
+        start = progress.first_unanswered() // page_size * page_size
+    start = min(start, total_questions - 1)
+    end = min(start + page_size, total_questions)
+
+    if total_questions > page_size:
+        colPager, colJump = st.columns([4, 1])
+        with colPager:
+            show_pager("page_start", start, total_questions, page_size)
+        colJump.button("Jump to first unanswered", on_click=_set_state, args=("page_start", None))
+
+    if st.session_state.answer_mode == "Submit all":
+        show_exam_form(item_key, usage_cases, progress, start, end)
+        return
+    if st.session_state.answer_mode == "Timed exam":
+        show_timed_exam(item_key, usage_cases, progress, start, end)
+        return
+
+    # Submitted cards in the window collapse into one summary; each open
+    # exercise is its own fragment
+    answered_in_window = []
+    for i in range(start, end):
+        case = usage_cases[i]
+        if progress.is_submitted(i):
+            answered_in_window.append((i, case))
             continue
+        show_answered_summary(progress, answered_in_window)
+        answered_in_window = []
+        card_key = f"card_{item_key}_{i}"
+        st.fragment(exercise_card, key=card_key)(item_key, i, case)
+    show_answered_summary(progress, answered_in_window)
 
-        st.write(f"**{case['title']}**")
-        if "context" in case:
-            st.write(f"Context: {case['context']}")
-        st.write(case["question"])
+@st.fragment(key="progress")
+def show_progress(total_questions):
+    """Answered/total metrics; reruns on its own after each Submit."""
+    answered_count = st.session_state.progress.answered_count
+    colA, colB = st.columns(2)
+    colA.metric("Exercises Answered", f"{answered_count}")
+    colB.metric("Total Exercises", f"{total_questions}")
 
-        choices = case.get("choices", [])
-        correct_choice = case.get("correct_choice", "")
-        explanation = case.get("explanation", "")
+    progress_val = int((answered_count / total_questions) * 100)
+    st.progress(progress_val)
 
-        st.session_state.setdefault(answer_key, "")
-        user_answer = st.selectbox("Select your answer:", ["-- Select --"] + choices, key=answer_key)
+def _rerun_card_and_progress(card_key):
+    """Submit callback: rerun only the clicked card, then the progress block."""
+    st.rerun([card_key, "progress"])
 
-        if st.button("Submit", key=submit_key):
-            st.session_state.answers.append(user_answer)
-            st.session_state.submitted_questions.add(submit_key)
+def exercise_card(item_key, i, case):
+    """
+    One exercise (selectbox + Submit). Rendered as a keyed fragment, so grading
+    an answer reruns and re-sends this card only instead of the whole page.
+    """
+    answer_key = f"answer_{item_key}_{i}"
+    submit_key = f"submit_{item_key}_{i}"
+    card_key = f"card_{item_key}_{i}"
+    progress = st.session_state.progress
 
-            # Determine motivational message
-            msg_index = len(st.session_state.answers) - 1
-            if msg_index < len(st.session_state["randomized_messages"]):
-                msg = st.session_state["randomized_messages"][msg_index]
-            else:
-                msg = st.session_state["randomized_messages"][-1]
-
-            if user_answer == "-- Select --":
-                st.warning("You haven't selected an option yet.")
-                st.session_state.answers.pop()
-                st.session_state.submitted_questions.discard(submit_key)
-                st.stop()
-            elif user_answer == correct_choice:
-                st.success("Correct! " + msg)
-                if explanation:
-                    st.info(f"Explanation: {explanation}")
-            else:
+    # If already answered
+    if progress.is_submitted(i):
+        st.markdown(f"{case_markup(case)}\n\nYour answer: {answer_text(case, progress.choice(i))}")
+        return
+
+    st.markdown(case_markup(case))
+
+    choices = list(case.get("choices", ()))
+    correct_choice = case.get("correct_choice", "")
+    explanation = case.get("explanation", "")
+
+    user_answer = st.selectbox("Select your answer:", ["-- Select --"] + choices, key=answer_key)
+
+    if st.button("Submit", key=submit_key, on_click=_rerun_card_and_progress, args=(card_key,)):
+        # Determine motivational message
+        msg = motivational_message(progress.answered_count)
+
+        if user_answer == "-- Select --":
+            st.warning("You haven't selected an option yet.")
+            st.stop()
+        elif user_answer == correct_choice:
+            choice_index = choices.index(user_answer)
+            progress.submit(i, choice_index)
+            if progress_store is not None:
+                progress_store.record(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+            record_answer(item_key, i, choice_index, True)
+            save_shared_state()
+            st.success("Correct! " + msg)
+            if explanation:
+                st.info(f"Explanation: {explanation}")
+        else:
+            choice_index = choices.index(user_answer)
+            progress.miss(i, choice_index)
+            if progress_store is not None:
+                progress_store.record_miss(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+            record_answer(item_key, i, choice_index, False)
+            save_shared_state()
+            st.warning("Incorrect. Try again?")
+            st.stop()
+
+        st.write(f"Your answer: {user_answer}")
+
+        # Last exercise done: full rerun so the badge replaces the cards
+        if progress.is_complete():
+            st.rerun()
+
+##############################################################################
+# SUBMIT ALL - one form, graded in a single rerun
+##############################################################################
+def grade_exam(item_key, usage_cases, indices):
+    """
+    "Submit all" callback: grades every open exercise of the page at once and
+    records the correct ones in bulk before the (single) rerun.
+    """
+    progress = st.session_state.progress
+    feedback = {}
+    for i in indices:
+        case = usage_cases[i]
+        user_answer = st.session_state.get(f"exam_{item_key}_{i}", "-- Select --")
+        if user_answer == "-- Select --":
+            feedback[i] = None
+        elif user_answer == case["correct_choice"]:
+            choice_index = list(case["choices"]).index(user_answer)
+            progress.submit(i, choice_index)
+            if progress_store is not None:
+                progress_store.record(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+            record_answer(item_key, i, choice_index, True)
+            feedback[i] = True
+        else:
+            choice_index = list(case["choices"]).index(user_answer)
+            progress.miss(i, choice_index)
+            if progress_store is not None:
+                progress_store.record_miss(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+            record_answer(item_key, i, choice_index, False)
+            feedback[i] = False
+    st.session_state.exam_feedback = (item_key, feedback)
+    # Stay on this page so the feedback is visible
+    st.session_state.page_start = indices[0] // st.session_state.page_size * st.session_state.page_size
+
+def show_exam_form(item_key, usage_cases, progress, start, end):
+    """The page's open exercises as one form with a single "Submit all" button."""
+    feedback = {}
+    if st.session_state.exam_feedback is not None and st.session_state.exam_feedback[0] == item_key:
+        feedback = st.session_state.exam_feedback[1]
+    # Exercises left blank (None) are not graded: one note instead of a warning each
+    attempted = sum(1 for result in feedback.values() if result is not None)
+    blank = len(feedback) - attempted
+    if attempted:
+        right = sum(1 for result in feedback.values() if result)
+        if right:
+            st.success(f"{right} of {attempted} correct! "
+                       + motivational_message(progress.answered_count - 1))
+        else:
+            st.warning(f"0 of {attempted} correct. Try again?")
+    if blank:
+        st.info(f"{blank} exercise{'s' if blank > 1 else ''} left blank - choose an option to have "
+                f"{'them' if blank > 1 else 'it'} graded.")
+
+    # Answers graded by the last "Submit all" keep their explanation on screen
+    for i in range(start, end):
+        if feedback.get(i):
+            case = usage_cases[i]
+            st.write(f"✅ **{case['title']}**: {answer_text(case, progress.choice(i))}")
+            if case.get("explanation"):
+                st.info(f"Explanation: {case['explanation']}")
+    show_answered_summary(progress, [(i, usage_cases[i]) for i in range(start, end)
+                                     if progress.is_submitted(i) and not feedback.get(i)])
+
+    open_indices = [i for i in range(start, end) if not progress.is_submitted(i)]
+    if not open_indices:
+        return
+    with st.form(f"exam_form_{item_key}_{start}"):
+        for i in open_indices:
+            case = usage_cases[i]
+            st.markdown(case_markup(case))
+            st.selectbox("Select your answer:", ["-- Select --"] + list(case.get("choices", ())),
+                         key=f"exam_{item_key}_{i}")
+            if feedback.get(i) is False:
                 st.warning("Incorrect. Try again?")
-                st.session_state.answers.pop()
-                st.session_state.submitted_questions.discard(submit_key)
-                st.stop()
+        st.form_submit_button("Submit all", on_click=grade_exam, args=(item_key, usage_cases, open_indices))
 
-            st.write(f"Your answer: {user_answer}")
+##############################################################################
+# TIMED EXAM - countdown in the browser, deadline enforced on the server
+##############################################################################
+COUNTDOWN_HTML = """
+<div id="clock" style="color: #ff5722; font: bold 26px 'Trebuchet MS', sans-serif;"></div>
+<script>
+const end = Date.now() + %d;
+function tick() {
+    const left = Math.max(0, Math.ceil((end - Date.now()) / 1000));
+    document.getElementById("clock").textContent =
+        "⏱️ " + Math.floor(left / 60) + ":" + String(left %% 60).padStart(2, "0") + (left ? " left" : " - time is up");
+    if (left) setTimeout(tick, 250);
+}
+tick();
+</script>
+"""
+
+def start_timed_exam(item_key, indices):
+    """ "Start timed exam" callback: the clock starts on the server now."""
+    st.session_state.timed_exam = TimedExam(item_key, indices, st.session_state.exam_minutes * 60)
+    st.session_state.timed_refused = None
+    st.session_state.page_start = indices[0] // st.session_state.page_size * st.session_state.page_size
+
+def record_timed_answer(i, answer_key, choices):
+    """Answer selectbox callback: stores the choice with the server time it was made."""
+    answer = st.session_state[answer_key]
+    choice_index = NO_CHOICE if answer == "-- Select --" else choices.index(answer)
+    if not st.session_state.timed_exam.answer(i, choice_index, time.time()):
+        st.session_state.timed_refused = i
+
+def finish_timed_exam(item_key, usage_cases):
+    """Grades the exam (on "Submit now" or once the deadline has passed) and records the results."""
+    exam = st.session_state.timed_exam
+    if exam is None or exam.is_graded():
+        return
+    progress = st.session_state.progress
+    for i, correct in exam.grade(usage_cases, time.time()).items():
+        if correct is None:
+            continue
+        choice_index = exam.choice(i)
+        if correct:
+            progress.submit(i, choice_index)
+            if progress_store is not None:
+                progress_store.record(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+        else:
+            progress.miss(i, choice_index)
+            if progress_store is not None:
+                progress_store.record_miss(st.session_state.learner_id, progress.category, item_key, i, choice_index)
+        record_answer(item_key, i, choice_index, correct)
+
+def exam_clock(item_key, usage_cases):
+    """
+    The countdown runs in the browser; this fragment is scheduled to run
+    again only at the deadline, to submit the exam if the learner has not.
+    """
+    exam = st.session_state.timed_exam
+    if exam is None or exam.is_graded():
+        return
+    if exam.expired():
+        finish_timed_exam(item_key, usage_cases)
+        st.rerun()
+    st.iframe(COUNTDOWN_HTML % (exam.remaining() * 1000), height=40)
+
+def timed_question(item_key, i, case):
+    """One exam exercise; choosing an answer reruns only this fragment."""
+    st.markdown(case_markup(case))
+    choices = list(case.get("choices", ()))
+    answer_key = f"timed_{item_key}_{i}"
+    st.selectbox("Select your answer:", ["-- Select --"] + choices, key=answer_key,
+                 on_change=record_timed_answer, args=(i, answer_key, choices))
+    if st.session_state.timed_refused == i:
+        st.warning("Time is up - this answer was not counted.")
+
+def show_exam_results(exam, usage_cases):
+    results = exam.results
+    right = sum(1 for correct in results.values() if correct)
+    unanswered = sum(1 for correct in results.values() if correct is None)
+    used = exam.graded_at - exam.started_at
+    st.subheader(f"Exam result: {right} of {len(results)} correct")
+    st.caption(f"Time used: {int(used // 60)}:{int(used % 60):02d}"
+               + (f" · {unanswered} left unanswered" if unanswered else ""))
+    lines = []
+    for i, correct in results.items():
+        case = usage_cases[i]
+        if correct:
+            lines.append(f"- ✅ **{case['title']}**: {answer_text(case, exam.choice(i))}")
+        elif correct is False:
+            lines.append(f"- ❌ **{case['title']}**: {answer_text(case, exam.choice(i))} "
+                         f"(correct: {case['correct_choice']})")
+        else:
+            lines.append(f"- ⏳ **{case['title']}**: not answered (correct: {case['correct_choice']})")
+    st.markdown("\n".join(lines))
+
+def show_timed_exam(item_key, usage_cases, progress, start, end):
+    """Start screen, running exam or results for the set's open exercises."""
+    exam = st.session_state.timed_exam
+    if exam is not None and exam.set_key != item_key:
+        exam = st.session_state.timed_exam = None
+    open_indices = [i for i in range(len(usage_cases)) if not progress.is_submitted(i)]
+
+    if exam is not None and exam.is_graded():
+        show_exam_results(exam, usage_cases)
+        if open_indices:
+            st.button("⏱️ New timed exam", on_click=start_timed_exam, args=(item_key, open_indices))
+        return
+    if exam is None:
+        minutes = st.session_state.exam_minutes
+        st.write(f"{len(open_indices)} open exercises, {minutes:g} minutes. Only answers chosen before "
+                 "the time runs out count; the exam is submitted automatically at the end.")
+        st.button("⏱️ Start timed exam", on_click=start_timed_exam, args=(item_key, open_indices))
+        return
+
+    # Wakes up once, just after the deadline (rescheduled on every full rerun)
+    st.fragment(exam_clock, run_every=exam.remaining() + 0.5)(item_key, usage_cases)
+    for i in range(start, end):
+        if i in exam.indices:
+            st.fragment(timed_question, key=f"timed_card_{item_key}_{i}")(item_key, i, usage_cases[i])
+    st.button("Submit now", on_click=finish_timed_exam, args=(item_key, usage_cases))
+
+##############################################################################
+# ADAPTIVE REVIEW - the next card across all items, picked by the scheduler
+##############################################################################
+def get_review_scheduler():
+    """
+    The learner's ReviewScheduler, with a card for every case in the corpus;
+    cards reviewed in earlier sessions keep their stored state.
+    """
+    scheduler = st.session_state.review_scheduler
+    if scheduler is None:
+        scheduler = ReviewScheduler()
+        scheduler.add_corpus(corpus, time.time())
+        if progress_store is not None:
+            for key, *state in progress_store.load_reviews(st.session_state.learner_id):
+                # Cards whose case left the corpus are not restored
+                if key in scheduler:
+                    scheduler.restore(key, *state)
+        st.session_state.review_scheduler = scheduler
+    return scheduler
+
+def _review_case(key):
+    """The usage case behind a card key, or None if the corpus no longer has it."""
+    category, item_key, i = key
+    try:
+        item, fingerprint = corpus.item_with_fingerprint(category, item_key)
+        return localize_item(category, item_key, item, fingerprint)["usage_cases"][i]
+    except (KeyError, IndexError):
+        return None
+
+def grade_review_card(key, answer_key):
+    """Adaptive review callback: grades the card and reschedules it."""
+    answer = st.session_state.get(answer_key, "-- Select --")
+    if answer == "-- Select --":
+        st.toast("You haven't selected an option yet.")
+        return
+    category, item_key, i = key
+    case = _review_case(key)
+    if case is None or answer not in case["choices"]:
+        # A corpus reload dropped or changed the case; show_adaptive_review picks the next card
+        st.session_state.review_card = None
+        return
+    choice_index = list(case["choices"]).index(answer)
+    correct = answer == case["correct_choice"]
+    card = st.session_state.review_scheduler.review(key, correct, time.time())
+    # The item's practice progress sees the answer too, like the other answer modes
+    progress = st.session_state.progress
+    if progress is not None and progress.belongs_to(category, item_key) and i < progress.total:
+        if correct:
+            progress.submit(i, choice_index)
+        else:
+            progress.miss(i, choice_index)
+    if progress_store is not None:
+        progress_store.record_review(st.session_state.learner_id, card)
+        if correct:
+            progress_store.record(st.session_state.learner_id, category, item_key, i, choice_index)
+        else:
+            progress_store.record_miss(st.session_state.learner_id, category, item_key, i, choice_index)
+    record_answer(item_key, i, choice_index, correct, category)
+    st.session_state.review_feedback = (key, answer, correct)
+    st.session_state.review_card = None
+
+def _format_wait(seconds):
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} min"
+    if seconds < 2 * 86400:
+        return f"{round(seconds / 3600)} h"
+    return f"{round(seconds / 86400)} days"
+
+def show_adaptive_review():
+    """One exercise at a time from any tense or conditional, whichever is due first."""
+    st.title("Adaptive Review 🧠")
+    scheduler = get_review_scheduler()
+    now = time.time()
+
+    feedback = st.session_state.review_feedback
+    if feedback is not None:
+        key, answer, correct = feedback
+        case = _review_case(key)
+        if case is not None:
+            if correct:
+                st.success(f"Correct! {answer}")
+            else:
+                st.warning(f"Not quite: the answer was \"{case['correct_choice']}\" (you chose \"{answer}\"). "
+                           "It will come back soon.")
+            if case.get("explanation"):
+                st.info(f"Explanation: {case['explanation']}")
+
+    key = st.session_state.review_card
+    while key is None or key not in scheduler or _review_case(key) is None:
+        if key is not None:
+            scheduler.discard(key)
+        card = scheduler.peek()
+        if card is None:
+            st.info("There is nothing to review yet.")
+            return
+        key = card.key
+        st.session_state.review_card = key
+    card = scheduler.card(key)
+    category, item_key, i = key
+    case = _review_case(key)
+
+    colA, colB = st.columns(2)
+    colA.metric("Due now", scheduler.due_count(now))
+    colB.metric("Cards", len(scheduler))
+    if card.due > now:
+        st.caption(f"All caught up - this card is due in {_format_wait(card.due - now)}; reviewing it early.")
+
+    st.write(f"**{corpus.item_name(category, item_key)}: {case['title']}**")
+    if "context" in case:
+        st.write(f"Context: {case['context']}")
+    st.write(case["question"])
+    # heap_seq changes on every reschedule, so each showing gets a fresh widget
+    answer_key = f"review_answer_{card.heap_seq}"
+    st.selectbox("Select your answer:", ["-- Select --"] + list(case.get("choices", ())), key=answer_key)
+    st.button("Submit", key="review_submit", on_click=grade_review_card, args=(key, answer_key))
+
+##############################################################################
+# TEACHER GRADING
+##############################################################################
+def show_teacher_grading():
+    """Upload a class answer sheet for the selected item and download the results."""
+    st.title("Grade a Class Answer Sheet 📋")
+    item_key = st.session_state.selected_item_key
+    if item_key is None:
+        st.info("Pick the tense or conditional the sheet is for in the sidebar.")
+        return
+    category = st.session_state.selected_category
+    info = corpus.item(category, item_key)
+    titles = [case["title"] for case in info["usage_cases"]]
+    batch_grader.sweep()
+
+    st.write(f"Sheet for **{info['name']}**: one row per student, a `student` column, then "
+             f"{len(titles)} answer columns in exercise order, each holding the answer text "
+             f"(leave it blank if the student skipped it).")
+    template = pd.DataFrame(columns=["student"] + titles).to_csv(index=False)
+    st.download_button("Download blank template", template, file_name=f"{info['name']} sheet.csv",
+                       mime="text/csv")
+
+    upload = st.file_uploader("Answer sheet (CSV)", type="csv", key=f"sheet_{category.value}_{item_key}")
+    if upload is not None and st.button("Grade sheet"):
+        previous = st.session_state.get("grading_job")
+        if previous is not None:
+            previous.discard()
+        try:
+            st.session_state.grading_job = batch_grader.submit(upload, info["usage_cases"], info["name"])
+        except ValueError as e:
+            st.session_state.grading_job = None
+            st.error(f"Could not grade the sheet: {e}")
+
+    job = st.session_state.get("grading_job")
+    if job is not None:
+        # Polls every second while the sheet is being graded
+        st.fragment(show_grading_job, run_every=None if job.done() else 1.0)(job)
+
+def show_grading_job(job):
+    if not job.done():
+        st.info(f"Grading the {job.item_name} sheet... {job.rows_done:,} students so far.")
+        return
+    if st.session_state.get("grading_job_shown") is not job:
+        # Finished during a poll: one full rerun drops the polling
+        st.session_state.grading_job_shown = job
+        st.rerun()
+    if job.error:
+        st.error(f"Could not grade the sheet: {job.error}")
+        return
+    summary = job.summary
+    st.subheader(f"Results: {job.item_name}")
+    colA, colB = st.columns(2)
+    colA.metric("Students", f"{summary['students']:,}")
+    colB.metric("Mean score", f"{summary['mean_score']:.1f} / {summary['questions']}")
+    per_question = summary["per_question"]
+    st.bar_chart(per_question, x="question", y="error_rate")
+    st.dataframe(per_question, hide_index=True)
+    colS, colQ = st.columns(2)
+    try:
+        with open(job.scores_path, "rb") as f:
+            colS.download_button("Download student scores", f, file_name=f"{job.item_name} scores.csv",
+                                 mime="text/csv")
+    except FileNotFoundError:
+        # Deleted by BatchGrader.sweep()
+        colS.caption(f"Student scores are kept for {batch_grader.ttl_seconds / 60:g} minutes; "
+                     "grade the sheet again to download them.")
+    colQ.download_button("Download question error rates", job.per_question_csv(),
+                         file_name=f"{job.item_name} questions.csv", mime="text/csv")
+
+##############################################################################
+# ANALYTICS (ADMIN)
+##############################################################################
+def _case_label(category, item_key, case_index, choice_index):
+    """(item name, case title, option text) for a tracked case, where still known."""
+    if case_index == GENERATED_CASE:
+        try:
+            name = corpus.item_name(GrammarCategory(category), item_key)
+        except KeyError:
+            name = item_key
+        return name, "Generated exercise sets", f"option {choice_index + 1}"
+    try:
+        item = corpus.item(GrammarCategory(category), item_key)
+        case = item["usage_cases"][case_index]
+        return item["name"], case["title"], case["choices"][choice_index]
+    except (KeyError, IndexError):
+        return item_key, f"Case #{case_index + 1}", f"option {choice_index + 1}"
+
+def show_analytics():
+    """Aggregates over every learner: hardest exercises and distinct learners per item."""
+    st.title("Answer Analytics 📊")
+    if answer_analytics is None:
+        st.info("Analytics are switched off (GRAMMAR_ANALYTICS_FILE is empty).")
+        return
+    answer_analytics.drain()
+    stats = answer_analytics.stats()
+    learners, item_learners = answer_analytics.learner_counts()
+    colA, colB, colC = st.columns(3)
+    colA.metric("Answers graded", f"{stats['events']:,}")
+    colB.metric("Distinct learners (approx.)", f"{learners:,}")
+    colC.metric("Exercises tracked", f"{stats['tracked_cases']:,}")
+
+    st.subheader("Hardest exercises")
+    rows = []
+    for case in answer_analytics.case_stats():
+        wrong = case["attempts"] - case["correct"]
+        if not wrong:
+            continue
+        wrong_choices = case["wrong_choices"]
+        top_wrong = max(range(len(wrong_choices)), key=wrong_choices.__getitem__)
+        name, title, option = _case_label(case["category"], case["item_key"], case["case_index"], top_wrong)
+        rows.append({
+            "item": name, "exercise": title, "attempts": case["attempts"], "wrong": wrong,
+            "error rate": round(wrong / case["attempts"], 3),
+            "most chosen wrong answer": option, "times chosen": wrong_choices[top_wrong],
+        })
+    if rows:
+        hardest = pd.DataFrame(rows).sort_values(["wrong", "error rate"], ascending=False).head(25)
+        st.dataframe(hardest, hide_index=True)
+    else:
+        st.write("No wrong answers recorded yet.")
+
+    st.subheader("Learners per item (approx.)")
+    st.dataframe(pd.DataFrame(
+        [{"category": category, "item": _case_label(category, item_key, 0, 0)[0], "learners": count}
+         for (category, item_key), count in sorted(item_learners.items())]), hide_index=True)
+    st.caption(f"Analytics: {stats}")
 
 ##############################################################################
 # MAIN EXECUTION
 ##############################################################################
+def show_debug_panel(record):
+    """Collapsible table of this rerun's phases with rolling p50/p95."""
+    with st.expander("Debug: rerun profile"):
+        rows = []
+        for entry in record["phases"] + [{"phase": "total", "seconds": record["total_seconds"],
+                                          "elements": record["elements"]}]:
+            p50, p95 = phase_stats.percentiles(entry["phase"])
+            rows.append({
+                "phase": entry["phase"],
+                "this rerun (ms)": round(entry["seconds"] * 1000, 2),
+                "elements": entry["elements"],
+                "p50 (ms)": round(p50 * 1000, 2),
+                "p95 (ms)": round(p95 * 1000, 2),
+            })
+        st.table(rows)
+        st.caption(f"Corpus: {corpus.stats()}")
+        st.caption(f"Exercise sets: {exercise_generator.stats()}")
+
 def main():
-    # If no item is selected, show welcome
-    if st.session_state.selected_item_key is None:
-        show_welcome()
-    else:
-        show_explanation_and_questions()
+    try:
+        if st.session_state.view == "Adaptive review":
+            with profiler.phase("show_adaptive_review"):
+                show_adaptive_review()
+        elif st.session_state.view == "Teacher grading":
+            with profiler.phase("show_teacher_grading"):
+                show_teacher_grading()
+        elif st.session_state.view == "Analytics" and is_admin():
+            with profiler.phase("show_analytics"):
+                show_analytics()
+        # If no item is selected, show welcome
+        elif st.session_state.selected_item_key is None:
+            with profiler.phase("show_welcome"):
+                show_welcome()
+        else:
+            with profiler.phase("show_explanation_and_questions"):
+                show_explanation_and_questions()
+    finally:
+        with profiler.phase("save_state"):
+            save_shared_state()
+        record = profiler.finish()
+    if record is not None:
+        show_debug_panel(record)
 
 if __name__ == "__main__":
     main()
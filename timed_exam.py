@@ -0,0 +1,79 @@
+"""
+Timed exams for the Grammar Genius app.
+
+A TimedExam covers the exercises of one set that were still open when it
+started, and has a deadline kept on the server. Every answer is stored with
+the server time it was chosen: answers chosen after the deadline (plus a
+short grace period for network delay) are refused and never graded, so
+neither a late auto-submit nor a tampered browser clock extends the exam.
+"""
+import time
+
+from learner_progress import NO_CHOICE
+
+DEFAULT_EXAM_MINUTES = 10.0
+GRACE_SECONDS = 2.0
+
+class TimedExam:
+    """The open exercises of one set, a deadline and the answers chosen so far."""
+
+    __slots__ = ("set_key", "indices", "started_at", "deadline", "results", "graded_at", "_answers")
+
+    def __init__(self, set_key, indices, seconds, now=None):
+        self.set_key = set_key
+        self.indices = tuple(indices)
+        self.started_at = time.time() if now is None else now
+        self.deadline = self.started_at + seconds
+        self.results = None
+        self.graded_at = None
+        # exercise index -> (choice index, server time it was chosen)
+        self._answers = {}
+
+    def remaining(self, now=None):
+        now = time.time() if now is None else now
+        return max(0.0, self.deadline - now)
+
+    def expired(self, now=None):
+        return (time.time() if now is None else now) >= self.deadline
+
+    def is_graded(self):
+        return self.results is not None
+
+    def answer(self, i, choice_index, now=None):
+        """Records (or with NO_CHOICE clears) an answer; False if the exam no longer takes answers."""
+        now = time.time() if now is None else now
+        if self.is_graded() or now > self.deadline + GRACE_SECONDS or i not in self.indices:
+            return False
+        if choice_index == NO_CHOICE:
+            self._answers.pop(i, None)
+        else:
+            self._answers[i] = (choice_index, now)
+        return True
+
+    def choice(self, i):
+        answer = self._answers.get(i)
+        return NO_CHOICE if answer is None else answer[0]
+
+    def answered_count(self):
+        return len(self._answers)
+
+    def grade(self, usage_cases, now=None):
+        """
+        {exercise index: True/False/None (unanswered)} for every exercise of
+        the exam. Grading happens once; later calls return the same results.
+        """
+        if self.results is not None:
+            return self.results
+        now = time.time() if now is None else now
+        cutoff = self.deadline + GRACE_SECONDS
+        results = {}
+        for i in self.indices:
+            choice_index, chosen_at = self._answers.get(i, (NO_CHOICE, None))
+            if choice_index == NO_CHOICE or chosen_at > cutoff:
+                results[i] = None
+            else:
+                case = usage_cases[i]
+                results[i] = case["choices"][choice_index] == case["correct_choice"]
+        self.results = results
+        self.graded_at = min(now, self.deadline)
+        return results